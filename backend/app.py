@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for, send_file, make_response, session, g
+from flask import Flask, Response, request, jsonify, render_template, redirect, url_for, send_file, make_response, session, g, has_app_context, has_request_context
 import sqlite3
 import json
 import os
@@ -6,15 +6,111 @@ from datetime import datetime, timedelta
 import csv
 from io import StringIO
 import bcrypt
-from functools import wraps
+from functools import wraps, partial
 from flask_cors import CORS
 from marshmallow import ValidationError
 import time
+import atexit
 
 from config import config
+from db_pool import ConnectionPool, build_pragmas
+from log_writer import OperationLogWriter
+from resource_sampler import ResourceSampler
+from export_jobs import (
+    JOBS_TABLE,
+    STATUS_COMPLETED,
+    STATUS_EXPIRED,
+    ExportJobManager,
+    create_jobs_table,
+    track_progress,
+    job_to_dict
+)
+from change_feed import (
+    CHANGES_TABLE,
+    OP_DELETE,
+    create_change_feed_schema,
+    seed_changes,
+    sequence_window,
+    changes_query
+)
+from questionnaire_fields import HOT_FIELDS, extract_hot_fields
+from questionnaire_store import (
+    configure as configure_questionnaire_store,
+    create_definitions_table,
+    dump_document,
+    load_document
+)
+from user_cache import UserCache, create_user_cache_schema
+from json_codec import (
+    FastJSONProvider,
+    configure as configure_json_codec,
+    dumps as json_dumps,
+    dumps_bytes as json_dumps_bytes,
+    loads as json_loads
+)
+from storage_codec import (
+    configure as configure_storage_codec,
+    create_dictionaries_table,
+    encode as encode_column
+)
+from idempotency import (
+    MAX_KEY_LENGTH as IDEMPOTENCY_MAX_KEY_LENGTH,
+    DEFAULT_KEY_TTL as IDEMPOTENCY_DEFAULT_KEY_TTL,
+    DEFAULT_DEDUP_WINDOW as SUBMIT_DEFAULT_DEDUP_WINDOW,
+    IdempotencyConflict,
+    create_submission_keys_table,
+    content_hash,
+    find_submission,
+    remember_submission
+)
+from bulk_submit import (
+    DEFAULT_MAX_ITEMS as BULK_DEFAULT_MAX_ITEMS,
+    DEFAULT_PARALLEL_MIN as BULK_DEFAULT_PARALLEL_MIN,
+    prepare_submissions,
+    insert_submissions,
+    parse_ndjson
+)
+from query_filters import date_range_filter, day_filter
+from search_index import (
+    FTS_TABLE,
+    BM25_WEIGHTS,
+    create_search_table,
+    index_questionnaire,
+    remove_questionnaires,
+    rebuild_search_index,
+    build_match_query,
+    make_snippet
+)
+from stats_rollup import (
+    ROLLUP_TABLE,
+    SOURCE_QUESTIONNAIRES,
+    SOURCE_OPERATION_LOGS,
+    DIM_TOTAL,
+    DIM_DAY,
+    DIM_HOUR,
+    DIM_TYPE,
+    DIM_GRADE,
+    create_rollup_schema,
+    rebuild_rollups,
+    read_count,
+    read_range_total,
+    read_buckets
+)
+from pagination import (
+    CursorError,
+    CountCache,
+    COUNT_MODES,
+    COUNT_EXACT,
+    COUNT_ESTIMATE,
+    COUNT_NONE,
+    encode_cursor,
+    decode_cursor,
+    keyset_condition
+)
 from validation import (
     validate_questionnaire_with_schema, 
     normalize_questionnaire_data, 
+    prepare_questionnaire,
     quick_validate,
     create_validation_error_response
 )
@@ -26,6 +122,7 @@ from question_types import (
 from error_handlers import (
     register_error_handlers,
     StandardErrorResponse,
+    ErrorCodes,
     validation_error,
     auth_error,
     permission_error,
@@ -105,6 +202,10 @@ app = Flask(__name__, template_folder='templates', static_folder='static')
 config_name = os.environ.get('FLASK_ENV', 'development')
 app.config.from_object(config[config_name])
 
+# API 响应和存储层共用的 JSON 序列化（安装了 orjson 时使用 orjson）
+configure_json_codec(app.config.get('JSON_PROVIDER', 'auto'))
+app.json = FastJSONProvider(app)
+
 # 记录应用启动时间用于性能监控
 app.config['START_TIME'] = time.time()
 
@@ -170,21 +271,25 @@ def before_request():
         if current_time - last_activity > timeout_seconds - 300:  # 5分钟警告
             g.session_warning = True
 
+SESSION_WARNING_MESSAGE = '会话即将过期，请及时刷新'
+
+def session_warning_envelope(obj):
+    """jsonify 序列化前调用：会话即将过期时在成功响应中附加 session_warning 字段"""
+    if has_request_context() and g.get('session_warning') and isinstance(obj, dict) and obj.get('success'):
+        return dict(obj, session_warning=SESSION_WARNING_MESSAGE)
+    return obj
+
+app.json.envelope = session_warning_envelope
+
 @app.after_request
 def after_request(response):
-    """请求后处理 - 添加会话警告头"""
-    if hasattr(g, 'session_warning') and g.session_warning:
+    """请求后处理 - 添加会话警告头
+
+    JSON 响应中的 session_warning 字段在 jsonify 序列化时附加（session_warning_envelope），
+    这里不再解析和重新序列化响应体
+    """
+    if g.get('session_warning'):
         response.headers['X-Session-Warning'] = 'Session will expire soon'
-        
-        # 如果是JSON响应，添加警告信息
-        if response.content_type and 'application/json' in response.content_type:
-            try:
-                data = response.get_json()
-                if isinstance(data, dict) and data.get('success'):
-                    data['session_warning'] = '会话即将过期，请及时刷新'
-                    response.data = json.dumps(data, default=str, ensure_ascii=False)
-            except:
-                pass  # 如果无法解析JSON，忽略警告
     
     return response
 
@@ -216,7 +321,8 @@ def init_db():
             gender TEXT,
             birthdate TEXT,
             school TEXT,
-            teacher TEXT
+            teacher TEXT,
+            deleted_at TIMESTAMP
         )
         ''')
         
@@ -269,6 +375,20 @@ def init_db():
         except sqlite3.OperationalError:
             pass  # 字段已存在
         
+        # 添加扩展基本信息字段（写入时从data中提取）
+        for column, column_type in (('school_name', 'TEXT'), ('admission_date', 'DATE'), ('address', 'TEXT'),
+                                    ('filler_name', 'TEXT'), ('fill_date', 'DATE')):
+            try:
+                cursor.execute(f"ALTER TABLE questionnaires ADD COLUMN {column} {column_type}")
+            except sqlite3.OperationalError:
+                pass  # 字段已存在
+        
+        # 添加软删除标记字段（删除时不再重新编号ID）
+        try:
+            cursor.execute("ALTER TABLE questionnaires ADD COLUMN deleted_at TIMESTAMP")
+        except sqlite3.OperationalError:
+            pass  # 字段已存在
+        
         # 创建用户认证表
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -281,6 +401,11 @@ def init_db():
         )
         ''')
         
+        # 用户身份缓存的代次计数表及 users 表触发器
+        create_user_cache_schema(cursor)
+        if _user_cache is not None:
+            _user_cache.invalidate()
+        
         # 创建操作日志表
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS operation_logs (
@@ -294,6 +419,39 @@ def init_db():
         )
         ''')
         
+        # 创建问卷全文检索表，首次创建时为已有问卷建立索引
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name = ?", (FTS_TABLE,))
+        search_index_missing = cursor.fetchone() is None
+        create_search_table(cursor)
+        
+        # 创建统计汇总表及触发器，首次创建时根据已有数据计算
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name = ?", (ROLLUP_TABLE,))
+        rollups_missing = cursor.fetchone() is None
+        create_rollup_schema(cursor)
+        
+        # 创建后台导出任务表
+        create_jobs_table(cursor)
+        
+        # 创建提交幂等记录表
+        create_submission_keys_table(cursor)
+        
+        # 创建问卷定义表（问卷按定义 + 作答的紧凑格式保存）
+        create_definitions_table(cursor)
+        configure_questionnaire_store(DATABASE)
+        
+        # 创建压缩字典表；STORAGE_CODEC 不为 none 时新写入的 data / report_data 压缩保存
+        create_dictionaries_table(cursor)
+        configure_storage_codec(
+            codec=app.config.get('STORAGE_CODEC', 'none'),
+            level=app.config.get('STORAGE_CODEC_LEVEL') or None,
+            min_bytes=app.config.get('STORAGE_CODEC_MIN_BYTES', 256)
+        )
+        
+        # 创建问卷变更序列表及触发器，首次创建时为已有问卷生成变更记录
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name = ?", (CHANGES_TABLE,))
+        changes_missing = cursor.fetchone() is None
+        create_change_feed_schema(cursor)
+        
         # 创建默认管理员用户（如果不存在）
         cursor.execute("SELECT COUNT(*) FROM users WHERE username = 'admin'")
         if cursor.fetchone()[0] == 0:
@@ -305,13 +463,64 @@ def init_db():
             )
         
         conn.commit()
+        
+        if search_index_missing:
+            indexed = rebuild_search_index(conn)
+            print(f"全文检索索引已建立，共 {indexed} 条问卷")
+        if rollups_missing:
+            rollup_rows = rebuild_rollups(conn)
+            print(f"统计汇总表已建立，共 {rollup_rows} 条汇总记录")
+        if changes_missing:
+            seeded = seed_changes(conn)
+            print(f"问卷变更序列已建立，共 {seeded} 条问卷")
         print("数据库初始化完成")
 
+# 数据库连接池（每个工作进程一个，首次使用时按配置创建）
+_db_pool = None
+
+def get_db_pool():
+    """获取当前进程的数据库连接池"""
+    global _db_pool
+    if _db_pool is None:
+        _db_pool = ConnectionPool(
+            DATABASE,
+            max_size=app.config.get('DB_POOL_SIZE', 5),
+            pragmas=build_pragmas(app.config)
+        )
+    return _db_pool
+
 # 获取数据库连接
 def get_db():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """获取数据库连接 - 同一请求内复用 g 中缓存的连接，请求结束时归还连接池"""
+    if has_app_context():
+        if 'db_conn' not in g:
+            g.db_conn = get_db_pool().acquire()
+        return g.db_conn
+    
+    # 请求上下文之外（脚本、后台线程）使用独立连接
+    return get_db_pool().connect()
+
+@app.teardown_appcontext
+def release_db(exception=None):
+    """请求结束时将连接归还连接池"""
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        get_db_pool().release(conn)
+
+def iter_query_rows(query, params, chunk_size=None):
+    """分批读取查询结果的生成器（用于流式导出）
+    
+    在请求结束后才会被迭代，因此使用独立的连接池连接，迭代完成或客户端断开时归还
+    """
+    chunk_size = chunk_size or app.config.get('EXPORT_STREAM_CHUNK_SIZE', 500)
+    with get_db_pool().connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
 
 # ==================== 会话管理和权限控制 ====================
 
@@ -437,28 +646,38 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+_user_cache = None
+
+def get_user_cache():
+    """获取用户身份缓存（validate_session_integrity 使用）"""
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = UserCache(
+            ttl=app.config.get('USER_CACHE_TTL', 30),
+            max_size=app.config.get('USER_CACHE_SIZE', 1024),
+            check_interval=app.config.get('USER_CACHE_CHECK_INTERVAL', 2.0)
+        )
+    return _user_cache
+
 def validate_session_integrity():
     """验证会话完整性"""
     if 'user_id' in session:
         user_id = session.get('user_id')
         
-        # 验证用户是否仍然存在且有效
+        # 验证用户是否仍然存在且有效（用户记录在进程内缓存，用户变更后最迟在代次检查间隔内生效）
         try:
-            with get_db() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, username, role FROM users WHERE id = ?", (user_id,))
-                user = cursor.fetchone()
-                
-                if not user:
-                    # 用户不存在，清除会话
-                    session.clear()
-                    return False
-                
-                # 更新会话中的用户信息（防止权限变更后仍使用旧权限）
-                session['username'] = user['username']
-                session['user_role'] = user['role']
-                
-                return True
+            user = get_user_cache().get(user_id, get_db)
+            
+            if not user:
+                # 用户不存在，清除会话
+                session.clear()
+                return False
+            
+            # 更新会话中的用户信息（防止权限变更后仍使用旧权限）
+            session['username'] = user['username']
+            session['user_role'] = user['role']
+            
+            return True
         except Exception as e:
             print(f"验证会话完整性失败: {e}")
             session.clear()
@@ -468,6 +687,45 @@ def validate_session_integrity():
 
 # ==================== 操作日志系统 ====================
 
+_log_writer = None
+
+def get_log_writer():
+    """获取操作日志后台写入器（按需创建）"""
+    global _log_writer
+    if _log_writer is None:
+        _log_writer = OperationLogWriter(
+            connect=lambda: get_db_pool().connect(),
+            fallback_file=os.path.join(os.path.dirname(__file__), 'logs', 'operation_errors.log'),
+            queue_size=app.config.get('OPERATION_LOG_QUEUE_SIZE', 10000),
+            batch_size=app.config.get('OPERATION_LOG_BATCH_SIZE', 200),
+            flush_interval=app.config.get('OPERATION_LOG_FLUSH_INTERVAL', 1.0),
+            put_timeout=app.config.get('OPERATION_LOG_PUT_TIMEOUT', 0.0),
+            enabled=app.config.get('OPERATION_LOG_ASYNC', True)
+        )
+    return _log_writer
+
+def flush_operation_logs(timeout=5.0):
+    """写完队列中的操作日志（gunicorn worker_exit 钩子和进程退出时调用）"""
+    if _log_writer is not None:
+        _log_writer.flush(timeout)
+        _log_writer.stop(timeout)
+
+atexit.register(flush_operation_logs)
+
+# 系统资源采样器（每个工作进程一个，首次使用时启动后台采样线程）
+_resource_sampler = None
+
+def get_resource_sampler():
+    """获取系统资源后台采样器"""
+    global _resource_sampler
+    if _resource_sampler is None:
+        _resource_sampler = ResourceSampler(
+            disk_path=os.path.dirname(os.path.abspath(DATABASE)),
+            interval=app.config.get('SYSTEM_SAMPLE_INTERVAL', 5.0),
+            history_size=app.config.get('SYSTEM_SAMPLE_HISTORY', 120)
+        )
+    return _resource_sampler
+
 class OperationLogger:
     """操作日志记录器"""
     
@@ -479,6 +737,7 @@ class OperationLogger:
     UPDATE_QUESTIONNAIRE = 'UPDATE_QUESTIONNAIRE'
     DELETE_QUESTIONNAIRE = 'DELETE_QUESTIONNAIRE'
     BATCH_DELETE = 'BATCH_DELETE'
+    BULK_CREATE = 'BULK_CREATE'
     VIEW_QUESTIONNAIRE = 'VIEW_QUESTIONNAIRE'
     EXPORT_DATA = 'EXPORT_DATA'
     ACCESS_DENIED = 'ACCESS_DENIED'
@@ -520,13 +779,8 @@ class OperationLogger:
                 log_details['sensitive'] = True
                 log_details['session_id'] = session.get('_id', 'unknown')
             
-            with get_db() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT INTO operation_logs (user_id, operation, target_id, details) VALUES (?, ?, ?, ?)",
-                    (user_id, operation, target_id, json.dumps(log_details, default=str, ensure_ascii=False))
-                )
-                conn.commit()
+            # 交给后台线程批量写入，不在请求路径上开启写事务
+            get_log_writer().submit(user_id, operation, target_id, log_details)
                 
         except Exception as e:
             # 记录日志失败不应该影响主要功能
@@ -554,13 +808,7 @@ class OperationLogger:
                 'system_event': True
             }
             
-            with get_db() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT INTO operation_logs (user_id, operation, target_id, details) VALUES (?, ?, ?, ?)",
-                    (None, f'SYSTEM_{event_type}', None, json.dumps(log_details, default=str, ensure_ascii=False))
-                )
-                conn.commit()
+            get_log_writer().submit(None, f'SYSTEM_{event_type}', None, log_details)
                 
         except Exception as e:
             print(f"记录系统事件失败: {e}")
@@ -819,6 +1067,18 @@ def submit_questionnaire_legacy():
     """问卷提交接口 - 兼容旧版本API路径"""
     return submit_questionnaire()
 
+def duplicate_submission_response(questionnaire_id):
+    """重复提交时返回第一次提交的问卷 ID，不再写入"""
+    response = jsonify({
+        'success': True,
+        'id': questionnaire_id,
+        'duplicate': True,
+        'message': '问卷已提交，请勿重复提交',
+        'timestamp': datetime.now().isoformat()
+    })
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response, 200
+
 # 保存问卷数据 - 标准化API路径
 @app.route('/api/questionnaires', methods=['POST'])
 def submit_questionnaire():
@@ -829,23 +1089,29 @@ def submit_questionnaire():
             response_data, status_code = validation_error(['请求数据不能为空'])
             return jsonify(response_data), status_code
         
-        # 数据标准化
-        try:
-            normalized_data = normalize_questionnaire_data(data)
-        except Exception as e:
-            response_data, status_code = validation_error([f'数据标准化失败: {str(e)}'])
+        idempotency_key = request.headers.get('Idempotency-Key', '').strip()
+        if len(idempotency_key) > IDEMPOTENCY_MAX_KEY_LENGTH:
+            response_data, status_code = validation_error([f'Idempotency-Key 长度不能超过 {IDEMPOTENCY_MAX_KEY_LENGTH} 个字符'])
             return jsonify(response_data), status_code
         
-        # 使用新的验证模块进行验证
-        is_valid, validation_errors, validated_data = validate_questionnaire_with_schema(normalized_data)
+        # 单遍完成标准化、验证、问题类型处理和计分
+        is_valid, validation_errors, final_data = prepare_questionnaire(data)
         
         if not is_valid:
             response_data, status_code = validation_error(validation_errors)
             return jsonify(response_data), status_code
         
-        # 从验证后的数据中提取基本信息
-        questionnaire_type = validated_data.get('type', 'unknown')
-        basic_info = validated_data.get('basic_info', {})
+        # 重复提交（相同的幂等键，或去重窗口内的相同内容）直接返回第一次提交的问卷
+        digest = content_hash(final_data)
+        dedup_window = app.config.get('SUBMIT_DEDUP_WINDOW', SUBMIT_DEFAULT_DEDUP_WINDOW)
+        with get_db() as conn:
+            existing_id = find_submission(conn.cursor(), idempotency_key, digest, dedup=dedup_window > 0)
+        if existing_id is not None:
+            return duplicate_submission_response(existing_id)
+        
+        # 从处理后的数据中提取基本信息
+        questionnaire_type = final_data.get('type', 'unknown')
+        basic_info = final_data.get('basic_info', {})
         
         # 调试输出
         print("\n" + "=" * 80)
@@ -853,58 +1119,53 @@ def submit_questionnaire():
         print("=" * 80)
         print(f"DEBUG: Complete basic_info content: {basic_info}")
         print(f"DEBUG: basic_info keys: {list(basic_info.keys())}")
-        print(f"📋 validated_data keys: {list(validated_data.keys())}")
+        print(f"📋 final_data keys: {list(final_data.keys())}")
         print(f"📋 basic_info keys: {list(basic_info.keys()) if basic_info else 'None'}")
-        print(f"👤 validated_data gender: '{validated_data.get('gender')}'")
-        print(f"🎂 validated_data birthdate: '{validated_data.get('birthdate')}'")
+        print(f"👤 final_data gender: '{final_data.get('gender')}'")
+        print(f"🎂 final_data birthdate: '{final_data.get('birthdate')}'")
         if basic_info:
             print(f"👤 basic_info gender: '{basic_info.get('gender')}'")
             print(f"🎂 basic_info birthdate: '{basic_info.get('birthdate')}'")
             print(f"🎂 basic_info birth_date: '{basic_info.get('birth_date')}'")
         print("=" * 80 + "\n")
         
-        name = basic_info.get('name', '') or validated_data.get('name', '')
-        grade = basic_info.get('grade', '') or validated_data.get('grade', '')
-        submission_date = basic_info.get('submission_date', datetime.now().strftime('%Y-%m-%d'))
-        
-        # 提取家长联系方式
-        parent_phone = basic_info.get('parent_phone', '') or validated_data.get('parent_phone', '')
-        parent_wechat = basic_info.get('parent_wechat', '') or validated_data.get('parent_wechat', '')
-        parent_email = basic_info.get('parent_email', '') or validated_data.get('parent_email', '')
-        
-        # 提取性别和出生日期，优先从basic_info获取，如果没有则从顶级字段获取
-        gender = basic_info.get('gender', '') or validated_data.get('gender', '')
-        birthdate = basic_info.get('birthdate', '') or basic_info.get('birth_date', '') or validated_data.get('birthdate', '') or validated_data.get('birth_date', '')
+        # 写入时提取热点字段到独立列，列表查询无需再解析data
+        fields = extract_hot_fields(final_data)
+        name = fields['name']
         
-        # 提取学校和老师信息
-        school = basic_info.get('school', '') or validated_data.get('school', '')
-        teacher = basic_info.get('teacher', '') or validated_data.get('teacher', '')
-        
-        # 提取新增字段
-        school_name = basic_info.get('school_name', '')
-        admission_date = basic_info.get('admission_date', '')
-        address = basic_info.get('address', '')
-        filler_name = basic_info.get('filler_name', '')
-        fill_date = basic_info.get('fill_date', '')
-        
-        print(f"DEBUG: Final extracted values - gender: '{gender}', birthdate: '{birthdate}', school: '{school}', teacher: '{teacher}'")
-        print(f"DEBUG: New fields - school_name: '{school_name}', admission_date: '{admission_date}', address: '{address}', filler_name: '{filler_name}', fill_date: '{fill_date}'")
+        print(f"DEBUG: Final extracted values - gender: '{fields['gender']}', birthdate: '{fields['birthdate']}', school: '{fields['school']}', teacher: '{fields['teacher']}'")
+        print(f"DEBUG: New fields - school_name: '{fields['school_name']}', admission_date: '{fields['admission_date']}', address: '{fields['address']}', filler_name: '{fields['filler_name']}', fill_date: '{fields['fill_date']}'")
         
         # 始终使用服务器当前时间作为创建时间
         created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        # 使用问题类型处理器进行最终处理
-        final_data = process_complete_questionnaire(validated_data)
-        
         # 将处理后的数据保存到数据库
+        columns = ['type', 'created_at', 'updated_at', 'data'] + list(HOT_FIELDS)
         with get_db() as conn:
             cursor = conn.cursor()
+            # 持有写锁后再检查一次，并发的重试请求只会有一个写入
+            if not conn.in_transaction:
+                cursor.execute("BEGIN IMMEDIATE")
+            existing_id = find_submission(cursor, idempotency_key, digest, dedup=dedup_window > 0)
+            if existing_id is not None:
+                conn.rollback()
+                return duplicate_submission_response(existing_id)
+            
+            # 问卷定义与问卷在同一事务中写入，data 列只保存作答
+            values = [questionnaire_type, created_at, created_at, dump_document(cursor, final_data)] + [fields[f] for f in HOT_FIELDS]
             cursor.execute(
-                "INSERT INTO questionnaires (type, name, grade, submission_date, created_at, updated_at, data, parent_phone, parent_wechat, parent_email, gender, birthdate, school, teacher, school_name, admission_date, address, filler_name) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                (questionnaire_type, name, grade, submission_date, created_at, created_at, json.dumps(final_data, default=str, ensure_ascii=False), parent_phone, parent_wechat, parent_email, gender, birthdate, school, teacher, school_name, admission_date, address, filler_name)
+                f"INSERT INTO questionnaires ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})",
+                values
             )
-            conn.commit()
             questionnaire_id = cursor.lastrowid
+            # 同一事务中写入全文检索索引和幂等记录
+            index_questionnaire(cursor, questionnaire_id, fields, final_data, questionnaire_type)
+            remember_submission(
+                cursor, questionnaire_id, digest, idempotency_key,
+                key_ttl=app.config.get('IDEMPOTENCY_KEY_TTL', IDEMPOTENCY_DEFAULT_KEY_TTL),
+                dedup_window=dedup_window
+            )
+            conn.commit()
         
         # 记录操作日志
         OperationLogger.log(OperationLogger.CREATE_QUESTIONNAIRE, questionnaire_id, f'创建问卷: {name} - {questionnaire_type}')
@@ -916,6 +1177,13 @@ def submit_questionnaire():
             'timestamp': datetime.now().isoformat()
         }), 201
         
+    except IdempotencyConflict:
+        response_data, status_code = StandardErrorResponse.create_error_response(
+            ErrorCodes.RESOURCE_EXISTS,
+            'Idempotency-Key 已用于提交其他内容',
+            status_code=409
+        )
+        return jsonify(response_data), status_code
     except ValidationError as e:
         response_data, status_code = validation_error(e.messages)
         return jsonify(response_data), status_code
@@ -923,6 +1191,153 @@ def submit_questionnaire():
         response_data, status_code = server_error('问卷提交失败', str(e))
         return jsonify(response_data), status_code
 
+# 批量提交问卷（纸质问卷集中录入）
+@app.route('/api/questionnaires/bulk', methods=['POST'])
+@login_required
+def bulk_submit_questionnaires():
+    """一次提交多份问卷：请求体为 JSON 数组（或 {"questionnaires": [...]}），也可以是 NDJSON
+    
+    每份问卷单独校验，校验通过的在一个事务中写入，返回每份问卷的结果
+    """
+    try:
+        parse_errors = {}
+        if request.mimetype in ('application/x-ndjson', 'application/jsonl', 'application/x-jsonlines'):
+            items, parse_errors = parse_ndjson(request.get_data(as_text=True))
+        else:
+            payload = request.get_json(silent=True)
+            if isinstance(payload, dict):
+                payload = payload.get('questionnaires')
+            if not isinstance(payload, list):
+                response_data, status_code = validation_error(['请求体必须是问卷数组或 NDJSON'])
+                return jsonify(response_data), status_code
+            items = payload
+        
+        max_items = app.config.get('BULK_SUBMIT_MAX_ITEMS', BULK_DEFAULT_MAX_ITEMS)
+        if not items:
+            response_data, status_code = validation_error(['请求数据不能为空'])
+            return jsonify(response_data), status_code
+        if len(items) > max_items:
+            response_data, status_code = validation_error([f'单次最多提交 {max_items} 份问卷，当前 {len(items)} 份'])
+            return jsonify(response_data), status_code
+        
+        pending = [i for i in range(len(items)) if i not in parse_errors]
+        prepared = prepare_submissions(
+            [items[i] for i in pending],
+            workers=app.config.get('BULK_SUBMIT_WORKERS', 0),
+            parallel_min=app.config.get('BULK_SUBMIT_PARALLEL_MIN', BULK_DEFAULT_PARALLEL_MIN)
+        )
+        
+        results = [None] * len(items)
+        for index, message in parse_errors.items():
+            results[index] = {'index': index, 'success': False, 'errors': [message]}
+        valid = []
+        for index, (errors, record) in zip(pending, prepared):
+            if record is None:
+                results[index] = {'index': index, 'success': False, 'errors': errors}
+            else:
+                valid.append((index, record))
+        
+        # 始终使用服务器当前时间作为创建时间
+        created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with get_db() as conn:
+            ids = insert_submissions(conn, [record for _, record in valid], created_at)
+        for (index, record), questionnaire_id in zip(valid, ids):
+            results[index] = {'index': index, 'success': True, 'id': questionnaire_id}
+        
+        failed = len(items) - len(ids)
+        if ids:
+            OperationLogger.log(OperationLogger.BULK_CREATE, None,
+                                f'批量提交问卷 {len(ids)} 份（ID {ids[0]}-{ids[-1]}），失败 {failed} 份')
+        
+        if not ids:
+            status_code = 400
+        elif failed:
+            status_code = 207
+        else:
+            status_code = 201
+        return jsonify({
+            'success': failed == 0,
+            'total': len(items),
+            'created': len(ids),
+            'failed': failed,
+            'results': results,
+            'message': f'成功提交 {len(ids)} 份问卷' + (f'，{failed} 份未通过校验' if failed else ''),
+            'timestamp': datetime.now().isoformat()
+        }), status_code
+        
+    except Exception as e:
+        response_data, status_code = server_error('批量提交问卷失败', str(e))
+        return jsonify(response_data), status_code
+
+# 列表接口可返回的字段（data 为完整问卷文档，只在明确请求时读取）
+QUESTIONNAIRE_LIST_FIELDS = (
+    'id', 'type', 'name', 'grade', 'gender', 'birthdate', 'submission_date',
+    'created_at', 'updated_at', 'parent_phone', 'parent_wechat', 'parent_email',
+    'school', 'teacher', 'school_name', 'admission_date', 'address',
+    'filler_name', 'fill_date', 'data'
+)
+QUESTIONNAIRE_SUMMARY_FIELDS = tuple(f for f in QUESTIONNAIRE_LIST_FIELDS if f != 'data')
+# 空字符串按未填写返回 None 的字段
+QUESTIONNAIRE_NULLABLE_FIELDS = {
+    'gender', 'birthdate', 'parent_phone', 'parent_wechat', 'parent_email', 'school', 'teacher'
+}
+# 支持游标分页的排序字段（不含 NULL 的列；name、grade、submission_date 可能为 NULL，只能偏移分页）
+QUESTIONNAIRE_CURSOR_SORT_FIELDS = ('id', 'type', 'created_at', 'updated_at', 'relevance')
+
+_count_cache = None
+
+def get_count_cache():
+    """获取列表总数缓存（count=estimate 时使用）"""
+    global _count_cache
+    if _count_cache is None:
+        _count_cache = CountCache(ttl=app.config.get('PAGINATION_COUNT_CACHE_TTL', 30))
+    return _count_cache
+
+def parse_pagination_args(sort_by, sort_order):
+    """解析分页方式参数，返回 (游标位置, 是否游标分页, 总数统计方式)
+
+    - 传入 cursor 参数（首页可为空字符串）时使用游标分页，默认不统计总数
+    - 否则沿用 page/limit 偏移分页，默认精确统计总数
+    游标无效或 count 参数不合法时抛出 CursorError
+    """
+    cursor_token = request.args.get('cursor')
+    use_cursor = cursor_token is not None
+    
+    count_mode = request.args.get('count', COUNT_NONE if use_cursor else COUNT_EXACT).strip().lower()
+    if count_mode not in COUNT_MODES:
+        raise CursorError(f'无效的count参数: {count_mode}，可选值为 {", ".join(COUNT_MODES)}')
+    
+    after = None
+    if cursor_token:
+        after = decode_cursor(cursor_token.strip(), sort_by, sort_order)
+    return after, use_cursor, count_mode
+
+def count_rows(cursor, count_query, params, count_mode, cache_key):
+    """按统计方式返回总数，count=none 时返回 None"""
+    if count_mode == COUNT_NONE:
+        return None
+    
+    def compute():
+        cursor.execute(count_query, params)
+        return cursor.fetchone()[0]
+    
+    if count_mode == COUNT_ESTIMATE:
+        return get_count_cache().get_or_compute((cache_key, count_query, tuple(params)), compute)[0]
+    return compute()
+
+def parse_list_fields(fields_param, view):
+    """解析列表接口的 fields / view 参数，返回 (字段列表, 无效字段列表)"""
+    if fields_param:
+        requested = [f.strip() for f in fields_param.split(',') if f.strip()]
+        invalid = [f for f in requested if f not in QUESTIONNAIRE_LIST_FIELDS]
+        # id 始终返回，保持字段顺序稳定
+        selected = [f for f in QUESTIONNAIRE_LIST_FIELDS if f == 'id' or f in requested]
+        return selected, invalid
+    
+    if view == 'summary':
+        return list(QUESTIONNAIRE_SUMMARY_FIELDS), []
+    return list(QUESTIONNAIRE_LIST_FIELDS), []
+
 # 获取所有问卷数据 - 增强版本，支持分页和高级搜索
 @app.route('/api/questionnaires', methods=['GET'])
 @login_required
@@ -938,29 +1353,73 @@ def get_questionnaires():
         grade_filter = request.args.get('grade', '').strip()
         date_from = request.args.get('date_from', '').strip()
         date_to = request.args.get('date_to', '').strip()
-        sort_by = request.args.get('sort_by', 'created_at')  # 排序字段
+        sort_by = request.args.get('sort_by', 'relevance' if search else 'created_at')  # 排序字段，搜索时默认按相关度
         sort_order = request.args.get('sort_order', 'desc')  # 排序方向
+        with_sequence = request.args.get('with_sequence', '').lower() == 'true'  # 是否返回显示序号
+        
+        # 字段投影：fields=id,name,... 或 view=summary|full（默认full，保持兼容）
+        view = request.args.get('view', 'full').strip().lower()
+        if view not in ('summary', 'full'):
+            response_data, status_code = validation_error([f'无效的view参数: {view}，可选值为 summary 或 full'])
+            return jsonify(response_data), status_code
+        
+        selected_fields, invalid_fields = parse_list_fields(request.args.get('fields', '').strip(), view)
+        if invalid_fields:
+            response_data, status_code = validation_error([f'无效的字段: {", ".join(invalid_fields)}'])
+            return jsonify(response_data), status_code
         
         # 验证排序参数
         valid_sort_fields = ['id', 'name', 'type', 'grade', 'submission_date', 'created_at', 'updated_at']
+        if search:
+            valid_sort_fields.append('relevance')
         if sort_by not in valid_sort_fields:
             sort_by = 'created_at'
         
-        if sort_order.lower() not in ['asc', 'desc']:
+        sort_order = sort_order.lower()
+        if sort_order not in ['asc', 'desc']:
             sort_order = 'desc'
         
+        # 按相关度排序时使用 bm25 得分（越小越相关）
+        sort_column = sort_by
+        if sort_by == 'relevance':
+            sort_column = 'search_rank'
+            sort_order = 'asc'
+        
+        # 分页方式：游标分页（cursor）或偏移分页（page）
+        try:
+            after, use_cursor, count_mode = parse_pagination_args(sort_by, sort_order)
+            if use_cursor and sort_by not in QUESTIONNAIRE_CURSOR_SORT_FIELDS:
+                raise CursorError(f'按 {sort_by} 排序不支持游标分页，请使用 page 分页，'
+                                  f'或按 {", ".join(QUESTIONNAIRE_CURSOR_SORT_FIELDS)} 排序')
+        except CursorError as e:
+            response_data, status_code = validation_error([str(e)])
+            return jsonify(response_data), status_code
+        
         with get_db() as conn:
             cursor = conn.cursor()
             
-            # 构建查询条件
-            where_conditions = []
+            # 构建查询条件（排除已删除的问卷）
+            where_conditions = ["deleted_at IS NULL"]
             params = []
             
-            # 基本搜索 - 搜索姓名、类型、年级
+            # 全文搜索 - 姓名、学校、老师、填写人、类型、年级和填空题答案
+            search_sql = None
+            search_params = []
             if search:
-                where_conditions.append("(name LIKE ? OR type LIKE ? OR grade LIKE ?)")
-                search_param = f"%{search}%"
-                params.extend([search_param, search_param, search_param])
+                match_query = build_match_query(search)
+                if match_query:
+                    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+                    search_sql = f"""SELECT rowid AS search_id, bm25({FTS_TABLE}, {weights}) AS search_rank, content AS search_content
+                        FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?"""
+                    search_params = [match_query]
+                else:
+                    # 含单个汉字的关键词无法用二元词匹配，逐词 LIKE 匹配原文；
+                    # 索引表的 type / grade 列保存的是二元词，需要匹配问卷表中的原始值
+                    terms = search.split()
+                    search_sql = f"""SELECT fts.rowid AS search_id, 0 AS search_rank, fts.content AS search_content
+                        FROM {FTS_TABLE} AS fts JOIN questionnaires AS q ON q.id = fts.rowid
+                        WHERE {' AND '.join(['(fts.content LIKE ? OR q.type LIKE ? OR q.grade LIKE ?)'] * len(terms))}"""
+                    search_params = [f"%{term}%" for term in terms for _ in range(3)]
             
             # 问卷类型筛选
             if questionnaire_type:
@@ -972,103 +1431,93 @@ def get_questionnaires():
                 where_conditions.append("grade = ?")
                 params.append(grade_filter)
             
-            # 日期范围筛选
-            if date_from:
-                where_conditions.append("DATE(created_at) >= ?")
-                params.append(date_from)
-            
-            if date_to:
-                where_conditions.append("DATE(created_at) <= ?")
-                params.append(date_to)
+            # 日期范围筛选（半开区间，可使用created_at索引）
+            try:
+                date_conditions, date_params = date_range_filter('created_at', date_from, date_to)
+            except ValueError as e:
+                response_data, status_code = validation_error([str(e)])
+                return jsonify(response_data), status_code
+            where_conditions.extend(date_conditions)
+            params.extend(date_params)
             
             # 构建完整的WHERE子句
             where_clause = ""
             if where_conditions:
                 where_clause = "WHERE " + " AND ".join(where_conditions)
             
-            # 获取总数
+            # 获取总数（可选精确、缓存估算或不统计）
             count_query = f"SELECT COUNT(*) FROM questionnaires {where_clause}"
-            cursor.execute(count_query, params)
-            total_count = cursor.fetchone()[0]
-            
-            # 获取分页数据
-            offset = (page - 1) * limit
-            query = f"SELECT * FROM questionnaires {where_clause} ORDER BY {sort_by} {sort_order.upper()} LIMIT ? OFFSET ?"
-            cursor.execute(query, params + [limit, offset])
+            count_params = list(params)
+            if search_sql:
+                count_query += f" AND id IN (SELECT search_id FROM ({search_sql}))"
+                count_params.extend(search_params)
+            total_count = count_rows(cursor, count_query, count_params, count_mode, 'questionnaires')
+            
+            # 显示序号在读取时按创建时间计算，ID保持稳定不再重新编号
+            source = "questionnaires"
+            if with_sequence:
+                source = """(
+                    SELECT *, ROW_NUMBER() OVER (ORDER BY created_at, id) AS display_seq
+                    FROM questionnaires WHERE deleted_at IS NULL
+                ) AS questionnaires"""
+            
+            # 搜索结果通过连接获得相关度和摘要原文
+            source_params = []
+            if search_sql:
+                source += f" JOIN ({search_sql}) AS search_results ON search_results.search_id = questionnaires.id"
+                source_params = search_params
+            
+            # 获取分页数据，多取一行用于判断是否还有下一页
+            select_columns = list(selected_fields)
+            if sort_column not in select_columns:
+                select_columns.append(sort_column)
+            if with_sequence:
+                select_columns.append('display_seq')
+            if search_sql:
+                select_columns.extend(c for c in ('search_rank', 'search_content') if c not in select_columns)
+            
+            order_clause = f"ORDER BY {sort_column} {sort_order.upper()}"
+            if sort_column != 'id':
+                order_clause += f", id {sort_order.upper()}"
+            
+            page_conditions = list(where_conditions)
+            page_params = source_params + list(params)
+            if after is not None:
+                condition, condition_params = keyset_condition(sort_column, 'id', sort_order, after[0], after[1])
+                page_conditions.append(condition)
+                page_params.extend(condition_params)
+            
+            query = f"SELECT {', '.join(select_columns)} FROM {source} WHERE {' AND '.join(page_conditions)} {order_clause} LIMIT ?"
+            page_params.append(limit + 1)
+            if not use_cursor:
+                query += " OFFSET ?"
+                page_params.append((page - 1) * limit)
+            cursor.execute(query, page_params)
             questionnaires = cursor.fetchall()
         
+        has_more = len(questionnaires) > limit
+        questionnaires = questionnaires[:limit]
+        
         result = []
         for q in questionnaires:
-            # 解析data字段获取详细信息
-            data = json.loads(q['data'])
-            
-            # 从data中提取性别、出生日期、家长联系信息、学校和老师信息
-            gender = None
-            birthdate = None
-            parent_phone = None
-            parent_wechat = None
-            parent_email = None
-            school = None
-            teacher = None
-            
-            # 尝试从不同位置获取基本信息
-            if 'basicInfo' in data and data['basicInfo']:
-                basic_info = data['basicInfo']
-                gender = basic_info.get('gender')
-                birthdate = basic_info.get('birthdate') or basic_info.get('birth_date')
-                parent_phone = basic_info.get('parent_phone')
-                parent_wechat = basic_info.get('parent_wechat')
-                parent_email = basic_info.get('parent_email')
-                school = basic_info.get('school')
-                teacher = basic_info.get('teacher')
-            elif 'basic_info' in data and data['basic_info']:
-                basic_info = data['basic_info']
-                gender = basic_info.get('gender')
-                birthdate = basic_info.get('birthdate') or basic_info.get('birth_date')
-                parent_phone = basic_info.get('parent_phone')
-                parent_wechat = basic_info.get('parent_wechat')
-                parent_email = basic_info.get('parent_email')
-                school = basic_info.get('school')
-                teacher = basic_info.get('teacher')
-            
-            # 如果还没找到，尝试从顶级字段获取
-            if not gender:
-                gender = data.get('gender') or data.get('basic_info_gender')
-            if not birthdate:
-                birthdate = data.get('birthdate') or data.get('basic_info_birthdate') or data.get('birth_date')
-            if not parent_phone:
-                parent_phone = data.get('parent_phone') or data.get('basic_info_parent_phone')
-            if not parent_wechat:
-                parent_wechat = data.get('parent_wechat') or data.get('basic_info_parent_wechat')
-            if not parent_email:
-                parent_email = data.get('parent_email') or data.get('basic_info_parent_email')
-            if not school:
-                school = data.get('school') or data.get('basic_info_school')
-            if not teacher:
-                teacher = data.get('teacher') or data.get('basic_info_teacher')
-            
-            result.append({
-                'id': q['id'],
-                'type': q['type'],
-                'name': q['name'],
-                'grade': q['grade'],
-                'gender': gender,
-                'birthdate': birthdate,
-                'submission_date': q['submission_date'],
-                'created_at': q['created_at'],
-                'updated_at': q['updated_at'],
-                'parent_phone': parent_phone,
-                'parent_wechat': parent_wechat,
-                'parent_email': parent_email,
-                'school': school,
-                'teacher': teacher,
-                'school_name': q['school_name'],
-                'admission_date': q['admission_date'],
-                'address': q['address'],
-                'filler_name': q['filler_name'],
-                'fill_date': q['fill_date'],
-                'data': data
-            })
+            item = {}
+            for field in selected_fields:
+                value = q[field]
+                if field == 'data':
+                    # 只有请求了data字段时才解析并还原完整问卷文档
+                    value = load_document(value, conn)
+                elif field in QUESTIONNAIRE_NULLABLE_FIELDS:
+                    # 基本信息直接读取写入时提取的列
+                    value = value or None
+                item[field] = value
+            if with_sequence:
+                item['display_seq'] = q['display_seq']
+            if search_sql:
+                item['search'] = {
+                    'score': round(-q['search_rank'], 4) if q['search_rank'] else 0,
+                    'snippet': make_snippet(q['search_content'], search)
+                }
+            result.append(item)
         
         # 记录查询操作日志（仅在有搜索条件时）
         if search or questionnaire_type or grade_filter or date_from or date_to:
@@ -1080,19 +1529,32 @@ def get_questionnaires():
                 'date_to': date_to,
                 'results_count': len(result)
             }
-            OperationLogger.log('SEARCH_QUESTIONNAIRES', None, f'搜索问卷: {json.dumps(search_details, default=str, ensure_ascii=False)}')
+            OperationLogger.log('SEARCH_QUESTIONNAIRES', None, f'搜索问卷: {json_dumps(search_details)}')
         
-        return jsonify({
-            'success': True,
-            'data': result,
-            'pagination': {
+        if use_cursor:
+            pagination = {
+                'mode': 'cursor',
+                'limit': limit,
+                'total': total_count,
+                'has_next': has_more,
+                'next_cursor': encode_cursor(sort_by, sort_order, questionnaires[-1][sort_column], questionnaires[-1]['id']) if has_more else None
+            }
+        else:
+            pagination = {
                 'page': page,
                 'limit': limit,
                 'total': total_count,
-                'pages': (total_count + limit - 1) // limit,
-                'has_next': page < (total_count + limit - 1) // limit,
+                'pages': (total_count + limit - 1) // limit if total_count is not None else None,
+                'has_next': has_more,
                 'has_prev': page > 1
-            },
+            }
+        if count_mode == COUNT_ESTIMATE:
+            pagination['total_is_estimate'] = True
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'pagination': pagination,
             'filters': {
                 'search': search,
                 'type': questionnaire_type,
@@ -1100,7 +1562,9 @@ def get_questionnaires():
                 'date_from': date_from,
                 'date_to': date_to,
                 'sort_by': sort_by,
-                'sort_order': sort_order
+                'sort_order': sort_order,
+                'view': view,
+                'fields': selected_fields
             }
         })
     except Exception as e:
@@ -1117,15 +1581,15 @@ def get_filter_options():
             cursor = conn.cursor()
             
             # 获取所有可用的问卷类型
-            cursor.execute("SELECT DISTINCT type FROM questionnaires WHERE type IS NOT NULL ORDER BY type")
+            cursor.execute("SELECT DISTINCT type FROM questionnaires WHERE type IS NOT NULL AND deleted_at IS NULL ORDER BY type")
             types = [row[0] for row in cursor.fetchall()]
             
             # 获取所有可用的年级
-            cursor.execute("SELECT DISTINCT grade FROM questionnaires WHERE grade IS NOT NULL AND grade != '' ORDER BY grade")
+            cursor.execute("SELECT DISTINCT grade FROM questionnaires WHERE grade IS NOT NULL AND grade != '' AND deleted_at IS NULL ORDER BY grade")
             grades = [row[0] for row in cursor.fetchall()]
             
             # 获取日期范围
-            cursor.execute("SELECT MIN(DATE(created_at)), MAX(DATE(created_at)) FROM questionnaires")
+            cursor.execute("SELECT MIN(DATE(created_at)), MAX(DATE(created_at)) FROM questionnaires WHERE deleted_at IS NULL")
             date_range = cursor.fetchone()
             
             return jsonify({
@@ -1158,7 +1622,7 @@ def get_questionnaire(questionnaire_id):
     try:
         with get_db() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM questionnaires WHERE id = ?", (questionnaire_id,))
+            cursor.execute("SELECT * FROM questionnaires WHERE id = ? AND deleted_at IS NULL", (questionnaire_id,))
             q = cursor.fetchone()
         
         if not q:
@@ -1175,7 +1639,7 @@ def get_questionnaire(questionnaire_id):
                 'submission_date': q['submission_date'],
                 'created_at': q['created_at'],
                 'updated_at': q['updated_at'],
-                'data': json.loads(q['data'])
+                'data': load_document(q['data'])
             }
         }
         
@@ -1200,7 +1664,7 @@ def update_questionnaire(questionnaire_id):
         # 获取原始问卷数据
         with get_db() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT data, type, name, grade, submission_date FROM questionnaires WHERE id = ?", (questionnaire_id,))
+            cursor.execute("SELECT data, type, name, grade, submission_date FROM questionnaires WHERE id = ? AND deleted_at IS NULL", (questionnaire_id,))
             result = cursor.fetchone()
             
             if not result:
@@ -1213,7 +1677,7 @@ def update_questionnaire(questionnaire_id):
                 }), 404
             
             original_data_str, original_type, original_name, original_grade, original_submission_date = result
-            original_data = json.loads(original_data_str) if original_data_str else {}
+            original_data = load_document(original_data_str, conn) if original_data_str else {}
         
         # 增量更新：合并原始数据和新数据
         merged_data = merge_questionnaire_data(original_data, data)
@@ -1243,6 +1707,10 @@ def update_questionnaire(questionnaire_id):
         grade = basic_info.get('grade', original_grade)
         submission_date = basic_info.get('submission_date', original_submission_date)
         
+        # 同步刷新热点字段列
+        fields = extract_hot_fields(validated_data, original_submission_date)
+        fields.update({'name': name, 'grade': grade, 'submission_date': submission_date})
+        
         updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         # 使用问题类型处理器进行最终处理
@@ -1250,10 +1718,16 @@ def update_questionnaire(questionnaire_id):
         
         with get_db() as conn:
             cursor = conn.cursor()
+            # 先持有写锁，并发写入同一新问卷定义时不会冲突
+            if not conn.in_transaction:
+                cursor.execute("BEGIN IMMEDIATE")
+            set_clause = ', '.join(f"{f} = ?" for f in HOT_FIELDS)
             cursor.execute(
-                "UPDATE questionnaires SET type = ?, name = ?, grade = ?, submission_date = ?, updated_at = ?, data = ? WHERE id = ?",
-                (questionnaire_type, name, grade, submission_date, updated_at, json.dumps(final_data, default=str, ensure_ascii=False), questionnaire_id)
+                f"UPDATE questionnaires SET type = ?, updated_at = ?, data = ?, {set_clause} WHERE id = ?",
+                [questionnaire_type, updated_at, dump_document(cursor, final_data)]
+                + [fields[f] for f in HOT_FIELDS] + [questionnaire_id]
             )
+            index_questionnaire(cursor, questionnaire_id, fields, final_data, questionnaire_type)
             conn.commit()
         
         # 记录操作日志
@@ -1320,7 +1794,7 @@ def batch_delete_questionnaires():
             
             # 首先检查要删除的问卷是否存在
             placeholders = ','.join(['?'] * len(questionnaire_ids))
-            cursor.execute(f"SELECT id, name, type FROM questionnaires WHERE id IN ({placeholders})", questionnaire_ids)
+            cursor.execute(f"SELECT id, name, type FROM questionnaires WHERE id IN ({placeholders}) AND deleted_at IS NULL", questionnaire_ids)
             existing_questionnaires = cursor.fetchall()
             
             if not existing_questionnaires:
@@ -1332,25 +1806,14 @@ def batch_delete_questionnaires():
                     }
                 }), 404
             
-            # 执行批量删除
-            cursor.execute(f"DELETE FROM questionnaires WHERE id IN ({placeholders})", questionnaire_ids)
-            conn.commit()
-            
+            # 执行批量软删除（只标记删除时间，其余问卷ID保持不变）
+            deleted_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            cursor.execute(
+                f"UPDATE questionnaires SET deleted_at = ? WHERE id IN ({placeholders}) AND deleted_at IS NULL",
+                [deleted_at] + questionnaire_ids
+            )
             deleted_count = cursor.rowcount
-            
-            # 重新排序ID
-            cursor.execute("SELECT id FROM questionnaires ORDER BY created_at")
-            questionnaires = cursor.fetchall()
-            
-            for new_id, questionnaire in enumerate(questionnaires, 1):
-                old_id = questionnaire['id']
-                if old_id != new_id:
-                    cursor.execute("UPDATE questionnaires SET id = ? WHERE id = ?", (new_id, old_id))
-            
-            conn.commit()
-            
-            # 重置自增计数器
-            cursor.execute("UPDATE sqlite_sequence SET seq = (SELECT COUNT(*) FROM questionnaires) WHERE name = 'questionnaires'")
+            remove_questionnaires(cursor, questionnaire_ids)
             conn.commit()
         
         # 记录操作日志
@@ -1384,7 +1847,7 @@ def delete_questionnaire(questionnaire_id):
             cursor = conn.cursor()
             
             # 首先获取要删除的问卷信息用于日志记录
-            cursor.execute("SELECT name, type, data FROM questionnaires WHERE id = ?", (questionnaire_id,))
+            cursor.execute("SELECT name, type FROM questionnaires WHERE id = ? AND deleted_at IS NULL", (questionnaire_id,))
             questionnaire_row = cursor.fetchone()
             
             if not questionnaire_row:
@@ -1395,27 +1858,18 @@ def delete_questionnaire(questionnaire_id):
             questionnaire_name = questionnaire_row['name'] or '未知'
             questionnaire_type = questionnaire_row['type'] or '未知'
             
-            # 执行删除
-            cursor.execute("DELETE FROM questionnaires WHERE id = ?", (questionnaire_id,))
+            # 执行软删除 - ID保持稳定，不再重新编号
+            cursor.execute(
+                "UPDATE questionnaires SET deleted_at = ? WHERE id = ? AND deleted_at IS NULL",
+                (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), questionnaire_id)
+            )
             deleted_count = cursor.rowcount
             
             if deleted_count == 0:
                 response_data, status_code = not_found_error('问卷不存在或已被删除')
                 return jsonify(response_data), status_code
             
-            # 重新排序ID - 保持连续性
-            cursor.execute("SELECT id FROM questionnaires ORDER BY created_at")
-            questionnaires = cursor.fetchall()
-            
-            for new_id, questionnaire in enumerate(questionnaires, 1):
-                old_id = questionnaire['id']
-                if old_id != new_id:
-                    cursor.execute("UPDATE questionnaires SET id = ? WHERE id = ?", (new_id, old_id))
-            
-            conn.commit()
-            
-            # 重置自增计数器
-            cursor.execute("UPDATE sqlite_sequence SET seq = (SELECT COUNT(*) FROM questionnaires) WHERE name = 'questionnaires'")
+            remove_questionnaires(cursor, [questionnaire_id])
             conn.commit()
         
         # 记录操作日志
@@ -1424,9 +1878,9 @@ def delete_questionnaire(questionnaire_id):
         
         return jsonify({
             'success': True,
-            'message': '问卷删除成功，数据已重新编号',
+            'message': '问卷删除成功',
             'deleted_id': questionnaire_id,
-            'reindexed': True,
+            'reindexed': False,
             'timestamp': datetime.now().isoformat()
         })
         
@@ -1444,68 +1898,53 @@ def get_admin_statistics():
         with get_db() as conn:
             cursor = conn.cursor()
             
-            # 基础统计数据
-            cursor.execute("SELECT COUNT(*) FROM questionnaires")
-            total_count = cursor.fetchone()[0]
+            # 问卷和操作日志的计数全部读取汇总表（由触发器增量维护），不扫描明细表
+            total_count = read_count(cursor, SOURCE_QUESTIONNAIRES, DIM_TOTAL)
             
             # 今日新增问卷数
-            today = datetime.now().strftime('%Y-%m-%d')
-            cursor.execute("SELECT COUNT(*) FROM questionnaires WHERE DATE(created_at) = ?", (today,))
-            today_count = cursor.fetchone()[0]
+            now = datetime.now()
+            today = now.strftime('%Y-%m-%d')
+            tomorrow = (now + timedelta(days=1)).strftime('%Y-%m-%d')
+            today_count = read_count(cursor, SOURCE_QUESTIONNAIRES, DIM_DAY, today)
             
-            # 本周新增问卷数
-            cursor.execute("SELECT COUNT(*) FROM questionnaires WHERE DATE(created_at) >= DATE('now', '-7 days')")
-            week_count = cursor.fetchone()[0]
+            # 本周、本月新增问卷数以及趋势的起始日期
+            cursor.execute("SELECT DATE('now', '-7 days'), DATE('now', 'start of month'), DATE('now', '-30 days')")
+            week_start, month_start, trend_start = cursor.fetchone()
+            week_count = read_range_total(cursor, SOURCE_QUESTIONNAIRES, DIM_DAY, week_start)
+            month_count = read_range_total(cursor, SOURCE_QUESTIONNAIRES, DIM_DAY, month_start)
             
-            # 本月新增问卷数
-            cursor.execute("SELECT COUNT(*) FROM questionnaires WHERE DATE(created_at) >= DATE('now', 'start of month')")
-            month_count = cursor.fetchone()[0]
-            
-            # 按类型分组的统计
-            cursor.execute("SELECT type, COUNT(*) FROM questionnaires GROUP BY type")
-            type_stats = dict(cursor.fetchall())
-            
-            # 按年级分组的统计
-            cursor.execute("SELECT grade, COUNT(*) FROM questionnaires WHERE grade IS NOT NULL GROUP BY grade")
-            grade_stats = dict(cursor.fetchall())
+            # 按类型、年级分组的统计
+            type_stats = dict(read_buckets(cursor, SOURCE_QUESTIONNAIRES, DIM_TYPE))
+            grade_stats = dict(read_buckets(cursor, SOURCE_QUESTIONNAIRES, DIM_GRADE))
             
             # 最近30天的提交趋势
-            cursor.execute("""
-                SELECT DATE(created_at) as date, COUNT(*) as count 
-                FROM questionnaires 
-                WHERE DATE(created_at) >= DATE('now', '-30 days')
-                GROUP BY DATE(created_at)
-                ORDER BY date
-            """)
-            trend_data = [{'date': row[0], 'count': row[1]} for row in cursor.fetchall()]
+            trend_data = [
+                {'date': bucket, 'count': count}
+                for bucket, count in read_buckets(cursor, SOURCE_QUESTIONNAIRES, DIM_DAY, trend_start)
+            ]
             
-            # 每小时提交分布（今日）
-            cursor.execute("""
-                SELECT strftime('%H', created_at) as hour, COUNT(*) as count
-                FROM questionnaires 
-                WHERE DATE(created_at) = ?
-                GROUP BY strftime('%H', created_at)
-                ORDER BY hour
-            """, (today,))
-            hourly_stats = [{'hour': int(row[0]), 'count': row[1]} for row in cursor.fetchall()]
+            # 每小时提交分布（今日），小时分组格式为 YYYY-MM-DD HH
+            hourly_stats = [
+                {'hour': int(bucket[11:13]), 'count': count}
+                for bucket, count in read_buckets(cursor, SOURCE_QUESTIONNAIRES, DIM_HOUR, today, tomorrow)
+            ]
             
             # 用户活动统计
             cursor.execute("SELECT COUNT(*) FROM users")
             total_users = cursor.fetchone()[0]
             
-            cursor.execute("SELECT COUNT(*) FROM users WHERE DATE(last_login) = ?", (today,))
+            login_condition, login_params = day_filter('last_login', today)
+            cursor.execute(f"SELECT COUNT(*) FROM users WHERE {login_condition}", login_params)
             active_users_today = cursor.fetchone()[0]
             
             # 操作日志统计
-            cursor.execute("SELECT COUNT(*) FROM operation_logs")
-            total_operations = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM operation_logs WHERE DATE(created_at) = ?", (today,))
-            operations_today = cursor.fetchone()[0]
+            total_operations = read_count(cursor, SOURCE_OPERATION_LOGS, DIM_TOTAL)
+            operations_today = read_count(cursor, SOURCE_OPERATION_LOGS, DIM_DAY, today)
             
             # 数据库大小统计
             cursor.execute("SELECT page_count * page_size as size FROM pragma_page_count(), pragma_page_size()")
-            db_size = cursor.fetchone()[0] if cursor.fetchone() else 0
+            size_row = cursor.fetchone()
+            db_size = size_row[0] if size_row else 0
             
         return jsonify({
             'success': True,
@@ -1693,7 +2132,7 @@ def system_performance_metrics():
                 db_size = db_size_result[0] if db_size_result else 0
                 
                 # 表统计
-                cursor.execute("SELECT COUNT(*) FROM questionnaires")
+                cursor.execute("SELECT COUNT(*) FROM questionnaires WHERE deleted_at IS NULL")
                 questionnaire_count = cursor.fetchone()[0]
                 
                 cursor.execute("SELECT COUNT(*) FROM operation_logs")
@@ -1715,38 +2154,31 @@ def system_performance_metrics():
                     'questionnaire_count': questionnaire_count,
                     'log_count': log_count,
                     'user_count': user_count,
-                    'operations_last_hour': operations_last_hour
+                    'operations_last_hour': operations_last_hour,
+                    'connection_pool': get_db_pool().stats(),
+                    'operation_log_writer': get_log_writer().stats()
                 }
         except Exception as e:
             metrics['metrics']['database'] = {
                 'error': f'数据库指标获取失败: {str(e)}'
             }
         
-        # 系统资源指标
+        # 系统资源指标（读取后台采样结果，不在请求中等待 CPU 采样）
         try:
-            import psutil
-            
-            # CPU 使用率
-            cpu_percent = psutil.cpu_percent(interval=1)
-            
-            # 内存使用
-            memory = psutil.virtual_memory()
-            
-            # 磁盘使用
-            disk = psutil.disk_usage(os.path.dirname(DATABASE))
+            sampler = get_resource_sampler()
+            if not sampler.available:
+                raise ImportError('psutil')
             
+            history_limit = request.args.get('history', type=int)
+            snapshot = sampler.latest()
             metrics['metrics']['system'] = {
-                'cpu_percent': round(cpu_percent, 1),
-                'memory': {
-                    'total_gb': round(memory.total / (1024**3), 2),
-                    'available_gb': round(memory.available / (1024**3), 2),
-                    'percent': round(memory.percent, 1)
-                },
-                'disk': {
-                    'total_gb': round(disk.total / (1024**3), 2),
-                    'free_gb': round(disk.free / (1024**3), 2),
-                    'percent': round((disk.used / disk.total) * 100, 1)
-                }
+                'cpu_percent': snapshot['cpu_percent'],
+                'memory': snapshot['memory'],
+                'disk': snapshot['disk'],
+                'sampled_at': snapshot['timestamp'],
+                'warming_up': snapshot.get('warming_up', False),
+                'sampler': sampler.stats(),
+                'history': sampler.history(history_limit)
             }
         except ImportError:
             metrics['metrics']['system'] = {
@@ -1776,7 +2208,8 @@ def system_performance_metrics():
                 'active_sessions': active_sessions,
                 'errors_24h': errors_24h,
                 'flask_env': app.config.get('ENV', 'unknown'),
-                'debug_mode': app.debug
+                'debug_mode': app.debug,
+                'user_cache': get_user_cache().stats()
             }
         except Exception as e:
             metrics['metrics']['application'] = {
@@ -1809,7 +2242,7 @@ def realtime_statistics():
             # 最近1小时的活动
             cursor.execute("""
                 SELECT COUNT(*) FROM questionnaires 
-                WHERE created_at >= datetime('now', '-1 hour')
+                WHERE created_at >= datetime('now', '-1 hour') AND deleted_at IS NULL
             """)
             submissions_last_hour = cursor.fetchone()[0]
             
@@ -1823,7 +2256,7 @@ def realtime_statistics():
             # 最近5分钟的活动
             cursor.execute("""
                 SELECT COUNT(*) FROM questionnaires 
-                WHERE created_at >= datetime('now', '-5 minutes')
+                WHERE created_at >= datetime('now', '-5 minutes') AND deleted_at IS NULL
             """)
             submissions_last_5min = cursor.fetchone()[0]
             
@@ -1831,6 +2264,7 @@ def realtime_statistics():
             cursor.execute("""
                 SELECT id, name, type, created_at 
                 FROM questionnaires 
+                WHERE deleted_at IS NULL
                 ORDER BY created_at DESC 
                 LIMIT 5
             """)
@@ -1855,7 +2289,7 @@ def realtime_statistics():
                 {
                     'operation': row[0],
                     'created_at': row[1],
-                    'details': json.loads(row[2]) if row[2] else {}
+                    'details': json_loads(row[2]) if row[2] else {}
                 }
                 for row in cursor.fetchall()
             ]
@@ -1903,6 +2337,13 @@ def get_operation_logs():
         # 限制每页最大数量
         limit = min(limit, 200)
         
+        # 分页方式：游标分页（cursor）或偏移分页（page），日志固定按创建时间倒序
+        try:
+            after, use_cursor, count_mode = parse_pagination_args('created_at', 'desc')
+        except CursorError as e:
+            response_data, status_code = validation_error([str(e)])
+            return jsonify(response_data), status_code
+        
         with get_db() as conn:
             cursor = conn.cursor()
             
@@ -1918,13 +2359,14 @@ def get_operation_logs():
                 where_conditions.append("u.username LIKE ?")
                 params.append(f"%{user_filter}%")
             
-            if date_from:
-                where_conditions.append("DATE(ol.created_at) >= ?")
-                params.append(date_from)
-            
-            if date_to:
-                where_conditions.append("DATE(ol.created_at) <= ?")
-                params.append(date_to)
+            # 日期范围筛选（半开区间，可使用created_at索引）
+            try:
+                date_conditions, date_params = date_range_filter('ol.created_at', date_from, date_to)
+            except ValueError as e:
+                response_data, status_code = validation_error([str(e)])
+                return jsonify(response_data), status_code
+            where_conditions.extend(date_conditions)
+            params.extend(date_params)
             
             if sensitive_only:
                 sensitive_ops = "', '".join(OperationLogger.SENSITIVE_OPERATIONS)
@@ -1934,36 +2376,50 @@ def get_operation_logs():
             if where_conditions:
                 where_clause = "WHERE " + " AND ".join(where_conditions)
             
-            # 获取总数
+            # 获取总数（可选精确、缓存估算或不统计）
             count_query = f"""
                 SELECT COUNT(*) 
                 FROM operation_logs ol
                 LEFT JOIN users u ON ol.user_id = u.id
                 {where_clause}
             """
-            cursor.execute(count_query, params)
-            total_count = cursor.fetchone()[0]
-            
-            # 获取分页数据
-            offset = (page - 1) * limit
+            total_count = count_rows(cursor, count_query, params, count_mode, 'operation_logs')
+            
+            # 游标分页时从上一页最后一条之后开始读取，按 (created_at, id) 使用索引
+            page_conditions = list(where_conditions)
+            page_params = list(params)
+            if after is not None:
+                condition, condition_params = keyset_condition('ol.created_at', 'ol.id', 'desc', after[0], after[1])
+                page_conditions.append(condition)
+                page_params.extend(condition_params)
+            page_where = "WHERE " + " AND ".join(page_conditions) if page_conditions else ""
+            
+            # 获取分页数据，多取一行用于判断是否还有下一页
             query = f"""
                 SELECT ol.*, u.username 
                 FROM operation_logs ol
                 LEFT JOIN users u ON ol.user_id = u.id
-                {where_clause}
-                ORDER BY ol.created_at DESC
-                LIMIT ? OFFSET ?
+                {page_where}
+                ORDER BY ol.created_at DESC, ol.id DESC
+                LIMIT ?
             """
-            cursor.execute(query, params + [limit, offset])
+            page_params.append(limit + 1)
+            if not use_cursor:
+                query += " OFFSET ?"
+                page_params.append((page - 1) * limit)
+            cursor.execute(query, page_params)
             logs = cursor.fetchall()
         
+        has_more = len(logs) > limit
+        logs = logs[:limit]
+        
         result = []
         for log in logs:
             # 解析详细信息
             details_data = {}
             try:
                 if log['details']:
-                    details_data = json.loads(log['details'])
+                    details_data = json_loads(log['details'])
             except:
                 details_data = {'user_details': log['details']}
             
@@ -1991,15 +2447,29 @@ def get_operation_logs():
         # 记录日志查看操作
         OperationLogger.log('VIEW_LOGS', None, f'查看操作日志，页面: {page}, 过滤条件: {request.args}')
         
-        return jsonify({
-            'success': True,
-            'data': result,
-            'pagination': {
+        if use_cursor:
+            pagination = {
+                'mode': 'cursor',
+                'limit': limit,
+                'total': total_count,
+                'has_next': has_more,
+                'next_cursor': encode_cursor('created_at', 'desc', logs[-1]['created_at'], logs[-1]['id']) if has_more else None
+            }
+        else:
+            pagination = {
                 'page': page,
                 'limit': limit,
                 'total': total_count,
-                'pages': (total_count + limit - 1) // limit
-            },
+                'pages': (total_count + limit - 1) // limit if total_count is not None else None,
+                'has_next': has_more
+            }
+        if count_mode == COUNT_ESTIMATE:
+            pagination['total_is_estimate'] = True
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'pagination': pagination,
             'filters': {
                 'operation_type': operation_type,
                 'user_filter': user_filter,
@@ -2048,7 +2518,7 @@ def get_log_detail(log_id):
         details_data = {}
         try:
             if log['details']:
-                details_data = json.loads(log['details'])
+                details_data = json_loads(log['details'])
         except:
             details_data = {'user_details': log['details']}
         
@@ -2095,7 +2565,8 @@ def get_log_statistics():
             
             # 今日日志数
             today = datetime.now().strftime('%Y-%m-%d')
-            cursor.execute("SELECT COUNT(*) FROM operation_logs WHERE DATE(created_at) = ?", (today,))
+            today_condition, today_params = day_filter('created_at', today)
+            cursor.execute(f"SELECT COUNT(*) FROM operation_logs WHERE {today_condition}", today_params)
             today_logs = cursor.fetchone()[0]
             
             # 敏感操作数
@@ -2129,7 +2600,7 @@ def get_log_statistics():
             cursor.execute("""
                 SELECT DATE(created_at) as date, COUNT(*) as count 
                 FROM operation_logs 
-                WHERE DATE(created_at) >= DATE('now', '-7 days')
+                WHERE created_at >= DATE('now', '-7 days')
                 GROUP BY DATE(created_at)
                 ORDER BY date
             """)
@@ -2157,6 +2628,57 @@ def get_log_statistics():
             }
         }), 500
 
+# 操作日志导出
+LOG_EXPORT_HEADERS = ['ID', '用户名', '操作类型', '目标ID', '创建时间', '详情']
+LOG_EXPORT_SYNC_LIMIT = 10000  # 同步导出的最大条数，后台任务导出不限制
+
+def build_log_export_query(data, limit=None):
+    """根据日志导出的筛选条件生成查询语句和参数，日期格式错误时抛出 ValueError"""
+    where_conditions = []
+    params = []
+    
+    # 日期范围筛选（半开区间，可使用created_at索引）
+    date_conditions, date_params = date_range_filter('ol.created_at', data.get('date_from', ''), data.get('date_to', ''))
+    where_conditions.extend(date_conditions)
+    params.extend(date_params)
+    
+    if data.get('operation'):
+        where_conditions.append("ol.operation LIKE ?")
+        params.append(f"%{data['operation']}%")
+    
+    where_clause = ""
+    if where_conditions:
+        where_clause = "WHERE " + " AND ".join(where_conditions)
+    
+    query = f"""
+        SELECT ol.*, u.username 
+        FROM operation_logs ol
+        LEFT JOIN users u ON ol.user_id = u.id
+        {where_clause}
+        ORDER BY ol.created_at DESC
+    """
+    if limit:
+        query += f"LIMIT {int(limit)}"
+    return query, params
+
+def log_export_row(log):
+    """生成一条操作日志的CSV数据行"""
+    details_data = {}
+    try:
+        if log['details']:
+            details_data = json_loads(log['details'])
+    except:
+        details_data = {'user_details': log['details']}
+    
+    return [
+        log['id'],
+        log['username'] or 'System',
+        log['operation'],
+        log['target_id'] or '',
+        log['created_at'],
+        details_data.get('user_details', '')
+    ]
+
 @app.route('/api/admin/logs/export', methods=['POST'])
 @admin_required
 def export_logs():
@@ -2164,42 +2686,18 @@ def export_logs():
     try:
         data = request.json or {}
         export_format = data.get('format', 'csv').lower()
-        date_from = data.get('date_from', '')
-        date_to = data.get('date_to', '')
-        operation_filter = data.get('operation', '')
+        
+        if data.get('async'):
+            return create_export_job_response('logs', data)
+        
+        try:
+            query, params = build_log_export_query(data, limit=LOG_EXPORT_SYNC_LIMIT)
+        except ValueError as e:
+            response_data, status_code = validation_error([str(e)])
+            return jsonify(response_data), status_code
         
         with get_db() as conn:
             cursor = conn.cursor()
-            
-            # 构建查询条件
-            where_conditions = []
-            params = []
-            
-            if date_from:
-                where_conditions.append("DATE(ol.created_at) >= ?")
-                params.append(date_from)
-            
-            if date_to:
-                where_conditions.append("DATE(ol.created_at) <= ?")
-                params.append(date_to)
-            
-            if operation_filter:
-                where_conditions.append("ol.operation LIKE ?")
-                params.append(f"%{operation_filter}%")
-            
-            where_clause = ""
-            if where_conditions:
-                where_clause = "WHERE " + " AND ".join(where_conditions)
-            
-            # 获取数据
-            query = f"""
-                SELECT ol.*, u.username 
-                FROM operation_logs ol
-                LEFT JOIN users u ON ol.user_id = u.id
-                {where_clause}
-                ORDER BY ol.created_at DESC
-                LIMIT 10000
-            """
             cursor.execute(query, params)
             logs = cursor.fetchall()
         
@@ -2209,25 +2707,11 @@ def export_logs():
             writer = csv.writer(output)
             
             # 写入标题行
-            writer.writerow(['ID', '用户名', '操作类型', '目标ID', '创建时间', '详情'])
+            writer.writerow(LOG_EXPORT_HEADERS)
             
             # 写入数据行
             for log in logs:
-                details_data = {}
-                try:
-                    if log['details']:
-                        details_data = json.loads(log['details'])
-                except:
-                    details_data = {'user_details': log['details']}
-                
-                writer.writerow([
-                    log['id'],
-                    log['username'] or 'System',
-                    log['operation'],
-                    log['target_id'] or '',
-                    log['created_at'],
-                    details_data.get('user_details', '')
-                ])
+                writer.writerow(log_export_row(log))
             
             # 记录导出操作
             OperationLogger.log('EXPORT_LOGS', None, f'导出操作日志，格式: {export_format}, 条数: {len(logs)}')
@@ -2304,18 +2788,93 @@ def get_supported_question_types():
             }
         }), 500
 
+def questionnaire_export_record(q):
+    """JSON 导出中的一条问卷记录"""
+    return {
+        'id': q['id'],
+        'type': q['type'],
+        'name': q['name'],
+        'grade': q['grade'],
+        'submission_date': q['submission_date'],
+        'created_at': q['created_at'],
+        'updated_at': q['updated_at'],
+        'data': load_document(q['data'])
+    }
+
+CHANGE_FEED_FLUSH_ROWS = 200  # 增量同步接口每累计多少行输出一次
+
+def change_feed_record(row):
+    """增量同步中的一行：变更序号、操作类型和问卷当前数据（删除时为 null）"""
+    operation = row['change_operation']
+    if operation != OP_DELETE and row['id'] is None:
+        operation = OP_DELETE  # 读取时问卷已被彻底删除
+    return {
+        'seq': row['change_seq'],
+        'op': operation,
+        'id': row['change_id'],
+        'changed_at': row['change_at'],
+        'questionnaire': questionnaire_export_record(row) if operation != OP_DELETE else None
+    }
+
+# 问卷增量同步（NDJSON 变更流）
+@app.route('/api/questionnaires/changes', methods=['GET'])
+@admin_required
+def questionnaire_changes():
+    """按变更序号返回 since 之后新增、修改、删除的问卷，每行一个 JSON 对象
+    
+    每份问卷只返回最近一次变更；响应头 X-Change-Cursor 为下次同步使用的 since，
+    X-Change-Has-More 为 true 时表示受 limit 限制还有未返回的变更
+    """
+    try:
+        since = request.args.get('since', 0, type=int)
+        limit = request.args.get('limit', 0, type=int)
+        if since < 0 or limit < 0:
+            response_data, status_code = validation_error(['since 和 limit 必须为非负整数'])
+            return jsonify(response_data), status_code
+        
+        with get_db() as conn:
+            until, has_more = sequence_window(conn.cursor(), since, limit)
+        query, params = changes_query(since, until)
+        
+        def generate():
+            lines = []
+            for row in iter_query_rows(query, params):
+                lines.append(json_dumps_bytes(change_feed_record(row)))
+                if len(lines) >= CHANGE_FEED_FLUSH_ROWS:
+                    yield b'\n'.join(lines) + b'\n'
+                    lines = []
+            if lines:
+                yield b'\n'.join(lines) + b'\n'
+        
+        response = Response(generate(), content_type='application/x-ndjson; charset=utf-8')
+        response.headers['X-Change-Cursor'] = str(until)
+        response.headers['X-Change-Has-More'] = 'true' if has_more else 'false'
+        
+        OperationLogger.log(OperationLogger.EXPORT_DATA, None, f'增量同步问卷变更 (序号 {since} - {until})')
+        return response
+        
+    except Exception as e:
+        response_data, status_code = server_error('获取问卷变更失败', str(e))
+        return jsonify(response_data), status_code
+
 # 批量导出问卷数据 - 增强版本，支持 Excel 和 PDF
 @app.route('/api/questionnaires/export', methods=['POST'])
 @login_required
 def batch_export_questionnaires():
     try:
-        from export_utils import export_questionnaires, get_export_filename, get_content_type
+        from export_utils import (
+            exporter, export_questionnaires, stream_questionnaires, get_export_filename, get_content_type,
+            STREAMING_FORMATS
+        )
         
         data = request.json
         questionnaire_ids = data.get('ids', [])
         export_format = data.get('format', 'csv').lower()
         include_details = data.get('include_details', True)
         
+        if data.get('async'):
+            return create_export_job_response('batch', data)
+        
         if not questionnaire_ids:
             return jsonify({
                 'success': False,
@@ -2326,7 +2885,7 @@ def batch_export_questionnaires():
             }), 400
         
         # 验证导出格式
-        supported_formats = ['csv', 'excel', 'xlsx', 'pdf', 'json']
+        supported_formats = ['csv', 'excel', 'xlsx', 'pdf', 'json', 'parquet', 'arrow']
         if export_format not in supported_formats:
             return jsonify({
                 'success': False,
@@ -2335,15 +2894,26 @@ def batch_export_questionnaires():
                     'message': f'不支持的导出格式，支持: {", ".join(supported_formats)}'
                 }
             }), 400
-        
-        # 获取问卷数据
+        format_error = columnar_format_error(export_format)
+        if format_error:
+            return jsonify(format_error[0]), format_error[1]
+        
+        # 获取问卷数据（流式格式只统计数量，数据在输出响应时分批读取）
+        streaming = export_format in STREAMING_FORMATS and data.get('stream', True)
+        placeholders = ','.join(['?'] * len(questionnaire_ids))
+        where_clause = f"WHERE id IN ({placeholders}) AND deleted_at IS NULL"
+        query = f"SELECT * FROM questionnaires {where_clause} ORDER BY created_at DESC"
         with get_db() as conn:
             cursor = conn.cursor()
-            placeholders = ','.join(['?'] * len(questionnaire_ids))
-            cursor.execute(f"SELECT * FROM questionnaires WHERE id IN ({placeholders}) ORDER BY created_at DESC", questionnaire_ids)
-            questionnaires = cursor.fetchall()
+            if streaming:
+                cursor.execute(f"SELECT COUNT(*) FROM questionnaires {where_clause}", questionnaire_ids)
+                total_count = cursor.fetchone()[0]
+            else:
+                cursor.execute(query, questionnaire_ids)
+                questionnaires = cursor.fetchall()
+                total_count = len(questionnaires)
         
-        if not questionnaires:
+        if not total_count:
             return jsonify({
                 'success': False,
                 'error': {
@@ -2354,21 +2924,10 @@ def batch_export_questionnaires():
         
         # 处理 JSON 格式（保持原有逻辑）
         if export_format == 'json':
-            result = []
-            for q in questionnaires:
-                result.append({
-                    'id': q['id'],
-                    'type': q['type'],
-                    'name': q['name'],
-                    'grade': q['grade'],
-                    'submission_date': q['submission_date'],
-                    'created_at': q['created_at'],
-                    'updated_at': q['updated_at'],
-                    'data': json.loads(q['data'])
-                })
+            result = [questionnaire_export_record(q) for q in questionnaires]
             
             filename = get_export_filename('json', 'questionnaires_batch')
-            response = make_response(json.dumps(result, default=str, ensure_ascii=False, indent=2))
+            response = make_response(json_dumps_bytes(result, indent=True))
             response.headers['Content-Disposition'] = f'attachment; filename={filename}'
             response.headers['Content-type'] = 'application/json; charset=utf-8'
             
@@ -2379,17 +2938,24 @@ def batch_export_questionnaires():
         
         # 使用新的导出工具处理其他格式
         try:
-            file_content = export_questionnaires(questionnaires, export_format, include_details)
             filename = get_export_filename(export_format, 'questionnaires_batch')
             content_type = get_content_type(export_format)
             
-            response = make_response(file_content)
+            if streaming:
+                rows = iter_query_rows(query, questionnaire_ids)
+                response = Response(stream_questionnaires(rows, export_format, include_details), content_type=content_type)
+            elif export_format in ('excel', 'xlsx'):
+                output = exporter.export_to_excel_file(questionnaires, include_details)
+                response = send_file(output, mimetype=content_type)
+            else:
+                file_content = export_questionnaires(questionnaires, export_format, include_details)
+                response = make_response(file_content)
+                response.headers['Content-Type'] = content_type
             response.headers['Content-Disposition'] = f'attachment; filename={filename}'
-            response.headers['Content-Type'] = content_type
             
             # 记录操作日志
             OperationLogger.log(OperationLogger.EXPORT_DATA, None, 
-                         f'批量导出问卷 {len(questionnaires)} 条 ({export_format.upper()}格式)')
+                         f'批量导出问卷 {total_count} 条 ({export_format.upper()}格式)')
             
             return response
             
@@ -2425,7 +2991,7 @@ def export_questionnaire(questionnaire_id):
         include_details = request.args.get('include_details', 'true').lower() == 'true'
         
         # 验证导出格式
-        supported_formats = ['csv', 'excel', 'xlsx', 'pdf', 'json']
+        supported_formats = ['csv', 'excel', 'xlsx', 'pdf', 'json', 'parquet', 'arrow']
         if export_format not in supported_formats:
             return jsonify({
                 'success': False,
@@ -2434,10 +3000,13 @@ def export_questionnaire(questionnaire_id):
                     'message': f'不支持的导出格式，支持: {", ".join(supported_formats)}'
                 }
             }), 400
+        format_error = columnar_format_error(export_format)
+        if format_error:
+            return jsonify(format_error[0]), format_error[1]
         
         with get_db() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM questionnaires WHERE id = ?", (questionnaire_id,))
+            cursor.execute("SELECT * FROM questionnaires WHERE id = ? AND deleted_at IS NULL", (questionnaire_id,))
             q = cursor.fetchone()
         
         if not q:
@@ -2459,11 +3028,11 @@ def export_questionnaire(questionnaire_id):
                 'submission_date': q['submission_date'],
                 'created_at': q['created_at'],
                 'updated_at': q['updated_at'],
-                'data': json.loads(q['data'])
+                'data': load_document(q['data'])
             }
             
             filename = get_export_filename('json', f'questionnaire_{questionnaire_id}')
-            response = make_response(json.dumps(result, default=str, ensure_ascii=False, indent=2))
+            response = make_response(json_dumps_bytes(result, indent=True))
             response.headers['Content-Disposition'] = f'attachment; filename={filename}'
             response.headers['Content-type'] = 'application/json; charset=utf-8'
             
@@ -2509,28 +3078,78 @@ def export_questionnaire(questionnaire_id):
             }
         }), 500
 
+def columnar_format_error(export_format):
+    """列式导出格式（Parquet / Arrow）需要 pyarrow，未安装时返回校验错误"""
+    from export_utils import COLUMNAR_FORMATS, columnar_export_available
+    
+    if export_format in COLUMNAR_FORMATS and not columnar_export_available():
+        return validation_error([f'{export_format} 格式导出需要安装 pyarrow'])
+    return None
+
+# 高级导出的筛选条件
+def build_export_filters(filters):
+    """根据导出筛选条件生成 WHERE 子句和参数（排除已删除的问卷），日期格式错误时抛出 ValueError"""
+    where_conditions = ["deleted_at IS NULL"]
+    params = []
+    
+    # 日期范围筛选（半开区间，可使用created_at索引）
+    date_conditions, date_params = date_range_filter('created_at', filters.get('date_from', ''), filters.get('date_to', ''))
+    where_conditions.extend(date_conditions)
+    params.extend(date_params)
+    
+    if filters.get('type'):
+        where_conditions.append("type = ?")
+        params.append(filters['type'])
+    
+    if filters.get('grade'):
+        where_conditions.append("grade LIKE ?")
+        params.append(f"%{filters['grade']}%")
+    
+    if filters.get('name_search'):
+        where_conditions.append("name LIKE ?")
+        params.append(f"%{filters['name_search']}%")
+    
+    return "WHERE " + " AND ".join(where_conditions), params
+
+def describe_export_filters(filters):
+    """筛选条件的文字说明（用于操作日志）"""
+    date_from = filters.get('date_from', '')
+    date_to = filters.get('date_to', '')
+    filter_desc = []
+    if date_from or date_to:
+        filter_desc.append(f"日期: {date_from or '开始'} 至 {date_to or '结束'}")
+    if filters.get('type'):
+        filter_desc.append(f"类型: {filters['type']}")
+    if filters.get('grade'):
+        filter_desc.append(f"年级: {filters['grade']}")
+    if filters.get('name_search'):
+        filter_desc.append(f"姓名: {filters['name_search']}")
+    
+    return "; ".join(filter_desc) if filter_desc else "无筛选条件"
+
 # 高级导出功能 - 支持全量导出和自定义筛选
 @app.route('/api/admin/export/advanced', methods=['POST'])
 @admin_required
 def advanced_export():
     """高级导出功能，支持全量导出和自定义筛选条件"""
     try:
-        from export_utils import export_questionnaires, get_export_filename, get_content_type
+        from export_utils import (
+            exporter, export_questionnaires, stream_questionnaires, get_export_filename, get_content_type,
+            STREAMING_FORMATS, MAX_BUFFERED_EXPORT_ROWS
+        )
         
         data = request.json or {}
         export_format = data.get('format', 'csv').lower()
         include_details = data.get('include_details', True)
         
+        if data.get('async'):
+            return create_export_job_response('advanced', data)
+        
         # 筛选条件
-        filters = data.get('filters', {})
-        date_from = filters.get('date_from', '')
-        date_to = filters.get('date_to', '')
-        questionnaire_type = filters.get('type', '')
-        grade = filters.get('grade', '')
-        name_search = filters.get('name_search', '')
+        filters = data.get('filters') or {}
         
         # 验证导出格式
-        supported_formats = ['csv', 'excel', 'xlsx', 'pdf']
+        supported_formats = ['csv', 'excel', 'xlsx', 'pdf', 'parquet', 'arrow']
         if export_format not in supported_formats:
             return jsonify({
                 'success': False,
@@ -2539,44 +3158,28 @@ def advanced_export():
                     'message': f'不支持的导出格式，支持: {", ".join(supported_formats)}'
                 }
             }), 400
+        format_error = columnar_format_error(export_format)
+        if format_error:
+            return jsonify(format_error[0]), format_error[1]
         
-        # 构建查询条件
-        where_conditions = []
-        params = []
-        
-        if date_from:
-            where_conditions.append("DATE(created_at) >= ?")
-            params.append(date_from)
-        
-        if date_to:
-            where_conditions.append("DATE(created_at) <= ?")
-            params.append(date_to)
-        
-        if questionnaire_type:
-            where_conditions.append("type = ?")
-            params.append(questionnaire_type)
-        
-        if grade:
-            where_conditions.append("grade LIKE ?")
-            params.append(f"%{grade}%")
-        
-        if name_search:
-            where_conditions.append("name LIKE ?")
-            params.append(f"%{name_search}%")
+        # 构建查询条件（排除已删除的问卷）
+        try:
+            where_clause, params = build_export_filters(filters)
+        except ValueError as e:
+            response_data, status_code = validation_error([str(e)])
+            return jsonify(response_data), status_code
         
-        # 构建完整查询
-        where_clause = ""
-        if where_conditions:
-            where_clause = "WHERE " + " AND ".join(where_conditions)
+        # 流式格式（CSV）边查询边输出，不受导出数量限制
+        streaming = export_format in STREAMING_FORMATS and data.get('stream', True)
+        query = f"SELECT * FROM questionnaires {where_clause} ORDER BY created_at DESC"
         
-        # 获取问卷数据
+        # 先统计数量，超过限制时不读取问卷数据
         with get_db() as conn:
             cursor = conn.cursor()
-            query = f"SELECT * FROM questionnaires {where_clause} ORDER BY created_at DESC"
-            cursor.execute(query, params)
-            questionnaires = cursor.fetchall()
+            cursor.execute(f"SELECT COUNT(*) FROM questionnaires {where_clause}", params)
+            total_count = cursor.fetchone()[0]
         
-        if not questionnaires:
+        if not total_count:
             return jsonify({
                 'success': False,
                 'error': {
@@ -2585,42 +3188,46 @@ def advanced_export():
                 }
             }), 404
         
-        # 检查导出数量限制
-        max_export_limit = 1000  # 最大导出数量限制
-        if len(questionnaires) > max_export_limit:
+        # 检查导出数量限制（仅非流式格式）
+        max_export_limit = MAX_BUFFERED_EXPORT_ROWS
+        if not streaming and total_count > max_export_limit:
             return jsonify({
                 'success': False,
                 'error': {
                     'code': 'EXPORT_LIMIT_EXCEEDED',
-                    'message': f'导出数量超过限制，最多支持导出 {max_export_limit} 条记录，当前查询结果: {len(questionnaires)} 条'
+                    'message': f'导出数量超过限制，最多支持导出 {max_export_limit} 条记录，当前查询结果: {total_count} 条'
+                               f'（{"/".join(f.upper() for f in STREAMING_FORMATS)} 格式不受此限制）'
                 }
             }), 400
         
         # 执行导出
         try:
-            file_content = export_questionnaires(questionnaires, export_format, include_details)
             filename = get_export_filename(export_format, 'questionnaires_advanced')
             content_type = get_content_type(export_format)
             
-            response = make_response(file_content)
+            if streaming:
+                rows = iter_query_rows(query, params)
+                response = Response(stream_questionnaires(rows, export_format, include_details), content_type=content_type)
+            elif export_format in ('excel', 'xlsx'):
+                # Excel 使用只写模式逐行写入临时文件，响应时从文件发送
+                rows = iter_query_rows(query, params)
+                output = exporter.export_to_excel_file(rows, include_details)
+                response = send_file(output, mimetype=content_type)
+            else:
+                with get_db() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(query, params)
+                    questionnaires = cursor.fetchall()
+                file_content = export_questionnaires(questionnaires, export_format, include_details)
+                response = make_response(file_content)
+                response.headers['Content-Type'] = content_type
             response.headers['Content-Disposition'] = f'attachment; filename={filename}'
-            response.headers['Content-Type'] = content_type
             
             # 记录操作日志
-            filter_desc = []
-            if date_from or date_to:
-                filter_desc.append(f"日期: {date_from or '开始'} 至 {date_to or '结束'}")
-            if questionnaire_type:
-                filter_desc.append(f"类型: {questionnaire_type}")
-            if grade:
-                filter_desc.append(f"年级: {grade}")
-            if name_search:
-                filter_desc.append(f"姓名: {name_search}")
-            
-            filter_text = "; ".join(filter_desc) if filter_desc else "无筛选条件"
+            filter_text = describe_export_filters(filters)
             
             OperationLogger.log(OperationLogger.EXPORT_DATA, None, 
-                         f'高级导出问卷 {len(questionnaires)} 条 ({export_format.upper()}格式) - 筛选条件: {filter_text}')
+                         f'高级导出问卷 {total_count} 条 ({export_format.upper()}格式) - 筛选条件: {filter_text}')
             
             return response
             
@@ -2650,6 +3257,8 @@ def advanced_export():
 def export_preview():
     """获取导出预览信息，显示将要导出的数据统计"""
     try:
+        from export_utils import STREAMING_FORMATS, MAX_BUFFERED_EXPORT_ROWS
+        
         data = request.json or {}
         
         # 筛选条件
@@ -2660,34 +3269,12 @@ def export_preview():
         grade = filters.get('grade', '')
         name_search = filters.get('name_search', '')
         
-        # 构建查询条件
-        where_conditions = []
-        params = []
-        
-        if date_from:
-            where_conditions.append("DATE(created_at) >= ?")
-            params.append(date_from)
-        
-        if date_to:
-            where_conditions.append("DATE(created_at) <= ?")
-            params.append(date_to)
-        
-        if questionnaire_type:
-            where_conditions.append("type = ?")
-            params.append(questionnaire_type)
-        
-        if grade:
-            where_conditions.append("grade LIKE ?")
-            params.append(f"%{grade}%")
-        
-        if name_search:
-            where_conditions.append("name LIKE ?")
-            params.append(f"%{name_search}%")
-        
-        # 构建完整查询
-        where_clause = ""
-        if where_conditions:
-            where_clause = "WHERE " + " AND ".join(where_conditions)
+        # 构建查询条件（排除已删除的问卷）
+        try:
+            where_clause, params = build_export_filters(filters)
+        except ValueError as e:
+            response_data, status_code = validation_error([str(e)])
+            return jsonify(response_data), status_code
         
         # 获取统计信息
         with get_db() as conn:
@@ -2720,8 +3307,9 @@ def export_preview():
                 'total_count': total_count,
                 'type_statistics': type_stats,
                 'date_statistics': date_stats,
-                'export_limit': 1000,
-                'can_export': total_count <= 1000,
+                'export_limit': MAX_BUFFERED_EXPORT_ROWS,
+                'can_export': total_count <= MAX_BUFFERED_EXPORT_ROWS,
+                'unlimited_formats': list(STREAMING_FORMATS),
                 'filters_applied': {
                     'date_from': date_from,
                     'date_to': date_to,
@@ -2742,6 +3330,287 @@ def export_preview():
             }
         }), 500
 
+# ==================== 后台导出任务 ====================
+
+# 各类导出任务支持的格式
+EXPORT_JOB_FORMATS = {
+    'advanced': ['csv', 'excel', 'xlsx', 'pdf', 'parquet', 'arrow'],
+    'batch': ['csv', 'excel', 'xlsx', 'pdf', 'json', 'parquet', 'arrow'],
+    'logs': ['csv']
+}
+ADMIN_EXPORT_JOBS = ('advanced', 'logs')
+
+def run_questionnaire_export_job(where_clause, query_params, params, output, progress):
+    """执行问卷导出任务：分批读取问卷并写入结果文件"""
+    from export_utils import write_questionnaires
+    
+    with get_db_pool().connection() as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM questionnaires {where_clause}", query_params).fetchone()[0]
+    progress(0, total)
+    
+    query = f"SELECT * FROM questionnaires {where_clause} ORDER BY created_at DESC"
+    rows = track_progress(iter_query_rows(query, query_params), progress)
+    export_format = params.get('format', 'csv').lower()
+    
+    if export_format == 'pdf':
+        write_pdf_export(where_clause, query_params, params, output, rows, total)
+    elif export_format == 'json':
+        # 逐条写出 JSON 数组，格式与同步导出相同
+        output.write(b'[')
+        written = 0
+        for q in rows:
+            record = json_dumps_bytes(questionnaire_export_record(q), indent=True)
+            output.write(b',\n  ' if written else b'\n  ')
+            output.write(record.replace(b'\n', b'\n  '))
+            written += 1
+        output.write(b'\n]' if written else b']')
+    else:
+        write_questionnaires(output, rows, export_format, params.get('include_details', True))
+    return total
+
+def write_pdf_export(where_clause, query_params, params, output, rows, total):
+    """PDF导出：概览统计由数据库汇总，详细数据分批读取；配置了多个进程时按问卷类型并行生成各节"""
+    from export_utils import exporter, query_rows
+    
+    with get_db_pool().connection() as conn:
+        type_counts = {
+            row[0]: row[1] for row in conn.execute(
+                f"SELECT type, COUNT(*) FROM questionnaires {where_clause} GROUP BY type ORDER BY type",
+                query_params
+            )
+        }
+    summary = (total, type_counts)
+    include_details = params.get('include_details', True)
+    workers = app.config.get('EXPORT_PDF_WORKERS', 1)
+    
+    if workers > 1 and len(type_counts) > 1:
+        query = f"SELECT * FROM questionnaires {where_clause} AND type IS ? ORDER BY created_at DESC"
+        sections = [
+            (q_type, partial(query_rows, DATABASE, query, list(query_params) + [q_type]))
+            for q_type in type_counts
+        ]
+        exporter.write_pdf_sections(output, sections, summary, include_details, max_workers=workers)
+    else:
+        exporter.write_pdf(output, rows, include_details, summary)
+
+def run_advanced_export_job(params, output, progress):
+    where_clause, query_params = build_export_filters(params.get('filters') or {})
+    return run_questionnaire_export_job(where_clause, query_params, params, output, progress)
+
+def run_batch_export_job(params, output, progress):
+    ids = params.get('ids') or []
+    where_clause = f"WHERE id IN ({','.join(['?'] * len(ids))}) AND deleted_at IS NULL"
+    return run_questionnaire_export_job(where_clause, ids, params, output, progress)
+
+def run_log_export_job(params, output, progress):
+    """执行操作日志导出任务（不限制条数）"""
+    import io
+    
+    query, query_params = build_log_export_query(params)
+    with get_db_pool().connection() as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM ({query})", query_params).fetchone()[0]
+    progress(0, total)
+    
+    text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    writer.writerow(LOG_EXPORT_HEADERS)
+    for log in track_progress(iter_query_rows(query, query_params), progress):
+        writer.writerow(log_export_row(log))
+    text.flush()
+    text.detach()
+    return total
+
+_export_jobs = None
+
+def get_export_jobs():
+    """获取后台导出任务管理器（按需创建）"""
+    global _export_jobs
+    if _export_jobs is None:
+        manager = ExportJobManager(
+            connection=lambda: get_db_pool().connection(),
+            export_dir=app.config.get('EXPORT_JOB_DIR') or os.path.join(os.path.dirname(__file__), 'exports'),
+            max_workers=app.config.get('EXPORT_JOB_WORKERS', 2),
+            ttl=app.config.get('EXPORT_JOB_TTL', 24 * 3600),
+            stale_after=app.config.get('EXPORT_JOB_STALE_AFTER', 120)
+        )
+        manager.register('advanced', run_advanced_export_job)
+        manager.register('batch', run_batch_export_job)
+        manager.register('logs', run_log_export_job)
+        _export_jobs = manager
+    return _export_jobs
+
+def start_export_jobs():
+    """启动导出任务线程池（gunicorn post_fork 钩子调用），接管重启前未完成的任务"""
+    get_export_jobs().start()
+
+def stop_export_jobs():
+    if _export_jobs is not None:
+        _export_jobs.stop()
+
+def create_export_job_response(kind, data):
+    """校验导出参数并创建后台导出任务，返回 202 响应"""
+    from export_utils import get_export_filename, get_content_type
+    
+    export_format = (data.get('format') or 'csv').lower()
+    supported_formats = EXPORT_JOB_FORMATS.get(kind)
+    if supported_formats is None:
+        response_data, status_code = validation_error([f'不支持的导出任务类型: {kind}'])
+        return jsonify(response_data), status_code
+    if export_format not in supported_formats:
+        response_data, status_code = validation_error([f'不支持的导出格式，支持: {", ".join(supported_formats)}'])
+        return jsonify(response_data), status_code
+    format_error = columnar_format_error(export_format)
+    if format_error:
+        return jsonify(format_error[0]), format_error[1]
+    
+    # 提前校验筛选条件，避免创建注定失败的任务
+    try:
+        if kind == 'advanced':
+            params = {'filters': data.get('filters') or {}}
+            build_export_filters(params['filters'])
+            description = f"高级导出 - 筛选条件: {describe_export_filters(params['filters'])}"
+            prefix = 'questionnaires_advanced'
+        elif kind == 'batch':
+            ids = [int(i) for i in data.get('ids') or []]
+            if not ids:
+                response_data, status_code = validation_error(['请选择要导出的问卷'])
+                return jsonify(response_data), status_code
+            params = {'ids': ids}
+            description = f'批量导出问卷 {len(ids)} 条'
+            prefix = 'questionnaires_batch'
+        else:
+            params = {key: data.get(key, '') for key in ('date_from', 'date_to', 'operation')}
+            build_log_export_query(params)
+            description = '导出操作日志'
+            prefix = 'operation_logs'
+    except (ValueError, TypeError) as e:
+        response_data, status_code = validation_error([str(e)])
+        return jsonify(response_data), status_code
+    
+    params['format'] = export_format
+    params['include_details'] = data.get('include_details', True)
+    
+    job = get_export_jobs().create(
+        kind, export_format, params,
+        filename=get_export_filename(export_format, prefix),
+        content_type=get_content_type(export_format),
+        created_by=session.get('user_id')
+    )
+    
+    OperationLogger.log('EXPORT_LOGS' if kind == 'logs' else OperationLogger.EXPORT_DATA, None,
+                        f'{description} ({export_format.upper()}格式) - 后台任务 {job["id"]}')
+    
+    return jsonify({
+        'success': True,
+        'data': job_to_dict(job),
+        'links': {
+            'status': url_for('get_export_job', job_id=job['id']),
+            'download': url_for('download_export_job', job_id=job['id'])
+        }
+    }), 202
+
+def load_export_job(job_id):
+    """读取当前用户可访问的导出任务，返回 (任务, 错误响应)"""
+    job = get_export_jobs().get(job_id)
+    if job is None:
+        response_data, status_code = not_found_error('导出任务')
+        return None, (jsonify(response_data), status_code)
+    if job['created_by'] != session.get('user_id') and session.get('user_role') != 'admin':
+        response_data, status_code = permission_error('无权访问该导出任务')
+        return None, (jsonify(response_data), status_code)
+    return job, None
+
+@app.route('/api/export/jobs', methods=['POST'])
+@login_required
+def create_export_job():
+    """创建后台导出任务，kind 为 advanced / batch / logs，其余参数与对应的同步导出接口相同"""
+    try:
+        data = request.json or {}
+        kind = data.get('kind', '')
+        if kind in ADMIN_EXPORT_JOBS and session.get('user_role') != 'admin':
+            response_data, status_code = permission_error('权限不足，需要管理员权限')
+            return jsonify(response_data), status_code
+        return create_export_job_response(kind, data)
+    except Exception as e:
+        response_data, status_code = server_error('创建导出任务失败', str(e))
+        return jsonify(response_data), status_code
+
+@app.route('/api/export/jobs', methods=['GET'])
+@login_required
+def list_export_jobs():
+    """当前用户最近的导出任务（管理员可查看全部）"""
+    try:
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        with get_db() as conn:
+            cursor = conn.cursor()
+            if session.get('user_role') == 'admin':
+                cursor.execute(f"SELECT * FROM {JOBS_TABLE} ORDER BY created_at DESC LIMIT ?", (limit,))
+            else:
+                cursor.execute(
+                    f"SELECT * FROM {JOBS_TABLE} WHERE created_by = ? ORDER BY created_at DESC LIMIT ?",
+                    (session.get('user_id'), limit)
+                )
+            jobs = [job_to_dict(dict(row)) for row in cursor.fetchall()]
+        return jsonify({'success': True, 'data': jobs})
+    except Exception as e:
+        response_data, status_code = server_error('获取导出任务失败', str(e))
+        return jsonify(response_data), status_code
+
+@app.route('/api/export/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_export_job(job_id):
+    """查询导出任务状态和进度"""
+    try:
+        job, error_response = load_export_job(job_id)
+        if error_response:
+            return error_response
+        return jsonify({'success': True, 'data': job_to_dict(job)})
+    except Exception as e:
+        response_data, status_code = server_error('获取导出任务失败', str(e))
+        return jsonify(response_data), status_code
+
+@app.route('/api/export/jobs/<job_id>/download', methods=['GET'])
+@login_required
+def download_export_job(job_id):
+    """下载导出结果，支持 Range 断点续传"""
+    try:
+        job, error_response = load_export_job(job_id)
+        if error_response:
+            return error_response
+        
+        if job['status'] == STATUS_EXPIRED or (
+                job['status'] == STATUS_COMPLETED and not (job['file_path'] and os.path.exists(job['file_path']))):
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'EXPORT_EXPIRED',
+                    'message': '导出结果已过期，请重新创建导出任务'
+                }
+            }), 410
+        
+        if job['status'] != STATUS_COMPLETED:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'EXPORT_NOT_READY',
+                    'message': f'导出任务尚未完成（当前状态: {job["status"]}）',
+                    'details': job_to_dict(job)
+                }
+            }), 409
+        
+        # conditional=True 时由 werkzeug 处理 Range / If-Range / ETag
+        return send_file(
+            job['file_path'],
+            mimetype=job['content_type'],
+            as_attachment=True,
+            download_name=job['filename'],
+            conditional=True,
+            max_age=0
+        )
+    except Exception as e:
+        response_data, status_code = server_error('下载导出结果失败', str(e))
+        return jsonify(response_data), status_code
+
 # Frankfurt Scale报告生成API
 @app.route('/api/generate_frankfurt_report', methods=['POST'])
 @login_required
@@ -2772,7 +3641,7 @@ def generate_frankfurt_report():
         # 验证问卷是否存在并获取完整数据
         with get_db() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM questionnaires WHERE id = ?', (questionnaire_id,))
+            cursor.execute('SELECT * FROM questionnaires WHERE id = ? AND deleted_at IS NULL', (questionnaire_id,))
             questionnaire = cursor.fetchone()
             
             if not questionnaire:
@@ -2804,7 +3673,8 @@ def generate_frankfurt_report():
             report_html = generate_frankfurt_report_html(report_data)
             
             # 保存报告到数据库
-            report_json = json.dumps(report_data, ensure_ascii=False)
+            report_json = encode_column(json_dumps(report_data), 'report_data',
+                                        questionnaire_dict['type'], cursor)
             cursor.execute(
                 'UPDATE questionnaires SET report_data = ?, report_generated_at = ? WHERE id = ?',
                 (report_json, datetime.now().isoformat(), questionnaire_id)
@@ -2835,7 +3705,7 @@ def generate_frankfurt_report_data(questionnaire_dict):
     """从问卷数据生成Frankfurt Scale报告数据"""
     try:
         # 解析问卷数据
-        data = json.loads(questionnaire_dict.get('data', '{}'))
+        data = load_document(questionnaire_dict.get('data', '{}'))
         basic_info = data.get('basic_info', {})
         questions = data.get('questions', [])
         
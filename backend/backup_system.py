@@ -16,6 +16,8 @@ import logging
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from storage_codec import decode as decode_column
+
 class BackupSystem:
     """备份系统类"""
     
@@ -146,7 +148,10 @@ class BackupSystem:
                 for table in tables:
                     cursor.execute(f"SELECT * FROM {table}")
                     rows = cursor.fetchall()
-                    export_data['tables'][table] = [dict(row) for row in rows]
+                    # 压缩保存的列解压为 JSON 文本
+                    export_data['tables'][table] = [
+                        {key: decode_column(value, conn) for key, value in dict(row).items()} for row in rows
+                    ]
                 
                 with open(json_path, 'w', encoding='utf-8') as f:
                     json.dump(export_data, f, ensure_ascii=False, indent=2, default=str)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+批量提交基准测试
+对比逐条调用 POST /api/questionnaires 与一次调用 POST /api/questionnaires/bulk 写入相同数量问卷的吞吐量，
+批量提交分别测试在请求线程中校验和使用校验进程池
+
+用法:
+    python backend/benchmarks/bench_bulk_submit.py --items 50 200 --workers 0 2 4
+"""
+
+import io
+import time
+import argparse
+from contextlib import redirect_stdout
+
+from common import setup_app, login, load_sample, print_table
+
+
+def make_items(count):
+    """生成测试问卷（示例 Frankfurt 问卷，姓名各不相同；姓名只允许中英文字母）"""
+    sample = load_sample()
+    return [dict(sample, basic_info=dict(sample['basic_info'], name=f'测试儿童{letters(i)}')) for i in range(count)]
+
+
+def letters(number):
+    text = ''
+    while True:
+        number, remainder = divmod(number, 26)
+        text = chr(ord('a') + remainder) + text
+        if not number:
+            return text
+
+
+def run_single(client, items):
+    for item in items:
+        response = client.post('/api/questionnaires', json=item)
+        assert response.status_code == 201, response.get_data(as_text=True)
+
+
+def run_bulk(client, items):
+    response = client.post('/api/questionnaires/bulk', json=items)
+    assert response.status_code == 201, response.get_data(as_text=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量提交基准测试')
+    parser.add_argument('--items', type=int, nargs='+', default=[50, 200], help='每次提交的问卷数量')
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 2, 4], help='批量提交的校验进程数')
+    args = parser.parse_args()
+
+    app_module, db_path = setup_app()
+    app_module.app.config['BULK_SUBMIT_PARALLEL_MIN'] = 1
+    client = login(app_module.app.test_client())
+
+    # 预热（导入模块、启动校验进程池）
+    with redirect_stdout(io.StringIO()):
+        run_single(client, make_items(2))
+        for workers in args.workers:
+            app_module.app.config['BULK_SUBMIT_WORKERS'] = workers
+            run_bulk(client, make_items(max(workers, 1) * 2))
+
+    rows = []
+    for count in args.items:
+        items = make_items(count)
+        cases = [('逐条提交', None)] + [(f'批量提交 workers={w}', w) for w in args.workers]
+        baseline = None
+        for label, workers in cases:
+            start = time.perf_counter()
+            # 单条提交接口输出大量调试信息，计时时屏蔽
+            with redirect_stdout(io.StringIO()):
+                if workers is None:
+                    run_single(client, items)
+                else:
+                    app_module.app.config['BULK_SUBMIT_WORKERS'] = workers
+                    run_bulk(client, items)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            rows.append([count, label, round(elapsed * 1000, 1), round(count / elapsed, 1),
+                         f'{baseline / elapsed:.2f}x'])
+
+    print_table(['问卷数', '方式', '总耗时(ms)', '问卷/秒', '相对逐条'], rows)
+    print(f'\n数据库: {db_path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Excel 导出基准测试
+对比 openpyxl 只写模式（写入临时文件）与普通内存模式导出详细 Excel 的耗时和峰值内存（RSS）
+
+每个组合在独立子进程中运行，峰值 RSS 互不影响
+
+用法:
+    python backend/benchmarks/bench_excel_export.py --sizes 1000 10000 50000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+from common import load_sample, print_table
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存（MB），Linux 下 ru_maxrss 单位为 KB"""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def generate_questionnaires(rows):
+    """按需生成测试问卷（使用示例 Frankfurt 问卷作为 data 文档），不预先占用内存"""
+    sample = load_sample()
+    raw = json.dumps(sample, ensure_ascii=False)
+    for i in range(1, rows + 1):
+        yield {
+            'id': i,
+            'type': sample['type'],
+            'name': f'测试儿童{i}',
+            'grade': sample['basic_info'].get('grade', ''),
+            'submission_date': '2025-01-27',
+            'created_at': '2025-01-27 10:00:00',
+            'data': raw
+        }
+
+
+def run_child(rows, write_only):
+    """子进程：执行一次导出并输出 JSON 结果"""
+    from export_utils import exporter
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    output = exporter.export_to_excel_file(generate_questionnaires(rows), include_details=True,
+                                           write_only=write_only)
+    elapsed = time.perf_counter() - start
+    output.seek(0, os.SEEK_END)
+    size = output.tell()
+    output.close()
+
+    print(json.dumps({
+        'seconds': round(elapsed, 2),
+        'peak_rss_mb': peak_rss_mb(),
+        'baseline_rss_mb': baseline,
+        'file_mb': round(size / (1024 * 1024), 2)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Excel 导出基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000], help='导出的问卷数量')
+    parser.add_argument('--compare-max', type=int, default=10000,
+                        help='内存模式只测试不超过该数量的组合（内存模式在大数据量下可能耗尽内存）')
+    parser.add_argument('--child', nargs=2, metavar=('ROWS', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(int(args.child[0]), args.child[1] == 'write_only')
+        return
+
+    results = []
+    for rows in args.sizes:
+        for mode in ('write_only', 'in_memory'):
+            if mode == 'in_memory' and rows > args.compare_max:
+                results.append([rows, mode, '-', '-', '-', '跳过'])
+                continue
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', str(rows), mode],
+                capture_output=True, text=True
+            )
+            if completed.returncode != 0:
+                results.append([rows, mode, '-', '-', '-', f'失败: {completed.stderr.strip().splitlines()[-1:]}'])
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            results.append([rows, mode, result['seconds'], result['peak_rss_mb'], result['file_mb'],
+                            f"基线 {result['baseline_rss_mb']} MB"])
+
+    print_table(['问卷数', '模式', '耗时(s)', '峰值RSS(MB)', '文件(MB)', '备注'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+JSON 序列化基准测试
+分别使用标准库 json 和 orjson（需要安装）作为 API 响应和存储层的 JSON 实现，对比
+问卷列表（view=full）、批量导出 JSON、管理统计三类响应的延迟，以及 data 列文档的序列化 / 解析耗时
+
+用法:
+    python backend/benchmarks/bench_json_provider.py --rows 2000 --repeat 50
+"""
+
+import io
+import argparse
+from contextlib import redirect_stdout
+
+from common import setup_app, login, load_sample, timed, summarize, print_table
+from bench_list_projection import seed
+
+import json_codec
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON 序列化基准测试')
+    parser.add_argument('--rows', type=int, default=2000, help='测试问卷数量')
+    parser.add_argument('--repeat', type=int, default=50, help='每种组合的执行次数')
+    args = parser.parse_args()
+
+    app_module, db_path = setup_app()
+    seed(app_module, args.rows)
+    client = login(app_module.app.test_client())
+
+    requests = [
+        ('问卷列表 limit=100', lambda: client.get('/api/questionnaires?page=2&limit=100&view=full')),
+        ('批量导出 JSON 200 条', lambda: client.post('/api/questionnaires/export',
+                                                 json={'ids': list(range(1, 201)), 'format': 'json'})),
+        ('管理统计', lambda: client.get('/api/admin/statistics')),
+    ]
+    document = load_sample()
+    text = json_codec.dumps(document)
+    calls = [
+        ('问卷文档序列化', lambda: json_codec.dumps(document)),
+        ('问卷文档解析', lambda: json_codec.loads(text)),
+    ]
+
+    providers = [json_codec.PROVIDER_STDLIB]
+    if json_codec.ORJSON_AVAILABLE:
+        providers.append(json_codec.PROVIDER_ORJSON)
+    else:
+        print('未安装 orjson，只测试标准库')
+
+    results = {}
+    for provider in providers:
+        json_codec.configure(provider)
+        for label, func in requests:
+            def request_once():
+                response = func()
+                assert response.status_code == 200, response.get_data(as_text=True)
+                return response.get_data()
+
+            # 接口会输出调试信息，计时时屏蔽
+            with redirect_stdout(io.StringIO()):
+                request_once()  # 预热
+                durations, body = timed(request_once, args.repeat)
+            results[(label, provider)] = (summarize(durations), f'{len(body) / 1024:.1f} KB')
+        for label, func in calls:
+            func()
+            durations, _ = timed(func, args.repeat * 20)
+            results[(label, provider)] = (summarize(durations), '-')
+    json_codec.configure()
+
+    rows = []
+    for label, _ in requests + calls:
+        baseline = results[(label, providers[0])][0]['mean']
+        for provider in providers:
+            stats, size = results[(label, provider)]
+            rows.append([label, provider, size, stats['mean'], stats['p50'], stats['p95'],
+                         f"{baseline / stats['mean']:.2f}x" if stats['mean'] else '-'])
+
+    print(f"问卷数量: {args.rows}，接口每种组合请求 {args.repeat} 次，数据库: {db_path}")
+    print_table(['负载', 'JSON 实现', '响应大小', '平均(ms)', 'p50(ms)', 'p95(ms)', '相对标准库'], rows)
+
+
+if __name__ == '__main__':
+    main()
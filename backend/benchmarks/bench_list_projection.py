@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+问卷列表字段投影基准测试
+对比 GET /api/questionnaires 在 view=full 与 view=summary 下的响应体大小和延迟
+
+用法:
+    python backend/benchmarks/bench_list_projection.py --rows 2000 --repeat 50
+"""
+
+import json
+import argparse
+from datetime import datetime, timedelta
+
+from common import setup_app, login, load_sample, timed, summarize, print_table
+
+
+def seed(app_module, rows):
+    """直接写入测试问卷（使用示例 Frankfurt 问卷作为 data 文档）"""
+    from questionnaire_fields import HOT_FIELDS, extract_hot_fields
+
+    sample = load_sample()
+    columns = ['type', 'created_at', 'updated_at', 'data'] + list(HOT_FIELDS)
+    sql = f"INSERT INTO questionnaires ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
+    base_time = datetime.now() - timedelta(days=30)
+
+    params = []
+    for i in range(rows):
+        doc = dict(sample)
+        doc['basic_info'] = dict(sample['basic_info'], name=f"测试儿童{i}", school='实验小学', teacher='王老师')
+        fields = extract_hot_fields(doc)
+        created_at = (base_time + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S')
+        params.append([doc['type'], created_at, created_at, json.dumps(doc, ensure_ascii=False)]
+                      + [fields[f] for f in HOT_FIELDS])
+
+    with app_module.get_db_pool().connection() as conn:
+        conn.executemany(sql, params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='问卷列表字段投影基准测试')
+    parser.add_argument('--rows', type=int, default=2000, help='测试问卷数量')
+    parser.add_argument('--repeat', type=int, default=50, help='每种组合的请求次数')
+    args = parser.parse_args()
+
+    app_module, db_path = setup_app()
+    seed(app_module, args.rows)
+    client = login(app_module.app.test_client())
+
+    rows = []
+    for limit in (20, 100):
+        for view in ('full', 'summary'):
+            url = f'/api/questionnaires?page=2&limit={limit}&view={view}'
+
+            def request_once():
+                response = client.get(url)
+                assert response.status_code == 200, response.get_data(as_text=True)
+                return response.get_data()
+
+            client.get(url)  # 预热
+            durations, body = timed(request_once, args.repeat)
+            stats = summarize(durations)
+            rows.append([limit, view, f"{len(body) / 1024:.1f} KB", stats['p50'], stats['p95'], stats['max']])
+
+    print(f"问卷数量: {args.rows}，每种组合请求 {args.repeat} 次，数据库: {db_path}")
+    print_table(['limit', 'view', '响应大小', 'p50(ms)', 'p95(ms)', 'max(ms)'], rows)
+
+
+if __name__ == '__main__':
+    main()
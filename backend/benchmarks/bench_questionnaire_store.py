@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+问卷定义存储基准测试
+同一批问卷（Frankfurt 示例和合成问卷，作答随机）分别以完整 JSON 和紧凑格式（题目结构只保存一份定义）保存，
+对比 data 列大小和读取路径的耗时：按 ID 读取 data 列并还原问卷文档、GET /api/questionnaires/<id>、
+GET /api/questionnaires?view=full
+
+用法:
+    python backend/benchmarks/bench_questionnaire_store.py --rows 2000 --repeat 500
+"""
+
+import io
+import random
+import sqlite3
+import argparse
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from common import setup_app, login, load_sample, timed, summarize, print_table
+from bench_submission_pipeline import make_form
+from bench_storage_codec import random_form, column_bytes
+
+from json_codec import dumps as json_dumps
+from questionnaire_fields import HOT_FIELDS, extract_hot_fields
+from questionnaire_store import dump_document, load_document, definition_stats
+from validation import prepare_questionnaire
+
+
+def make_documents(rows):
+    rng = random.Random(42)
+    templates = [load_sample(), make_form(30)]
+    documents = []
+    with redirect_stdout(io.StringIO()):
+        for i in range(rows):
+            is_valid, errors, data = prepare_questionnaire(random_form(templates[i % 2], rng))
+            assert is_valid, errors
+            documents.append(data)
+    return documents
+
+
+def seed(db_path, documents, compact):
+    """写入测试问卷，compact 为 False 时 data 列保存完整 JSON"""
+    columns = ['type', 'created_at', 'updated_at', 'data'] + list(HOT_FIELDS)
+    sql = f"INSERT INTO questionnaires ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    for data in documents:
+        text = dump_document(cursor, data) if compact else json_dumps(data)
+        fields = extract_hot_fields(data)
+        cursor.execute(sql, [data['type'], now, now, text] + [fields[f] for f in HOT_FIELDS])
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='问卷定义存储基准测试')
+    parser.add_argument('--rows', type=int, default=2000, help='测试问卷数量')
+    parser.add_argument('--repeat', type=int, default=500, help='每种读取方式的执行次数')
+    args = parser.parse_args()
+
+    documents = make_documents(args.rows)
+    rng = random.Random(7)
+    sample_ids = [rng.randint(1, args.rows) for _ in range(args.repeat)]
+
+    rows = []
+    for label, compact in (('完整 JSON', False), ('紧凑格式', True)):
+        app_module, db_path = setup_app()
+        seed(db_path, documents, compact)
+
+        conn = sqlite3.connect(db_path)
+        data_bytes = column_bytes(conn, 'data')
+        definition_bytes = definition_stats(conn.cursor())['definition_bytes']
+        ids = iter(sample_ids * 2)
+
+        def read_once():
+            value = conn.execute('SELECT data FROM questionnaires WHERE id = ?', (next(ids),)).fetchone()[0]
+            return load_document(value, conn)
+
+        read_once()
+        read_stats = summarize(timed(read_once, args.repeat - 1)[0])
+        conn.close()
+
+        client = login(app_module.app.test_client())
+        api_ids = iter(sample_ids * 2)
+
+        def get_once():
+            response = client.get(f'/api/questionnaires/{next(api_ids)}')
+            assert response.status_code == 200, response.get_data(as_text=True)
+
+        def list_once():
+            response = client.get('/api/questionnaires?view=full&limit=100')
+            assert response.status_code == 200, response.get_data(as_text=True)
+
+        with redirect_stdout(io.StringIO()):
+            get_once()
+            api_stats = summarize(timed(get_once, args.repeat - 1)[0])
+            list_once()
+            list_stats = summarize(timed(list_once, max(args.repeat // 10, 5))[0])
+
+        rows.append([label, f'{data_bytes / 1024:.0f} KB', f'{definition_bytes / 1024:.0f} KB',
+                     read_stats['p50'], read_stats['p95'], api_stats['p50'], api_stats['p95'],
+                     list_stats['p50'], list_stats['p95']])
+        app_module.get_db_pool().close_all()
+
+    print(f"问卷数量: {args.rows}，每种读取方式执行 {args.repeat} 次（列表页 {max(args.repeat // 10, 5)} 次）")
+    print_table(['存储格式', 'data 列', '问卷定义', '读取还原 p50(ms)', 'p95(ms)',
+                 'GET p50(ms)', 'p95(ms)', '列表 full p50(ms)', 'p95(ms)'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Schema 实例复用基准测试
+对比每次使用都重新构造 Marshmallow Schema（原来的做法）与使用 schema_registry 共享实例时，
+一份问卷的验证耗时（validate_questionnaire_with_schema）和完整提交处理耗时（prepare_questionnaire）
+
+用法:
+    python backend/benchmarks/bench_schema_registry.py --questions 20 200 --repeat 200
+"""
+
+import io
+import copy
+import argparse
+from contextlib import redirect_stdout
+
+from common import load_sample, timed, summarize, print_table
+from bench_submission_pipeline import make_form
+
+import validation
+
+
+class FreshSchemas:
+    """每次获取都构造新实例，模拟使用注册表之前的行为"""
+
+    def get(self, schema_class):
+        return schema_class()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Schema 实例复用基准测试')
+    parser.add_argument('--questions', type=int, nargs='+', default=[20, 200], help='合成问卷的题目数量')
+    parser.add_argument('--repeat', type=int, default=200, help='每种组合的执行次数')
+    args = parser.parse_args()
+
+    cases = [('Frankfurt 示例', load_sample())] + [(f'合成问卷 {n} 题', make_form(n)) for n in args.questions]
+    steps = [
+        ('验证', lambda data: validation.validate_questionnaire_with_schema(validation.normalize_questionnaire_data(data))),
+        ('完整处理', validation.prepare_questionnaire),
+    ]
+    registry = validation.schema_registry
+
+    rows = []
+    for label, form in cases:
+        for step, func in steps:
+            baseline = None
+            for mode, schemas in (('每次构造', FreshSchemas()), ('共享实例', registry)):
+                validation.schema_registry = schemas
+                copies = iter([copy.deepcopy(form) for _ in range(args.repeat + 1)])
+                # 验证函数会输出调试信息，计时时屏蔽
+                with redirect_stdout(io.StringIO()):
+                    result = func(next(copies))  # 预热
+                    assert result[0], result[1]
+                    durations, _ = timed(lambda: func(next(copies)), args.repeat)
+                stats = summarize(durations)
+                baseline = baseline or stats['mean']
+                rows.append([label, step, mode, stats['mean'], stats['p50'], stats['p95'],
+                             f"{baseline / stats['mean']:.2f}x"])
+    validation.schema_registry = registry
+
+    print_table(['问卷', '步骤', 'Schema', '平均(ms)', 'p50(ms)', 'p95(ms)', '加速'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+存储压缩基准测试
+同一批问卷（Frankfurt 示例和合成问卷，作答随机）分别以不压缩、zlib、zlib + 预设字典、zstd + 训练字典
+（需要 zstandard）保存，对比数据库文件大小（VACUUM 后）、data / report_data 列大小，
+以及读取路径的耗时：按 ID 读取 data 列并还原问卷文档、GET /api/questionnaires/<id>
+
+用法:
+    python backend/benchmarks/bench_storage_codec.py --rows 2000 --repeat 500
+"""
+
+import io
+import os
+import copy
+import json
+import random
+import shutil
+import sqlite3
+import argparse
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from common import setup_app, login, load_sample, timed, summarize, print_table
+from bench_submission_pipeline import make_form
+
+import storage_codec
+from questionnaire_fields import HOT_FIELDS, extract_hot_fields
+from questionnaire_store import dump_document, load_document
+from validation import prepare_questionnaire
+
+
+def random_form(template, rng):
+    """按模板生成作答随机的问卷"""
+    form = copy.deepcopy(template)
+    name = rng.choice('王李张刘陈杨') + rng.choice('小大') + rng.choice('明红华军丽强')
+    form['basic_info'] = dict(form.get('basic_info', {}), name=name, school=rng.choice(['实验小学', '第一小学', '第二小学']))
+    for question in form['questions']:
+        if question.get('options'):
+            question['selected'] = [rng.choice(question['options'])['value']]
+        elif 'answer' in question:
+            question['answer'] = ''.join(rng.choice('今天孩子在学校主动和同学说话了') for _ in range(rng.randint(5, 40)))
+        elif 'rating' in question:
+            question['rating'] = rng.randint(question.get('min_rating', 1), question.get('max_rating', 5))
+    return form
+
+
+def seed(app_module, db_path, rows):
+    """写入测试问卷（不压缩），Frankfurt 问卷同时生成报告数据"""
+    rng = random.Random(42)
+    templates = [load_sample(), make_form(30)]
+    columns = ['type', 'created_at', 'updated_at', 'data', 'report_data'] + list(HOT_FIELDS)
+    sql = f"INSERT INTO questionnaires ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    storage_codec.configure(codec=storage_codec.CODEC_NONE)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    with redirect_stdout(io.StringIO()):
+        for i in range(rows):
+            is_valid, errors, data = prepare_questionnaire(random_form(templates[i % 2], rng))
+            assert is_valid, errors
+            text = dump_document(cursor, data)
+            report = None
+            if i % 2 == 0:
+                report_data = app_module.generate_frankfurt_report_data({'data': text, 'name': data['basic_info'].get('name')})
+                report = json.dumps(report_data, ensure_ascii=False)
+            fields = extract_hot_fields(data)
+            cursor.execute(sql, [data['type'], now, now, text, report] + [fields[f] for f in HOT_FIELDS])
+    conn.commit()
+    conn.close()
+
+
+def column_bytes(conn, column):
+    return conn.execute(f"SELECT COALESCE(SUM(LENGTH(CAST({column} AS BLOB))), 0) FROM questionnaires").fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='存储压缩基准测试')
+    parser.add_argument('--rows', type=int, default=2000, help='测试问卷数量')
+    parser.add_argument('--repeat', type=int, default=500, help='每种读取方式的执行次数')
+    args = parser.parse_args()
+
+    app_module, base_path = setup_app()
+    seed(app_module, base_path, args.rows)
+
+    modes = [('不压缩', storage_codec.CODEC_NONE, False), ('zlib', storage_codec.CODEC_ZLIB, False),
+             ('zlib + 预设字典', storage_codec.CODEC_ZLIB, True)]
+    if storage_codec.ZSTD_AVAILABLE:
+        modes += [('zstd', storage_codec.CODEC_ZSTD, False), ('zstd + 训练字典', storage_codec.CODEC_ZSTD, True)]
+    else:
+        print('未安装 zstandard，跳过 zstd')
+
+    rng = random.Random(7)
+    sample_ids = [rng.randint(1, args.rows) for _ in range(args.repeat)]
+
+    rows = []
+    baseline = None
+    for label, codec, train in modes:
+        db_path = f'{base_path}.{len(rows)}'
+        shutil.copyfile(base_path, db_path)
+        conn = sqlite3.connect(db_path)
+        storage_codec.recompress(conn, codec, train=train)
+        conn.execute('VACUUM')
+        data_bytes, report_bytes = column_bytes(conn, 'data'), column_bytes(conn, 'report_data')
+        conn.close()
+        file_bytes = os.path.getsize(db_path)
+
+        # 读取路径：新的进程内缓存，先预热一次（读取字典）
+        storage_codec._dictionaries.clear()
+        conn = sqlite3.connect(db_path)
+        ids = iter(sample_ids * 2)
+
+        def read_once():
+            value = conn.execute('SELECT data FROM questionnaires WHERE id = ?', (next(ids),)).fetchone()[0]
+            return load_document(value, conn)
+
+        read_once()
+        read_stats = summarize(timed(read_once, args.repeat - 1)[0])
+        conn.close()
+
+        app_module, _ = setup_app(db_path)
+        client = login(app_module.app.test_client())
+        api_ids = iter(sample_ids * 2)
+
+        def get_once():
+            response = client.get(f'/api/questionnaires/{next(api_ids)}')
+            assert response.status_code == 200, response.get_data(as_text=True)
+
+        with redirect_stdout(io.StringIO()):
+            get_once()
+            api_stats = summarize(timed(get_once, args.repeat - 1)[0])
+
+        baseline = baseline or file_bytes
+        rows.append([label, f'{file_bytes / 1024:.0f} KB', f'{baseline / file_bytes:.2f}x',
+                     f'{data_bytes / 1024:.0f} KB', f'{report_bytes / 1024:.0f} KB',
+                     read_stats['p50'], read_stats['p95'], api_stats['p50'], api_stats['p95']])
+        os.remove(db_path)
+
+    print(f"问卷数量: {args.rows}，每种读取方式执行 {args.repeat} 次")
+    print_table(['存储格式', '数据库文件', '压缩比', 'data 列', 'report_data 列',
+                 '读取还原 p50(ms)', 'p95(ms)', 'GET p50(ms)', 'p95(ms)'], rows)
+
+
+if __name__ == '__main__':
+    main()
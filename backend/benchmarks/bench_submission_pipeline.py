@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+问卷提交处理流程基准测试
+对比原来的三步流程（normalize_questionnaire_data → validate_questionnaire_with_schema →
+process_complete_questionnaire）与单遍流程 prepare_questionnaire 处理一份问卷的耗时，
+并检查两者的处理结果完全一致
+
+用法:
+    python backend/benchmarks/bench_submission_pipeline.py --questions 50 200 --repeat 200
+"""
+
+import io
+import json
+import copy
+import argparse
+from contextlib import redirect_stdout
+
+from common import load_sample, timed, summarize, print_table
+
+from validation import normalize_questionnaire_data, validate_questionnaire_with_schema, prepare_questionnaire
+from question_types import process_complete_questionnaire
+
+
+def make_form(count):
+    """生成包含 count 道题的标准问卷（选择题、填空题、评分题轮流出现）"""
+    questions = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            questions.append({
+                'id': f'q{i}', 'type': 'multiple_choice', 'question': f'第{i + 1}题',
+                'options': [{'value': value, 'text': f'选项{value}'} for value in range(4)],
+                'selected': [i % 4]
+            })
+        elif kind == 1:
+            questions.append({'id': f'q{i}', 'type': 'text_input', 'question': f'第{i + 1}题', 'answer': f'回答{i + 1}'})
+        else:
+            questions.append({
+                'id': f'q{i}', 'type': 'rating_scale', 'question': f'第{i + 1}题',
+                'rating': i % 5 + 1, 'min_rating': 1, 'max_rating': 5
+            })
+    return {
+        'type': 'custom_form',
+        'basic_info': {'name': '测试儿童', 'grade': '三年级', 'submission_date': '2024-03-01'},
+        'questions': questions,
+        'statistics': {'submission_time': '2024-03-01T10:00:00'}
+    }
+
+
+def run_stepwise(data):
+    normalized_data = normalize_questionnaire_data(data)
+    is_valid, errors, validated_data = validate_questionnaire_with_schema(normalized_data)
+    assert is_valid, errors
+    return process_complete_questionnaire(validated_data)
+
+
+def run_single_pass(data):
+    is_valid, errors, processed_data = prepare_questionnaire(data)
+    assert is_valid, errors
+    return processed_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='问卷提交处理流程基准测试')
+    parser.add_argument('--questions', type=int, nargs='+', default=[50, 200], help='合成问卷的题目数量')
+    parser.add_argument('--repeat', type=int, default=200, help='每种组合的执行次数')
+    args = parser.parse_args()
+
+    cases = [('Frankfurt 示例', load_sample())] + [(f'合成问卷 {n} 题', make_form(n)) for n in args.questions]
+
+    rows = []
+    for label, form in cases:
+        results = {}
+        baseline = None
+        for name, func in (('三步流程', run_stepwise), ('单遍流程', run_single_pass)):
+            # 每次处理独立的副本（标准化会修改部分输入字段）；原验证流程会输出调试信息，计时时屏蔽
+            copies = iter([copy.deepcopy(form) for _ in range(args.repeat + 1)])
+            with redirect_stdout(io.StringIO()):
+                func(next(copies))  # 预热
+                durations, result = timed(lambda: func(next(copies)), args.repeat)
+            results[name] = json.dumps(result, default=str, ensure_ascii=False)
+            stats = summarize(durations)
+            baseline = baseline or stats['mean']
+            rows.append([label, name, stats['mean'], stats['p50'], stats['p95'], f"{baseline / stats['mean']:.2f}x"])
+
+        if len(set(results.values())) != 1:
+            raise AssertionError(f'{label}: 两种流程的处理结果不一致')
+
+    print_table(['问卷', '流程', '平均(ms)', 'p50(ms)', 'p95(ms)', '相对三步流程'], rows)
+    print('\n两种流程的处理结果一致')
+
+
+if __name__ == '__main__':
+    main()
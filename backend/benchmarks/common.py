@@ -0,0 +1,93 @@
+"""
+性能基准测试公共工具
+在临时数据库上启动应用（Flask test client），不影响正式数据
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import statistics
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.dirname(BACKEND_DIR)
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+SAMPLE_FILE = os.path.join(PROJECT_DIR, 'frankfurt_scale_sample.json')
+
+
+def load_sample():
+    """读取示例问卷（Frankfurt 量表）"""
+    with open(SAMPLE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def setup_app(db_path=None):
+    """使用临时数据库初始化应用，返回 (app模块, 数据库路径)"""
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(suffix='.db', prefix='bench_')
+        os.close(fd)
+        os.remove(db_path)
+
+    import app as app_module
+
+    app_module.DATABASE = db_path
+    app_module.app.config['DATABASE_PATH'] = db_path
+    app_module.app.config['OPERATION_LOG_ASYNC'] = False
+    app_module._db_pool = None
+    app_module._log_writer = None
+    app_module.init_db()
+    return app_module, db_path
+
+
+def login(client, username='admin', password='admin123'):
+    """登录默认管理员账号"""
+    response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    if response.status_code != 200:
+        raise RuntimeError(f'登录失败: {response.get_data(as_text=True)}')
+    return client
+
+
+def percentile(values, pct):
+    """计算百分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(int(round(pct / 100.0 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def timed(func, repeat):
+    """重复执行 func，返回每次耗时（毫秒）列表和最后一次的返回值"""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations, result
+
+
+def summarize(durations):
+    """耗时统计摘要（毫秒）"""
+    return {
+        'mean': round(statistics.mean(durations), 2) if durations else 0.0,
+        'p50': round(percentile(durations, 50), 2),
+        'p95': round(percentile(durations, 95), 2),
+        'max': round(max(durations), 2) if durations else 0.0
+    }
+
+
+def print_table(headers, rows):
+    """打印对齐的结果表格"""
+    widths = [len(str(h)) for h in headers]
+    for row in rows:
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], len(str(cell)))
+    line = '  '.join(str(h).ljust(widths[i]) for i, h in enumerate(headers))
+    print(line)
+    print('-' * len(line))
+    for row in rows:
+        print('  '.join(str(cell).ljust(widths[i]) for i, cell in enumerate(row)))
@@ -0,0 +1,150 @@
+"""
+批量提交问卷模块
+每份问卷执行与单条提交相同的标准化、校验和处理流程（问卷较多时可在进程池中并行），
+校验通过的问卷在一个事务中用 executemany 写入问卷表、问卷定义表和全文检索表
+"""
+
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from marshmallow import ValidationError
+
+from validation import prepare_questionnaire
+from questionnaire_fields import HOT_FIELDS, extract_hot_fields
+from questionnaire_store import compact_document, store_definition
+from json_codec import dumps as json_dumps, loads as json_loads
+from storage_codec import encode as encode_column
+from search_index import build_document, index_new_questionnaires
+
+
+# 默认参数（可在 config.py / config_production.py 中覆盖）
+DEFAULT_MAX_ITEMS = 500       # 单次请求最多提交的问卷数
+DEFAULT_PARALLEL_MIN = 20     # 问卷数达到该值时才使用进程池
+
+INSERT_COLUMNS = ['id', 'type', 'created_at', 'updated_at', 'data'] + list(HOT_FIELDS)
+
+
+def prepare_submission(data):
+    """处理一份问卷：标准化、校验、问题类型处理（单遍完成）→ 提取热点字段
+
+    返回 (错误列表, 待写入的记录)，只依赖纯数据，可以在子进程中执行
+    """
+    if not isinstance(data, dict) or not data:
+        return ['问卷数据必须是非空的 JSON 对象'], None
+
+    try:
+        is_valid, validation_errors, final_data = prepare_questionnaire(data)
+        if not is_valid:
+            return validation_errors, None
+
+        questionnaire_type = final_data.get('type', 'unknown')
+        fields = extract_hot_fields(final_data)
+    except ValidationError as e:
+        return e.messages if isinstance(e.messages, list) else [e.messages], None
+    except Exception as e:
+        return [f'问卷处理失败: {str(e)}'], None
+
+    # 紧凑格式的问卷文档，引用的问卷定义在写入时保存
+    document, definition = compact_document(final_data)
+    return [], {
+        'type': questionnaire_type,
+        'name': fields['name'],
+        'values': [json_dumps(document)] + [fields[f] for f in HOT_FIELDS],
+        'definition': definition,
+        'document': build_document(fields, final_data, questionnaire_type)
+    }
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(max_workers):
+    """当前进程的校验进程池（按需创建；fork 之后在子进程中重新创建）"""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            # 使用 spawn 启动子进程，避免在带有后台线程的工作进程中 fork
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def prepare_submissions(items, workers=0, parallel_min=DEFAULT_PARALLEL_MIN):
+    """逐份处理问卷，返回与 items 顺序一致的 [(错误列表, 记录)]"""
+    if workers > 1 and len(items) >= parallel_min:
+        chunksize = max(1, len(items) // (workers * 4))
+        return list(get_executor(workers).map(prepare_submission, items, chunksize=chunksize))
+    return [prepare_submission(item) for item in items]
+
+
+def insert_submissions(conn, records, created_at):
+    """在一个事务中写入全部记录，返回分配的问卷 ID 列表
+
+    executemany 不返回每行的 ID，因此在持有写锁后按当前最大 ID 预先分配连续的 ID
+    """
+    if not records:
+        return []
+
+    cursor = conn.cursor()
+    try:
+        if not conn.in_transaction:
+            cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute('''
+            SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'questionnaires'), 0),
+                       COALESCE((SELECT MAX(id) FROM questionnaires), 0))
+        ''')
+        first_id = cursor.fetchone()[0] + 1
+        ids = list(range(first_id, first_id + len(records)))
+
+        stored = set()
+        for record in records:
+            definition = record.get('definition')
+            if definition is not None and definition['content_hash'] not in stored:
+                store_definition(cursor, definition)
+                stored.add(definition['content_hash'])
+
+        cursor.executemany(
+            f"INSERT INTO questionnaires ({', '.join(INSERT_COLUMNS)}) VALUES ({', '.join(['?'] * len(INSERT_COLUMNS))})",
+            [
+                # 校验可能在子进程中完成，data 列的压缩（需要读取压缩字典）在写入时进行
+                [questionnaire_id, record['type'], created_at, created_at,
+                 encode_column(record['values'][0], 'data', record['type'], cursor)] + record['values'][1:]
+                for questionnaire_id, record in zip(ids, records)
+            ]
+        )
+        index_new_questionnaires(cursor, [(questionnaire_id, record['document'])
+                                          for questionnaire_id, record in zip(ids, records)])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return ids
+
+
+def parse_ndjson(text):
+    """解析 NDJSON 请求体，返回 (问卷列表, {行序号: 错误})；空行忽略，无法解析的行作为该条的错误"""
+    items = []
+    errors = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(json_loads(line))
+        except ValueError as e:
+            errors[len(items)] = f'JSON 格式错误: {str(e)}'
+            items.append(None)
+    return items, errors
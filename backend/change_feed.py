@@ -0,0 +1,136 @@
+"""
+问卷变更序列模块
+数据库触发器在问卷插入、修改、（软）删除时写入单调递增的变更序号，
+增量同步接口按序号返回上次同步之后发生变化的问卷，开销与变更数量成正比
+"""
+
+from questionnaire_fields import HOT_FIELDS
+
+
+CHANGES_TABLE = 'questionnaire_changes'
+
+OP_INSERT = 'insert'
+OP_UPDATE = 'update'
+OP_DELETE = 'delete'
+
+
+def _record_change(row, operation):
+    """每份问卷只保留最近一次变更：INSERT OR REPLACE 删除旧记录并分配新的序号"""
+    return f"""
+            INSERT OR REPLACE INTO {CHANGES_TABLE} (questionnaire_id, operation, changed_at)
+            VALUES ({row}.id, {operation}, CURRENT_TIMESTAMP);"""
+
+
+# 增量同步返回的问卷内容所在的列；只修改其他列（如生成报告时写入 report_data）不算变更
+TRACKED_COLUMNS = ('type', 'data', 'created_at', 'updated_at', 'deleted_at') + HOT_FIELDS
+
+# 软删除（设置 deleted_at）视为删除，恢复视为修改
+TRIGGERS = {
+    'trg_changes_questionnaires_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_changes_questionnaires_insert
+        AFTER INSERT ON questionnaires
+        BEGIN{_record_change('NEW', f"CASE WHEN NEW.deleted_at IS NULL THEN '{OP_INSERT}' ELSE '{OP_DELETE}' END")}
+        END""",
+    'trg_changes_questionnaires_update': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_changes_questionnaires_update
+        AFTER UPDATE OF {', '.join(TRACKED_COLUMNS)} ON questionnaires
+        BEGIN{_record_change('NEW', f"CASE WHEN NEW.deleted_at IS NULL THEN '{OP_UPDATE}' ELSE '{OP_DELETE}' END")}
+        END""",
+    'trg_changes_questionnaires_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_changes_questionnaires_delete
+        AFTER DELETE ON questionnaires
+        BEGIN{_record_change('OLD', f"'{OP_DELETE}'")}
+        END""",
+}
+
+
+def create_change_feed_schema(cursor):
+    """创建变更序列表和维护触发器（已存在时跳过）
+
+    AUTOINCREMENT 保证序号只增不减、不会复用；SQLite 同一时间只有一个写事务，
+    序号在持有写锁时分配，因此提交顺序与序号顺序一致，按序号读取不会漏掉变更
+    """
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {CHANGES_TABLE} (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            questionnaire_id INTEGER NOT NULL UNIQUE,
+            operation TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    for name, sql in TRIGGERS.items():
+        _drop_outdated_trigger(cursor, name, sql)
+        cursor.execute(sql)
+
+
+def _drop_outdated_trigger(cursor, name, sql):
+    """已有数据库中的触发器定义与当前不同时先删除，随后按当前定义重新创建"""
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,))
+    row = cursor.fetchone()
+    if row is not None and row[0] != sql.strip().replace(' IF NOT EXISTS', '', 1):
+        cursor.execute(f"DROP TRIGGER {name}")
+
+
+def seed_changes(conn):
+    """为已有问卷生成变更记录（首次建表时调用），从序号 0 开始同步即可得到全部数据"""
+    cursor = conn.cursor()
+    create_change_feed_schema(cursor)
+    cursor.execute(f'''
+        INSERT OR IGNORE INTO {CHANGES_TABLE} (questionnaire_id, operation, changed_at)
+        SELECT id,
+               CASE WHEN deleted_at IS NULL THEN '{OP_INSERT}' ELSE '{OP_DELETE}' END,
+               COALESCE(updated_at, created_at, CURRENT_TIMESTAMP)
+        FROM questionnaires
+        ORDER BY id
+    ''')
+    conn.commit()
+    return cursor.rowcount
+
+
+def current_sequence(cursor):
+    """当前最大的变更序号（没有变更时为 0）"""
+    cursor.execute(f"SELECT COALESCE(MAX(seq), 0) FROM {CHANGES_TABLE}")
+    return cursor.fetchone()[0]
+
+
+def sequence_window(cursor, since, limit=None):
+    """确定本次同步的序号范围 (since, until]，返回 (until, 是否还有更多变更)"""
+    if limit:
+        cursor.execute(
+            f"SELECT seq FROM {CHANGES_TABLE} WHERE seq > ? ORDER BY seq LIMIT 1 OFFSET ?",
+            (since, limit - 1)
+        )
+        row = cursor.fetchone()
+        if row is not None:
+            cursor.execute(f"SELECT EXISTS(SELECT 1 FROM {CHANGES_TABLE} WHERE seq > ?)", (row[0],))
+            return row[0], bool(cursor.fetchone()[0])
+    return max(current_sequence(cursor), since), False
+
+
+def changes_query(since, until):
+    """按序号读取变更及问卷当前数据的查询（已删除的问卷只返回 ID）"""
+    return f'''
+        SELECT c.seq AS change_seq, c.questionnaire_id AS change_id,
+               c.operation AS change_operation, c.changed_at AS change_at, q.*
+        FROM {CHANGES_TABLE} c
+        LEFT JOIN questionnaires q ON q.id = c.questionnaire_id AND c.operation != '{OP_DELETE}'
+        WHERE c.seq > ? AND c.seq <= ?
+        ORDER BY c.seq
+    ''', [since, until]
+
+
+UPDATE_TRIGGER = 'trg_changes_questionnaires_update'
+
+
+def suspend_update_trigger(cursor):
+    """暂时移除 UPDATE 触发器（只改写存储格式、内容不变时使用），返回触发器原来是否存在"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (UPDATE_TRIGGER,))
+    existed = cursor.fetchone() is not None
+    cursor.execute(f"DROP TRIGGER IF EXISTS {UPDATE_TRIGGER}")
+    return existed
+
+
+def restore_update_trigger(cursor, existed):
+    """恢复 suspend_update_trigger 移除的触发器"""
+    if existed:
+        cursor.execute(TRIGGERS[UPDATE_TRIGGER])
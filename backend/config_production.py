@@ -20,6 +20,52 @@ class ProductionConfig:
     # 数据库配置
     DATABASE_PATH = os.environ.get('DATABASE_PATH', os.path.join(os.path.dirname(__file__), 'questionnaires.db'))
     
+    # 数据库连接池配置（每个工作进程）
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '8'))
+    DB_JOURNAL_MODE = os.environ.get('DB_JOURNAL_MODE', 'WAL')
+    DB_SYNCHRONOUS = os.environ.get('DB_SYNCHRONOUS', 'NORMAL')
+    DB_BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS', '10000'))
+    DB_MMAP_SIZE = int(os.environ.get('DB_MMAP_SIZE', str(256 * 1024 * 1024)))  # 256MB
+    DB_CACHE_SIZE = int(os.environ.get('DB_CACHE_SIZE', '-64000'))  # 负数表示 KiB，约 64MB
+    
+    # 操作日志异步写入配置
+    OPERATION_LOG_ASYNC = os.environ.get('OPERATION_LOG_ASYNC', 'true').lower() == 'true'
+    OPERATION_LOG_QUEUE_SIZE = int(os.environ.get('OPERATION_LOG_QUEUE_SIZE', '20000'))
+    OPERATION_LOG_BATCH_SIZE = int(os.environ.get('OPERATION_LOG_BATCH_SIZE', '200'))
+    OPERATION_LOG_FLUSH_INTERVAL = float(os.environ.get('OPERATION_LOG_FLUSH_INTERVAL', '1.0'))  # 秒
+    OPERATION_LOG_PUT_TIMEOUT = float(os.environ.get('OPERATION_LOG_PUT_TIMEOUT', '0'))  # 队列满时等待秒数，0 表示直接降级到文件
+    
+    # 系统资源后台采样配置
+    SYSTEM_SAMPLE_INTERVAL = float(os.environ.get('SYSTEM_SAMPLE_INTERVAL', '5'))  # 秒
+    SYSTEM_SAMPLE_HISTORY = int(os.environ.get('SYSTEM_SAMPLE_HISTORY', '120'))  # 保留的采样条数
+    
+    # 流式导出时每次从数据库读取的行数
+    EXPORT_STREAM_CHUNK_SIZE = int(os.environ.get('EXPORT_STREAM_CHUNK_SIZE', '500'))
+    
+    # 后台导出任务配置
+    EXPORT_JOB_DIR = os.environ.get('EXPORT_JOB_DIR', '/app/exports')
+    EXPORT_JOB_WORKERS = int(os.environ.get('EXPORT_JOB_WORKERS', '2'))
+    EXPORT_JOB_TTL = int(os.environ.get('EXPORT_JOB_TTL', str(24 * 3600)))  # 导出结果保留秒数
+    EXPORT_JOB_STALE_AFTER = int(os.environ.get('EXPORT_JOB_STALE_AFTER', '120'))  # 超过该秒数没有心跳的任务重新执行
+    EXPORT_PDF_WORKERS = int(os.environ.get('EXPORT_PDF_WORKERS', '1'))  # PDF按问卷类型并行生成的进程数（需要 pypdf）
+    IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', str(24 * 3600)))  # Idempotency-Key 保留秒数
+    SUBMIT_DEDUP_WINDOW = int(os.environ.get('SUBMIT_DEDUP_WINDOW', '10'))  # 相同内容在该秒数内重复提交时返回原问卷，0 表示关闭
+    BULK_SUBMIT_MAX_ITEMS = int(os.environ.get('BULK_SUBMIT_MAX_ITEMS', '500'))  # 批量提交单次最多问卷数
+    BULK_SUBMIT_WORKERS = int(os.environ.get('BULK_SUBMIT_WORKERS', '0'))  # 批量提交校验进程数，0 表示在请求线程中校验
+    BULK_SUBMIT_PARALLEL_MIN = int(os.environ.get('BULK_SUBMIT_PARALLEL_MIN', '20'))  # 问卷数达到该值时才使用进程池
+    STORAGE_CODEC = os.environ.get('STORAGE_CODEC', 'none')  # data / report_data 列的压缩算法：none、zlib、zstd（需要 zstandard）
+    STORAGE_CODEC_LEVEL = int(os.environ.get('STORAGE_CODEC_LEVEL', '0'))  # 压缩级别，0 表示使用算法默认值
+    STORAGE_CODEC_MIN_BYTES = int(os.environ.get('STORAGE_CODEC_MIN_BYTES', '256'))  # 短于该字节数的值不压缩
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')  # JSON 序列化实现：auto（安装了 orjson 时使用）、orjson、stdlib
+    
+    # 分页配置：count=estimate 时总数缓存的有效期（秒）
+    PAGINATION_COUNT_CACHE_TTL = int(os.environ.get('PAGINATION_COUNT_CACHE_TTL', '30'))
+    
+    # 用户身份缓存配置（会话校验时按用户 ID 缓存用户名和角色）
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', '30'))  # 秒，0 表示不缓存
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '1024'))
+    USER_CACHE_CHECK_INTERVAL = float(os.environ.get('USER_CACHE_CHECK_INTERVAL', '2'))  # 检查用户变更代次的间隔（秒）
+    
     # 会话配置
     SESSION_PERMANENT = False
     SESSION_TYPE = 'filesystem'
@@ -97,6 +143,10 @@ class ProductionConfig:
         if ProductionConfig.BACKUP_ENABLED and not os.path.exists(ProductionConfig.BACKUP_PATH):
             os.makedirs(ProductionConfig.BACKUP_PATH, exist_ok=True)
         
+        # 验证导出任务目录
+        if not os.path.exists(ProductionConfig.EXPORT_JOB_DIR):
+            os.makedirs(ProductionConfig.EXPORT_JOB_DIR, exist_ok=True)
+        
         return True
 
 # 更新主配置文件的配置字典
@@ -0,0 +1,159 @@
+"""
+SQLite 连接池模块
+为每个工作进程维护一组预先调优的数据库连接，避免每次查询都重新建立连接
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+# 默认的连接参数（可在 config.py / config_production.py 中覆盖）
+DEFAULT_POOL_SIZE = 5
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,          # 毫秒
+    'mmap_size': 64 * 1024 * 1024,  # 64MB
+    'cache_size': -16000            # 负数表示 KiB，约 16MB
+}
+
+
+def build_pragmas(config):
+    """根据应用配置生成连接 PRAGMA 设置"""
+    return {
+        'journal_mode': config.get('DB_JOURNAL_MODE', DEFAULT_PRAGMAS['journal_mode']),
+        'synchronous': config.get('DB_SYNCHRONOUS', DEFAULT_PRAGMAS['synchronous']),
+        'busy_timeout': int(config.get('DB_BUSY_TIMEOUT_MS', DEFAULT_PRAGMAS['busy_timeout'])),
+        'mmap_size': int(config.get('DB_MMAP_SIZE', DEFAULT_PRAGMAS['mmap_size'])),
+        'cache_size': int(config.get('DB_CACHE_SIZE', DEFAULT_PRAGMAS['cache_size']))
+    }
+
+
+class ConnectionPool:
+    """SQLite 连接池
+
+    - 连接在创建时统一配置 row_factory 和 PRAGMA，之后重复使用
+    - 归还时回滚未提交的事务，保证下一个使用者拿到干净的连接
+    - 检测到进程 fork（gunicorn preload_app）后丢弃父进程遗留的连接
+    """
+
+    def __init__(self, database, max_size=DEFAULT_POOL_SIZE, pragmas=None):
+        self.database = database
+        self.max_size = max(int(max_size), 1)
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        if pragmas:
+            self.pragmas.update(pragmas)
+
+        self._lock = threading.Lock()
+        self._idle = []
+        self._pid = os.getpid()
+
+        # 命中/未命中计数
+        self.hits = 0
+        self.misses = 0
+        self.released = 0
+        self.discarded = 0
+
+    def _check_pid(self):
+        """fork 之后不能复用父进程的连接"""
+        if self._pid != os.getpid():
+            self._idle = []
+            self._pid = os.getpid()
+            self.hits = self.misses = self.released = self.discarded = 0
+
+    def connect(self):
+        """创建一个新的已调优连接（不经过连接池）"""
+        timeout = self.pragmas.get('busy_timeout', 5000) / 1000.0
+        conn = sqlite3.connect(self.database, timeout=timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+
+        cursor = conn.cursor()
+        for name, value in self.pragmas.items():
+            if value is None:
+                continue
+            try:
+                cursor.execute(f"PRAGMA {name} = {value}")
+                # journal_mode 等 PRAGMA 会返回结果行，需要读取掉
+                cursor.fetchall()
+            except sqlite3.DatabaseError as e:
+                print(f"设置数据库参数 {name} 失败: {e}")
+        cursor.close()
+        return conn
+
+    def acquire(self):
+        """从连接池获取连接"""
+        with self._lock:
+            self._check_pid()
+            if self._idle:
+                self.hits += 1
+                return self._idle.pop()
+            self.misses += 1
+
+        return self.connect()
+
+    def release(self, conn):
+        """将连接归还到连接池"""
+        if conn is None:
+            return
+
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # 连接已损坏，直接丢弃
+            self._close_quietly(conn)
+            with self._lock:
+                self.discarded += 1
+            return
+
+        with self._lock:
+            self._check_pid()
+            if len(self._idle) < self.max_size:
+                self._idle.append(conn)
+                self.released += 1
+                return
+            self.discarded += 1
+
+        self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """在请求上下文之外使用的连接上下文管理器"""
+        conn = self.acquire()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """关闭所有空闲连接"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """返回连接池统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'pid': self._pid,
+                'max_size': self.max_size,
+                'idle': len(self._idle),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total * 100, 2) if total else 0,
+                'released': self.released,
+                'discarded': self.discarded,
+                'pragmas': dict(self.pragmas)
+            }
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,370 @@
+"""
+后台导出任务模块
+大批量导出在后台线程池中执行，结果写入导出缓存目录，任务状态保存在 SQLite 的 export_jobs 表中，
+工作进程重启后未完成的任务会被重新执行，过期（TTL）的任务及文件会被自动清理
+"""
+
+import os
+import json
+import uuid
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+
+JOBS_TABLE = 'export_jobs'
+
+# 任务状态
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+STATUS_EXPIRED = 'expired'
+ACTIVE_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
+# 默认参数（可在 config.py / config_production.py 中覆盖）
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_TTL = 24 * 3600            # 任务及结果文件保留时间（秒）
+DEFAULT_STALE_AFTER = 120          # 运行中的任务超过该时间没有心跳，视为工作进程已退出（秒）
+DEFAULT_MAINTENANCE_INTERVAL = 30  # 清理过期任务、接管中断任务的间隔（秒）
+PROGRESS_MIN_INTERVAL = 1.0        # 进度写入数据库的最小间隔（秒）
+PROGRESS_EVERY_ROWS = 200          # track_progress 每处理多少行上报一次
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _now(offset_seconds=0):
+    return (datetime.now() + timedelta(seconds=offset_seconds)).strftime(TIMESTAMP_FORMAT)
+
+
+def create_jobs_table(cursor):
+    """创建导出任务表（已存在时跳过）"""
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {JOBS_TABLE} (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            format TEXT NOT NULL,
+            params TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            progress INTEGER NOT NULL DEFAULT 0,
+            total INTEGER,
+            filename TEXT,
+            content_type TEXT,
+            file_path TEXT,
+            file_size INTEGER,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            worker_pid INTEGER,
+            created_by INTEGER,
+            created_at TIMESTAMP NOT NULL,
+            updated_at TIMESTAMP NOT NULL,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            expires_at TIMESTAMP NOT NULL
+        )
+    ''')
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{JOBS_TABLE}_status ON {JOBS_TABLE}(status, updated_at)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{JOBS_TABLE}_expires ON {JOBS_TABLE}(expires_at)")
+
+
+def track_progress(rows, progress, every=PROGRESS_EVERY_ROWS):
+    """包装行迭代器，每处理 every 行调用一次 progress(已处理行数)"""
+    count = 0
+    for row in rows:
+        yield row
+        count += 1
+        if count % every == 0:
+            progress(count)
+    progress(count)
+
+
+class ExportJobManager:
+    """导出任务管理器
+
+    - 每种导出（kind）注册一个执行函数 runner(params, output, progress)，
+      把结果写入已打开的二进制文件 output，返回导出的记录数
+    - 任务先以 pending 状态写入数据库，再由当前进程的线程池认领（UPDATE ... WHERE status='pending'），
+      多个工作进程之间不会重复执行
+    - 运行中的任务定期更新心跳，超过 stale_after 秒没有心跳的任务会被重新排队（最多 max_attempts 次）
+    - 已提交到本进程线程池、尚未开始执行的任务不会被维护线程重复提交
+    - 检测到进程 fork（gunicorn preload_app）后在子进程中重新创建线程池
+    """
+
+    def __init__(self, connection, export_dir, max_workers=DEFAULT_MAX_WORKERS, ttl=DEFAULT_TTL,
+                 stale_after=DEFAULT_STALE_AFTER, maintenance_interval=DEFAULT_MAINTENANCE_INTERVAL,
+                 max_attempts=3):
+        self._connection = connection
+        self.export_dir = export_dir
+        self.max_workers = max(int(max_workers), 1)
+        self.ttl = max(int(ttl), 1)
+        self.stale_after = max(int(stale_after), 1)
+        self.maintenance_interval = max(float(maintenance_interval), 0.1)
+        self.max_attempts = max(int(max_attempts), 1)
+
+        self._runners = {}
+        self._active = set()  # 当前进程正在执行的任务
+        self._queued = set()  # 已提交到当前进程线程池、尚未开始执行的任务
+        self._lock = threading.Lock()
+        self._executor = None
+        self._maintenance_thread = None
+        self._stopping = threading.Event()
+        self._pid = os.getpid()
+
+        # 统计信息
+        self.completed = 0
+        self.failed = 0
+        self.recovered = 0
+        self.expired = 0
+
+    def register(self, kind, runner):
+        self._runners[kind] = runner
+
+    # ---------- 线程池 ----------
+
+    def start(self):
+        """按需启动线程池和维护线程（fork 之后父进程的线程不会被继承）"""
+        if self._executor is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._executor = None
+                self._maintenance_thread = None
+                self._active = set()
+                self._queued = set()
+                self._stopping = threading.Event()
+                self._pid = os.getpid()
+                self.completed = self.failed = self.recovered = self.expired = 0
+
+            if self._executor is None:
+                os.makedirs(self.export_dir, exist_ok=True)
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='export-job')
+                self._maintenance_thread = threading.Thread(
+                    target=self._maintenance_loop, name='export-job-maintenance', daemon=True
+                )
+                self._maintenance_thread.start()
+
+    def stop(self, wait=False):
+        self._stopping.set()
+        executor = self._executor
+        if executor is not None and self._pid == os.getpid():
+            executor.shutdown(wait=wait, cancel_futures=True)
+        self._executor = None
+        with self._lock:
+            self._queued.clear()
+
+    def _maintenance_loop(self):
+        stopping = self._stopping
+        # 启动后立即执行一次：接管上次退出时未完成的任务
+        wait = 0
+        while not stopping.wait(wait):
+            try:
+                self.maintain()
+            except Exception as e:
+                print(f"导出任务维护失败: {e}")
+            wait = self.maintenance_interval
+
+    def maintain(self):
+        """清理过期任务，重新排队中断的任务，并执行等待中的任务（已在本进程排队的任务不重复提交）"""
+        self.heartbeat()
+        self.expire_jobs()
+        self.requeue_stale_jobs()
+        with self._connection() as conn:
+            pending = [row[0] for row in conn.execute(
+                f"SELECT id FROM {JOBS_TABLE} WHERE status = ? ORDER BY created_at", (STATUS_PENDING,)
+            ).fetchall()]
+        for job_id in pending:
+            self._dispatch(job_id)
+
+    def _dispatch(self, job_id):
+        """提交任务到线程池，已在排队的任务跳过；返回是否提交"""
+        executor = self._executor
+        if executor is None:
+            return False
+        with self._lock:
+            if job_id in self._queued:
+                return False
+            self._queued.add(job_id)
+        try:
+            executor.submit(self._run, job_id)
+        except RuntimeError:
+            # 线程池已关闭
+            with self._lock:
+                self._queued.discard(job_id)
+            return False
+        return True
+
+    # ---------- 任务状态 ----------
+
+    def create(self, kind, export_format, params, filename, content_type, created_by=None):
+        """创建任务并提交到线程池，返回任务信息"""
+        if kind not in self._runners:
+            raise ValueError(f'不支持的导出任务类型: {kind}')
+        self.start()
+
+        job_id = uuid.uuid4().hex
+        now = _now()
+        with self._connection() as conn:
+            conn.execute(
+                f"""INSERT INTO {JOBS_TABLE}
+                    (id, kind, format, params, status, filename, content_type, created_by,
+                     created_at, updated_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (job_id, kind, export_format, json.dumps(params, ensure_ascii=False, default=str),
+                 STATUS_PENDING, filename, content_type, created_by, now, now, _now(self.ttl))
+            )
+        self._dispatch(job_id)
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """读取任务信息，不存在时返回 None"""
+        with self._connection() as conn:
+            row = conn.execute(f"SELECT * FROM {JOBS_TABLE} WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def _update(self, job_id, **fields):
+        fields.setdefault('updated_at', _now())
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._connection() as conn:
+            conn.execute(f"UPDATE {JOBS_TABLE} SET {assignments} WHERE id = ?", list(fields.values()) + [job_id])
+
+    def _claim(self, job_id):
+        """认领等待中的任务，成功时返回任务信息"""
+        now = _now()
+        with self._connection() as conn:
+            cursor = conn.execute(
+                f"""UPDATE {JOBS_TABLE}
+                    SET status = ?, worker_pid = ?, attempts = attempts + 1,
+                        started_at = ?, updated_at = ?, progress = 0, error = NULL
+                    WHERE id = ? AND status = ?""",
+                (STATUS_RUNNING, os.getpid(), now, now, job_id, STATUS_PENDING)
+            )
+            claimed = cursor.rowcount == 1
+        return self.get(job_id) if claimed else None
+
+    def _run(self, job_id):
+        with self._lock:
+            self._queued.discard(job_id)
+        job = self._claim(job_id)
+        if job is None:
+            return
+
+        final_path = os.path.join(self.export_dir, f"{job_id}.{job['format']}")
+        partial_path = final_path + '.part'
+        last_report = [0.0]
+
+        def progress(done, total=None):
+            now = time.monotonic()
+            if total is not None:
+                self._update(job_id, progress=done, total=total)
+                last_report[0] = now
+            elif now - last_report[0] >= PROGRESS_MIN_INTERVAL:
+                self._update(job_id, progress=done)
+                last_report[0] = now
+
+        self._active.add(job_id)
+        try:
+            runner = self._runners[job['kind']]
+            with open(partial_path, 'wb') as output:
+                rows = runner(json.loads(job['params']), output, progress)
+            os.replace(partial_path, final_path)
+            finished = _now()
+            self._update(
+                job_id, status=STATUS_COMPLETED, progress=rows, total=rows,
+                file_path=final_path, file_size=os.path.getsize(final_path),
+                finished_at=finished, expires_at=_now(self.ttl)
+            )
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"导出任务 {job_id} 失败: {e}")
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            self._update(job_id, status=STATUS_FAILED, error=str(e), finished_at=_now())
+        finally:
+            self._active.discard(job_id)
+
+    def heartbeat(self):
+        """更新当前进程正在执行的任务的心跳，避免耗时较长的步骤被误判为中断"""
+        active = list(self._active)
+        if not active:
+            return
+        placeholders = ','.join(['?'] * len(active))
+        with self._connection() as conn:
+            conn.execute(
+                f"UPDATE {JOBS_TABLE} SET updated_at = ? WHERE status = ? AND id IN ({placeholders})",
+                [_now(), STATUS_RUNNING] + active
+            )
+
+    def requeue_stale_jobs(self):
+        """把长时间没有心跳的运行中任务（工作进程已退出）重新排队"""
+        cutoff = _now(-self.stale_after)
+        with self._connection() as conn:
+            requeued = conn.execute(
+                f"""UPDATE {JOBS_TABLE} SET status = ?, updated_at = ?
+                    WHERE status = ? AND updated_at < ? AND attempts < ?""",
+                (STATUS_PENDING, _now(), STATUS_RUNNING, cutoff, self.max_attempts)
+            ).rowcount
+            conn.execute(
+                f"""UPDATE {JOBS_TABLE} SET status = ?, error = ?, updated_at = ?, finished_at = ?
+                    WHERE status = ? AND updated_at < ? AND attempts >= ?""",
+                (STATUS_FAILED, '任务多次中断，已放弃', _now(), _now(),
+                 STATUS_RUNNING, cutoff, self.max_attempts)
+            )
+        self.recovered += requeued
+        return requeued
+
+    def expire_jobs(self):
+        """删除过期任务的结果文件并标记为 expired"""
+        now = _now()
+        with self._connection() as conn:
+            rows = conn.execute(
+                f"SELECT id, file_path FROM {JOBS_TABLE} WHERE expires_at < ? AND status NOT IN (?, ?, ?)",
+                (now, STATUS_EXPIRED, STATUS_PENDING, STATUS_RUNNING)
+            ).fetchall()
+        for job_id, file_path in rows:
+            if file_path and os.path.exists(file_path):
+                try:
+                    os.remove(file_path)
+                except OSError as e:
+                    print(f"删除过期导出文件失败: {file_path}: {e}")
+                    continue
+            self._update(job_id, status=STATUS_EXPIRED, file_path=None)
+        self.expired += len(rows)
+        return len(rows)
+
+    def stats(self):
+        return {
+            'max_workers': self.max_workers,
+            'ttl': self.ttl,
+            'completed': self.completed,
+            'failed': self.failed,
+            'recovered': self.recovered,
+            'expired': self.expired,
+            'active': len(self._active),
+            'queued': len(self._queued),
+            'running': self._executor is not None and self._pid == os.getpid()
+        }
+
+
+def job_to_dict(job):
+    """任务信息的对外表示（不包含服务器文件路径和内部字段）"""
+    return {
+        'id': job['id'],
+        'kind': job['kind'],
+        'format': job['format'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'total': job['total'],
+        'percent': round(job['progress'] * 100.0 / job['total'], 1) if job['total'] else None,
+        'filename': job['filename'],
+        'file_size': job['file_size'],
+        'error': job['error'],
+        'attempts': job['attempts'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+        'expires_at': job['expires_at']
+    }
@@ -20,6 +20,259 @@ from reportlab.lib.units import inch
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 import os
+import sqlite3
+import tempfile
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from openpyxl.cell import Cell, WriteOnlyCell
+from openpyxl.utils import get_column_letter
+
+from questionnaire_store import configure as configure_questionnaire_store, load_document
+
+try:
+    from pypdf import PdfWriter  # 可选依赖：合并并行生成的PDF分节
+except ImportError:
+    PdfWriter = None
+
+try:
+    import pyarrow as pa  # 可选依赖：Parquet / Arrow 列式导出
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pa = None
+
+
+# 同步（非流式）导出的最大记录数，流式导出的格式不受此限制
+MAX_BUFFERED_EXPORT_ROWS = 1000
+STREAMING_FORMATS = ('csv',)
+STREAM_FLUSH_ROWS = 200  # 流式导出时每累计多少行输出一次
+
+# Excel 导出
+SUMMARY_MAX_WIDTH = 50
+DETAIL_MAX_WIDTH = 80
+WIDTH_SAMPLE_ROWS = 500  # 只写模式下根据前多少行确定列宽
+EXCEL_TITLE_FONT = Font(bold=True, size=14)
+EXCEL_BOLD_FONT = Font(bold=True)
+EXCEL_CENTER = Alignment(horizontal="center", vertical="center")
+EXCEL_HEADER_STYLE = {
+    'font': Font(bold=True, color="FFFFFF"),
+    'fill': PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+    'alignment': EXCEL_CENTER
+}
+EXCEL_ROW_STYLE = {'alignment': EXCEL_CENTER}
+EXCEL_EVEN_ROW_STYLE = {
+    'alignment': EXCEL_CENTER,
+    'fill': PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
+}
+
+
+# 列式导出（Parquet / Arrow IPC），每个问题一列，需要 pyarrow
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+COLUMNAR_BASE_COLUMNS = ['id', 'type', 'name', 'grade', 'submission_date', 'created_at']
+ANSWER_FIELDS = ('selected', 'score', 'answer')  # 每个问题的列：选项值/评分、得分、文本答案
+
+
+def columnar_export_available():
+    return pa is not None
+
+
+# PDF 导出
+PDF_ROWS_PER_TABLE = 40  # 详细数据每个表格的行数（约一页）
+
+_pdf_font = None
+_pdf_styles = None
+_pdf_lock = threading.Lock()
+
+
+def get_pdf_font():
+    """注册PDF中文字体并返回字体名称（每个进程只加载一次字体文件）"""
+    global _pdf_font
+    if _pdf_font is None:
+        with _pdf_lock:
+            if _pdf_font is None:
+                try:
+                    # 尝试注册中文字体
+                    font_path = os.path.join(os.path.dirname(__file__), 'fonts', 'SimHei.ttf')
+                    if os.path.exists(font_path):
+                        pdfmetrics.registerFont(TTFont('SimHei', font_path))
+                        _pdf_font = 'SimHei'
+                    else:
+                        # 如果没有中文字体文件，使用默认字体
+                        _pdf_font = 'Helvetica'
+                except Exception as e:
+                    print(f"字体设置失败，使用默认字体: {e}")
+                    _pdf_font = 'Helvetica'
+    return _pdf_font
+
+
+def get_pdf_styles():
+    """PDF段落和表格样式（只创建一次，所有导出共用）"""
+    global _pdf_styles
+    if _pdf_styles is None:
+        font = get_pdf_font()
+        styles = getSampleStyleSheet()
+        _pdf_styles = {
+            'title': ParagraphStyle(
+                'CustomTitle',
+                parent=styles['Heading1'],
+                fontSize=16,
+                spaceAfter=30,
+                alignment=1,  # 居中
+                fontName=font
+            ),
+            'heading': ParagraphStyle(
+                'CustomHeading',
+                parent=styles['Heading2'],
+                fontSize=12,
+                spaceAfter=12,
+                fontName=font
+            ),
+            'normal': ParagraphStyle(
+                'CustomNormal',
+                parent=styles['Normal'],
+                fontSize=10,
+                fontName=font
+            ),
+            'summary_table': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, -1), font),
+                ('FONTSIZE', (0, 0), (-1, 0), 12),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]),
+            'detail_table': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, -1), font),
+                ('FONTSIZE', (0, 0), (-1, 0), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('FONTSIZE', (0, 1), (-1, -1), 8)
+            ])
+        }
+    return _pdf_styles
+
+
+def summarize_questionnaires(questionnaires):
+    """PDF概览统计：(问卷总数, {类型: 数量})"""
+    type_counts = {}
+    for q in questionnaires:
+        type_counts[q['type']] = type_counts.get(q['type'], 0) + 1
+    return len(questionnaires), type_counts
+
+
+def query_rows(database, query, params=(), chunk_size=500):
+    """在独立连接上分批读取查询结果（供子进程生成PDF分节使用）"""
+    configure_questionnaire_store(database)  # 子进程中还原问卷时从同一数据库读取问卷定义
+    conn = sqlite3.connect(database)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.execute(query, list(params))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+
+def _render_pdf_section(path, title, row_factory):
+    """子进程中生成一节PDF"""
+    exporter._build_pdf(path, exporter._pdf_section(title, row_factory()))
+
+
+def _typed_columns(frame):
+    """按列推断类型：数值列转为数值（整数使用可空的 Int64），其余转为字符串，列表保持不变"""
+    typed = {}
+    for column in frame.columns:
+        values = frame[column]
+        present = values.dropna()
+        if present.map(lambda value: isinstance(value, (list, dict))).any():
+            typed[column] = values.map(lambda value: value if isinstance(value, (list, dict)) else None)
+            continue
+        if not present.map(lambda value: isinstance(value, bool)).any():
+            numbers = pd.to_numeric(values, errors='coerce')
+            if numbers.notna().sum() == len(present):
+                integral = len(present) and (numbers.dropna() % 1 == 0).all()
+                typed[column] = numbers.astype('Int64') if integral else numbers.astype('float64')
+                continue
+        typed[column] = values.astype('string')
+    return pd.DataFrame(typed, index=frame.index)
+
+
+class _StoryFeed(list):
+    """按需补充的 story 列表
+    
+    reportlab 的 build() 每排版一个 flowable 前都会检查 len(story)，
+    此时才从生成器取下一个 flowable，内存中只保留当前正在排版的内容
+    """
+    
+    def __init__(self, flowables):
+        super().__init__()
+        self._source = iter(flowables)
+    
+    def __len__(self):
+        if not list.__len__(self) and self._source is not None:
+            flowable = next(self._source, None)
+            if flowable is None:
+                self._source = None
+            else:
+                self.append(flowable)
+        return list.__len__(self)
+
+
+class _WidthTrackingSheet:
+    """写入时同步统计列宽的工作表包装
+    
+    只写模式的列宽必须在第一行写入之前确定，因此先缓存前 sample_rows 行，
+    根据这些行确定列宽后再依次写出，之后的行直接写入（只继续统计，不再修改列宽）
+    """
+    
+    def __init__(self, worksheet, max_width, sample_rows=WIDTH_SAMPLE_ROWS):
+        self.worksheet = worksheet
+        self.max_width = max_width
+        self.sample_rows = sample_rows
+        self.widths = {}
+        self._pending = []
+        self._started = False
+    
+    def append(self, row):
+        for col, value in enumerate(row, 1):
+            if isinstance(value, Cell):
+                value = value.value
+            if value is None:
+                continue
+            length = len(str(value))
+            if length > self.widths.get(col, 0):
+                self.widths[col] = length
+        
+        if self._started:
+            self.worksheet.append(row)
+        else:
+            self._pending.append(row)
+            if len(self._pending) >= self.sample_rows:
+                self._start()
+    
+    def _start(self):
+        for col, length in self.widths.items():
+            self.worksheet.column_dimensions[get_column_letter(col)].width = min(length + 2, self.max_width)
+        self._started = True
+        pending, self._pending = self._pending, []
+        for row in pending:
+            self.worksheet.append(row)
+    
+    def close(self):
+        if not self._started:
+            self._start()
+
 
 class QuestionnaireExporter:
     """问卷数据导出器"""
@@ -28,19 +281,51 @@ class QuestionnaireExporter:
         self.setup_pdf_fonts()
     
     def setup_pdf_fonts(self):
-        """设置PDF中文字体支持"""
+        """设置PDF中文字体支持（字体每个进程只注册一次）"""
+        self.pdf_font = get_pdf_font()
+    
+    def _csv_headers(self, include_details):
+        """CSV表头"""
+        headers = ['ID', '问卷类型', '姓名', '年级', '提交日期', '创建时间']
+        if include_details:
+            headers.extend(['问题总数', '完成率', '总分'])
+        return headers
+    
+    def _csv_row(self, q, include_details):
+        """生成一条问卷的CSV数据行"""
         try:
-            # 尝试注册中文字体
-            font_path = os.path.join(os.path.dirname(__file__), 'fonts', 'SimHei.ttf')
-            if os.path.exists(font_path):
-                pdfmetrics.registerFont(TTFont('SimHei', font_path))
-                self.pdf_font = 'SimHei'
-            else:
-                # 如果没有中文字体文件，使用默认字体
-                self.pdf_font = 'Helvetica'
+            data = load_document(q['data'])
+            
+            row = [
+                q['id'],
+                q['type'],
+                q['name'] or '',
+                q['grade'] or '',
+                q['submission_date'] or '',
+                q['created_at'] or ''
+            ]
+            
+            if include_details:
+                # 计算统计信息
+                questions = data.get('questions', [])
+                stats = data.get('statistics', {})
+                
+                question_count = len(questions)
+                completion_rate = stats.get('completion_rate', 0)
+                total_score = stats.get('total_score', 0)
+                
+                row.extend([question_count, f"{completion_rate}%", total_score])
+            
+            return row
+            
         except Exception as e:
-            print(f"字体设置失败，使用默认字体: {e}")
-            self.pdf_font = 'Helvetica'
+            print(f"处理问卷 {q['id']} 时出错: {e}")
+            # 写入基本信息，即使详细信息处理失败
+            row = [q['id'], q['type'], q['name'] or '', q['grade'] or '', 
+                   q['submission_date'] or '', q['created_at'] or '']
+            if include_details:
+                row.extend(['错误', '错误', '错误'])
+            return row
     
     def export_to_csv(self, questionnaires, include_details=True):
         """导出为CSV格式"""
@@ -53,243 +338,186 @@ class QuestionnaireExporter:
             return output.getvalue()
         
         # 写入表头
-        headers = ['ID', '问卷类型', '姓名', '年级', '提交日期', '创建时间']
-        if include_details:
-            headers.extend(['问题总数', '完成率', '总分'])
-        
-        writer.writerow(headers)
+        writer.writerow(self._csv_headers(include_details))
         
         # 写入数据
         for q in questionnaires:
-            try:
-                data = json.loads(q['data']) if isinstance(q['data'], str) else q['data']
-                
-                row = [
-                    q['id'],
-                    q['type'],
-                    q['name'] or '',
-                    q['grade'] or '',
-                    q['submission_date'] or '',
-                    q['created_at'] or ''
-                ]
-                
-                if include_details:
-                    # 计算统计信息
-                    questions = data.get('questions', [])
-                    stats = data.get('statistics', {})
-                    
-                    question_count = len(questions)
-                    completion_rate = stats.get('completion_rate', 0)
-                    total_score = stats.get('total_score', 0)
-                    
-                    row.extend([question_count, f"{completion_rate}%", total_score])
-                
-                writer.writerow(row)
-                
-            except Exception as e:
-                print(f"处理问卷 {q['id']} 时出错: {e}")
-                # 写入基本信息，即使详细信息处理失败
-                row = [q['id'], q['type'], q['name'] or '', q['grade'] or '', 
-                       q['submission_date'] or '', q['created_at'] or '']
-                if include_details:
-                    row.extend(['错误', '错误', '错误'])
-                writer.writerow(row)
+            writer.writerow(self._csv_row(q, include_details))
         
         output.seek(0)
         return output.getvalue()
     
+    def iter_csv(self, questionnaires, include_details=True, flush_rows=STREAM_FLUSH_ROWS):
+        """流式导出CSV，逐批生成 UTF-8 编码的字节块
+        
+        questionnaires 可以是任意可迭代对象（如分批读取数据库的生成器），
+        内存中只保留最近 flush_rows 行，输出内容与 export_to_csv 相同
+        """
+        output = StringIO()
+        writer = csv.writer(output)
+        rows = iter(questionnaires)
+        
+        first = next(rows, None)
+        if first is None:
+            writer.writerow(['没有数据'])
+            yield output.getvalue().encode('utf-8')
+            return
+        
+        writer.writerow(self._csv_headers(include_details))
+        writer.writerow(self._csv_row(first, include_details))
+        pending = 1
+        
+        for q in rows:
+            writer.writerow(self._csv_row(q, include_details))
+            pending += 1
+            if pending >= flush_rows:
+                yield output.getvalue().encode('utf-8')
+                output.seek(0)
+                output.truncate(0)
+                pending = 0
+        
+        if output.tell():
+            yield output.getvalue().encode('utf-8')
+    
     def export_to_excel(self, questionnaires, include_details=True):
-        """导出为Excel格式"""
-        # 创建工作簿
-        wb = Workbook()
+        """导出为Excel格式，返回文件内容"""
+        output = self.export_to_excel_file(questionnaires, include_details)
+        try:
+            return output.read()
+        finally:
+            output.close()
+    
+    def export_to_excel_file(self, questionnaires, include_details=True, write_only=True):
+        """导出为Excel格式，结果写入临时文件并返回（已定位到开头的文件对象）
         
-        # 删除默认工作表
-        wb.remove(wb.active)
+        write_only=True 时使用 openpyxl 只写模式，行数据写入后即落盘，
+        内存占用与问卷数量无关；questionnaires 可以是任意可迭代对象
+        """
+        output = tempfile.TemporaryFile(suffix='.xlsx')
+        try:
+            self.write_excel(output, questionnaires, include_details, write_only)
+            output.seek(0)
+            return output
+        except Exception:
+            output.close()
+            raise
+    
+    def write_excel(self, output, questionnaires, include_details=True, write_only=True):
+        """把问卷写入Excel工作簿并保存到 output（文件路径或文件对象）
+        
+        只遍历一次 questionnaires：概览工作表逐行写入，详情按问卷类型写入各自的工作表，
+        列宽在写入时同步统计
+        """
+        # 创建工作簿
+        wb = Workbook(write_only=write_only)
+        if not write_only:
+            # 删除默认工作表
+            wb.remove(wb.active)
         
         # 创建概览工作表
-        ws_summary = wb.create_sheet("问卷概览")
-        self._create_summary_sheet(ws_summary, questionnaires, include_details)
+        summary = _WidthTrackingSheet(wb.create_sheet("问卷概览"), SUMMARY_MAX_WIDTH)
+        summary.append(self._styled_cells(summary.worksheet, self._csv_headers(include_details), EXCEL_HEADER_STYLE))
         
         # 如果包含详细信息，为每个问卷类型创建单独的工作表
-        if include_details and questionnaires:
-            questionnaire_types = {}
+        detail_sheets = {}
+        for row_idx, q in enumerate(questionnaires, 2):
+            self._append_summary_row(summary, q, row_idx, include_details)
             
-            # 按类型分组
-            for q in questionnaires:
+            if include_details:
                 q_type = q['type']
-                if q_type not in questionnaire_types:
-                    questionnaire_types[q_type] = []
-                questionnaire_types[q_type].append(q)
-            
-            # 为每种类型创建工作表
-            for q_type, type_questionnaires in questionnaire_types.items():
-                if len(type_questionnaires) > 0:
+                sheet = detail_sheets.get(q_type)
+                if sheet is None:
                     # 限制工作表名称长度
                     sheet_name = q_type[:30] if len(q_type) > 30 else q_type
-                    ws_detail = wb.create_sheet(f"详情-{sheet_name}")
-                    self._create_detail_sheet(ws_detail, type_questionnaires)
+                    sheet = _WidthTrackingSheet(wb.create_sheet(f"详情-{sheet_name}"), DETAIL_MAX_WIDTH)
+                    detail_sheets[q_type] = sheet
+                else:
+                    # 问卷之间的分隔
+                    sheet.append([])
+                    sheet.append([])
+                self._append_detail_rows(sheet, q)
+        
+        summary.close()
+        for sheet in detail_sheets.values():
+            sheet.close()
         
-        # 保存到BytesIO
-        output = BytesIO()
         wb.save(output)
-        output.seek(0)
-        
-        return output.getvalue()
     
-    def _create_summary_sheet(self, worksheet, questionnaires, include_details):
-        """创建概览工作表"""
-        # 设置标题
-        worksheet.title = "问卷概览"
-        
-        # 写入表头
-        headers = ['ID', '问卷类型', '姓名', '年级', '提交日期', '创建时间']
-        if include_details:
-            headers.extend(['问题总数', '完成率', '总分'])
-        
-        for col, header in enumerate(headers, 1):
-            cell = worksheet.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-        
-        # 写入数据
-        for row_idx, q in enumerate(questionnaires, 2):
-            try:
-                data = json.loads(q['data']) if isinstance(q['data'], str) else q['data']
-                
-                values = [
-                    q['id'],
-                    q['type'],
-                    q['name'] or '',
-                    q['grade'] or '',
-                    q['submission_date'] or '',
-                    q['created_at'] or ''
-                ]
-                
-                if include_details:
-                    questions = data.get('questions', [])
-                    stats = data.get('statistics', {})
-                    
-                    question_count = len(questions)
-                    completion_rate = stats.get('completion_rate', 0)
-                    total_score = stats.get('total_score', 0)
-                    
-                    values.extend([question_count, f"{completion_rate}%", total_score])
-                
-                for col, value in enumerate(values, 1):
-                    cell = worksheet.cell(row=row_idx, column=col, value=value)
-                    cell.alignment = Alignment(horizontal="center", vertical="center")
-                    
-                    # 交替行颜色
-                    if row_idx % 2 == 0:
-                        cell.fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-                        
-            except Exception as e:
-                print(f"处理问卷 {q['id']} 时出错: {e}")
-        
-        # 自动调整列宽
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-    
-    def _create_detail_sheet(self, worksheet, questionnaires):
-        """创建详细信息工作表"""
-        current_row = 1
-        
-        for q_idx, q in enumerate(questionnaires):
-            try:
-                data = json.loads(q['data']) if isinstance(q['data'], str) else q['data']
-                
-                # 问卷基本信息
-                worksheet.cell(row=current_row, column=1, value=f"问卷 #{q['id']}")
-                worksheet.cell(row=current_row, column=1).font = Font(bold=True, size=14)
-                current_row += 1
-                
-                basic_info = data.get('basic_info', {})
-                info_items = [
-                    ('姓名', basic_info.get('name', q['name'])),
-                    ('年级', basic_info.get('grade', q['grade'])),
-                    ('提交日期', basic_info.get('submission_date', q['submission_date'])),
-                    ('问卷类型', q['type'])
-                ]
-                
-                for label, value in info_items:
-                    worksheet.cell(row=current_row, column=1, value=label)
-                    worksheet.cell(row=current_row, column=2, value=value or '')
-                    current_row += 1
-                
-                current_row += 1  # 空行
+    def _styled_cells(self, worksheet, values, style):
+        """生成带样式的单元格（只写模式下样式需要在写入前设置）"""
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(worksheet, value=value)
+            for attr, attr_value in style.items():
+                setattr(cell, attr, attr_value)
+            cells.append(cell)
+        return cells
+    
+    def _append_summary_row(self, sheet, q, row_idx, include_details):
+        """写入概览工作表的一行"""
+        try:
+            values = self._csv_row(q, include_details) if include_details else [
+                q['id'], q['type'], q['name'] or '', q['grade'] or '',
+                q['submission_date'] or '', q['created_at'] or ''
+            ]
+            # 交替行颜色
+            style = EXCEL_EVEN_ROW_STYLE if row_idx % 2 == 0 else EXCEL_ROW_STYLE
+            sheet.append(self._styled_cells(sheet.worksheet, values, style))
+        except Exception as e:
+            print(f"处理问卷 {q['id']} 时出错: {e}")
+            sheet.append([])
+    
+    def _append_detail_rows(self, sheet, q):
+        """写入一份问卷的详细信息"""
+        worksheet = sheet.worksheet
+        rows = []
+        try:
+            data = load_document(q['data'])
+            
+            # 问卷基本信息
+            rows.append(self._styled_cells(worksheet, [f"问卷 #{q['id']}"], {'font': EXCEL_TITLE_FONT}))
+            
+            basic_info = data.get('basic_info', {})
+            info_items = [
+                ('姓名', basic_info.get('name', q['name'])),
+                ('年级', basic_info.get('grade', q['grade'])),
+                ('提交日期', basic_info.get('submission_date', q['submission_date'])),
+                ('问卷类型', q['type'])
+            ]
+            for label, value in info_items:
+                rows.append([label, value or ''])
+            
+            rows.append([])  # 空行
+            
+            # 问题和答案
+            questions = data.get('questions', [])
+            if questions:
+                rows.append(self._styled_cells(worksheet, ["问题详情"], {'font': EXCEL_BOLD_FONT}))
+                rows.append(self._styled_cells(worksheet, ['问题编号', '问题类型', '问题内容', '答案'], {'font': EXCEL_BOLD_FONT}))
                 
-                # 问题和答案
-                questions = data.get('questions', [])
-                if questions:
-                    worksheet.cell(row=current_row, column=1, value="问题详情")
-                    worksheet.cell(row=current_row, column=1).font = Font(bold=True)
-                    current_row += 1
-                    
-                    # 表头
-                    headers = ['问题编号', '问题类型', '问题内容', '答案']
-                    for col, header in enumerate(headers, 1):
-                        cell = worksheet.cell(row=current_row, column=col, value=header)
-                        cell.font = Font(bold=True)
-                    current_row += 1
-                    
-                    # 问题数据
-                    for question in questions:
-                        q_id = question.get('id', '')
-                        q_type = question.get('type', '')
-                        q_text = question.get('question', '')
-                        
+                for question in questions:
+                    rows.append([
+                        question.get('id', ''),
+                        question.get('type', ''),
+                        question.get('question', ''),
                         # 格式化答案
-                        answer = self._format_answer_for_excel(question)
-                        
-                        values = [q_id, q_type, q_text, answer]
-                        for col, value in enumerate(values, 1):
-                            worksheet.cell(row=current_row, column=col, value=value)
-                        current_row += 1
-                
-                # 统计信息
-                stats = data.get('statistics', {})
-                if stats:
-                    current_row += 1
-                    worksheet.cell(row=current_row, column=1, value="统计信息")
-                    worksheet.cell(row=current_row, column=1).font = Font(bold=True)
-                    current_row += 1
-                    
-                    for key, value in stats.items():
-                        worksheet.cell(row=current_row, column=1, value=key)
-                        worksheet.cell(row=current_row, column=2, value=str(value))
-                        current_row += 1
-                
-                # 问卷之间的分隔
-                if q_idx < len(questionnaires) - 1:
-                    current_row += 2
+                        self._format_answer_for_excel(question)
+                    ])
+            
+            # 统计信息
+            stats = data.get('statistics', {})
+            if stats:
+                rows.append([])
+                rows.append(self._styled_cells(worksheet, ["统计信息"], {'font': EXCEL_BOLD_FONT}))
+                for key, value in stats.items():
+                    rows.append([key, str(value)])
                     
-            except Exception as e:
-                print(f"处理问卷详情 {q['id']} 时出错: {e}")
-                worksheet.cell(row=current_row, column=1, value=f"问卷 #{q['id']} 处理失败: {str(e)}")
-                current_row += 2
-        
-        # 自动调整列宽
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 80)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
+        except Exception as e:
+            print(f"处理问卷详情 {q['id']} 时出错: {e}")
+            rows = [[f"问卷 #{q['id']} 处理失败: {str(e)}"], []]
+        
+        for row in rows:
+            sheet.append(row)
     
     def _format_answer_for_excel(self, question):
         """格式化问题答案用于Excel显示"""
@@ -318,140 +546,237 @@ class QuestionnaireExporter:
             # 其他类型，尝试获取通用答案字段
             return str(question.get('answer', question.get('selected', '未知')))
     
+    def build_answer_frame(self, questionnaires):
+        """把问卷转换为宽表 DataFrame：每份问卷一行，每个问题按 ANSWER_FIELDS 各一列
+        
+        列名为 q{问题ID}_{字段}，同时包含多种问卷类型时加上类型前缀（{类型}:q{问题ID}_{字段}），
+        基本信息和统计信息展开为 info_* / stat_* 列。除解析 data JSON 外均为 pandas 向量化操作
+        """
+        base_rows = []
+        documents = []
+        for q in questionnaires:
+            base_rows.append({column: q[column] for column in COLUMNAR_BASE_COLUMNS})
+            try:
+                data = load_document(q['data'] or {})
+            except (TypeError, ValueError, LookupError) as e:
+                print(f"处理问卷 {q['id']} 时出错: {e}")
+                data = {}
+            documents.append(data if isinstance(data, dict) else {})
+        
+        base = pd.DataFrame(base_rows, columns=COLUMNAR_BASE_COLUMNS)
+        if base.empty:
+            return base
+        base['id'] = base['id'].astype('Int64')
+        for column in COLUMNAR_BASE_COLUMNS[1:]:
+            base[column] = base[column].astype('string')
+        
+        parts = [base]
+        for prefix, key in (('info_', 'basic_info'), ('stat_', 'statistics')):
+            nested = pd.json_normalize([d.get(key) or {} for d in documents])
+            nested = nested.drop(columns=[c for c in ('name', 'grade', 'submission_date') if prefix == 'info_' and c in nested])
+            parts.append(_typed_columns(nested.add_prefix(prefix)))
+        
+        answers = self._answer_columns(documents, base['type'])
+        if answers is not None:
+            parts.append(answers)
+        
+        frame = pd.concat(parts, axis=1)
+        frame.attrs['questions'] = answers.attrs.get('questions', {}) if answers is not None else {}
+        return frame
+    
+    def _answer_columns(self, documents, types):
+        """问题答案长表 -> 宽表"""
+        questions = pd.json_normalize(
+            [{'row': i, 'questions': [q for q in (d.get('questions') or []) if isinstance(q, dict)]}
+             for i, d in enumerate(documents)],
+            record_path='questions', meta=['row'], max_level=0
+        )
+        if questions.empty or 'id' not in questions:
+            return None
+        questions = questions.reindex(columns=['row', 'id', 'question', 'selected', 'rating', 'score', 'answer'])
+        questions = questions[questions['id'].notna()]
+        questions['row'] = questions['row'].astype('int64')
+        questions['column'] = 'q' + questions['id'].astype(str)
+        if types.nunique(dropna=False) > 1:
+            questions['column'] = types.fillna('').to_numpy()[questions['row'].to_numpy()] + ':' + questions['column']
+        questions = questions.drop_duplicates(['row', 'column'])
+        
+        # 选项值：单选时取唯一的值，任一问卷多选时整列保留为列表；评分量表使用 rating
+        selected = questions['selected']
+        is_list = selected.map(lambda value: isinstance(value, list))
+        lengths = selected.where(is_list).str.len()
+        multi = questions['column'].isin(questions.loc[lengths > 1, 'column'])
+        single = selected.where(~is_list, selected.where(is_list).str[0])
+        questions['selected'] = single.where(~multi, selected).combine_first(questions['rating'])
+        
+        # 得分：优先使用问题中记录的得分，否则为选项值（或评分）之和
+        values = pd.to_numeric(selected.where(is_list).explode(), errors='coerce')
+        selected_sum = values.groupby(level=0).sum(min_count=1)
+        questions['score'] = pd.to_numeric(questions['score'], errors='coerce') \
+            .combine_first(selected_sum.reindex(questions.index)) \
+            .combine_first(pd.to_numeric(questions['rating'], errors='coerce'))
+        
+        wide = questions.set_index(['row', 'column'])[list(ANSWER_FIELDS)].unstack('column')
+        order = list(dict.fromkeys(questions['column']))
+        wide = wide.reindex(columns=pd.MultiIndex.from_product([ANSWER_FIELDS, order]))
+        wide = wide.swaplevel(axis=1).reindex(columns=pd.MultiIndex.from_product([order, ANSWER_FIELDS]))
+        wide.columns = [f'{column}_{field}' for column, field in wide.columns]
+        wide = wide.reindex(range(len(documents))).dropna(axis=1, how='all')
+        wide = _typed_columns(wide)
+        
+        texts = questions.drop_duplicates('column').set_index('column')['question']
+        wide.attrs['questions'] = {column: str(text) for column, text in texts.dropna().items()}
+        return wide
+    
+    def write_columnar(self, output, questionnaires, format_type='parquet'):
+        """导出为 Parquet 或 Arrow IPC 文件（output 为文件路径或文件对象）"""
+        if pa is None:
+            raise ValueError(f"{format_type} 导出需要安装 pyarrow")
+        
+        frame = self.build_answer_frame(questionnaires)
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b'questions'] = json.dumps(frame.attrs.get('questions', {}), ensure_ascii=False).encode('utf-8')
+        table = table.replace_schema_metadata(metadata)
+        
+        if format_type == 'parquet':
+            pa.parquet.write_table(table, output, compression='zstd')
+        else:
+            with pa.ipc.new_file(output, table.schema) as writer:
+                writer.write_table(table)
+    
+    def export_to_columnar(self, questionnaires, format_type='parquet'):
+        """导出为列式格式，返回文件内容"""
+        buffer = BytesIO()
+        self.write_columnar(buffer, questionnaires, format_type)
+        return buffer.getvalue()
+    
     def export_to_pdf(self, questionnaires, include_details=True):
-        """导出为PDF格式"""
+        """导出为PDF格式，返回文件内容"""
         buffer = BytesIO()
-        
-        # 创建PDF文档
+        self.write_pdf(buffer, questionnaires, include_details)
+        return buffer.getvalue()
+    
+    def write_pdf(self, output, questionnaires, include_details=True, summary=None):
+        """把问卷写入PDF（output 为文件路径或文件对象）
+        
+        详细数据按页大小分块生成表格，边生成边排版，不再只输出前50条。
+        summary 为 (问卷总数, {类型: 数量})，由调用方提供时 questionnaires 可以是分批读取数据库的生成器，
+        否则会先读入全部问卷计算概览
+        """
+        if summary is None:
+            questionnaires = list(questionnaires)
+            summary = summarize_questionnaires(questionnaires)
+        
+        story = self._pdf_report_header(summary)
+        if include_details and summary[0]:
+            styles = get_pdf_styles()
+            story = itertools.chain(
+                story,
+                [Paragraph("详细数据", styles['heading'])],
+                self._pdf_detail_tables(questionnaires)
+            )
+        self._build_pdf(output, story)
+    
+    def write_pdf_sections(self, output, sections, summary, include_details=True, max_workers=None):
+        """按问卷类型分节生成PDF，多进程并行生成各节后合并为一个文件
+        
+        sections 为 [(问卷类型, 行数据工厂)]，行数据工厂需要能被子进程序列化，
+        例如 functools.partial(query_rows, 数据库路径, 查询语句, 参数)。
+        合并依赖可选的 pypdf，未安装或只有一节时在当前进程中顺序生成
+        """
+        if not include_details or not sections:
+            return self.write_pdf(output, [], include_details=False, summary=summary)
+        
+        if PdfWriter is None or len(sections) == 1 or max_workers == 1:
+            story = itertools.chain(
+                self._pdf_report_header(summary),
+                itertools.chain.from_iterable(
+                    self._pdf_section(title, row_factory()) for title, row_factory in sections
+                )
+            )
+            return self._build_pdf(output, story)
+        
+        with tempfile.TemporaryDirectory(prefix='pdf_sections_') as tmp_dir:
+            header_path = os.path.join(tmp_dir, 'header.pdf')
+            self._build_pdf(header_path, self._pdf_report_header(summary))
+            
+            section_paths = [os.path.join(tmp_dir, f'section_{i}.pdf') for i in range(len(sections))]
+            context = multiprocessing.get_context('spawn')  # 避免在多线程的工作进程中 fork
+            with ProcessPoolExecutor(max_workers=max_workers or min(len(sections), os.cpu_count() or 1),
+                                     mp_context=context) as pool:
+                list(pool.map(_render_pdf_section, section_paths,
+                              [title for title, _ in sections], [factory for _, factory in sections]))
+            
+            writer = PdfWriter()
+            for path in [header_path] + section_paths:
+                writer.append(path)
+            writer.write(output)
+            writer.close()
+    
+    def _build_pdf(self, output, flowables):
+        """排版并写出PDF，flowables 可以是生成器（按需生成，不在内存中保留完整的 story）"""
         doc = SimpleDocTemplate(
-            buffer,
+            output,
             pagesize=A4,
             rightMargin=72,
             leftMargin=72,
             topMargin=72,
             bottomMargin=18
         )
-        
-        # 获取样式
-        styles = getSampleStyleSheet()
-        
-        # 创建自定义样式
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            spaceAfter=30,
-            alignment=1,  # 居中
-            fontName=self.pdf_font
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=12,
-            spaceAfter=12,
-            fontName=self.pdf_font
-        )
-        
-        normal_style = ParagraphStyle(
-            'CustomNormal',
-            parent=styles['Normal'],
-            fontSize=10,
-            fontName=self.pdf_font
-        )
-        
-        # 构建PDF内容
-        story = []
-        
-        # 标题
-        title = Paragraph("问卷数据报告", title_style)
-        story.append(title)
-        
-        # 生成时间
-        generate_time = Paragraph(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style)
-        story.append(generate_time)
-        story.append(Spacer(1, 12))
-        
-        # 概览统计
-        summary_title = Paragraph("数据概览", heading_style)
-        story.append(summary_title)
+        doc.build(_StoryFeed(flowables))
+    
+    def _pdf_report_header(self, summary):
+        """报告标题、生成时间和概览统计表"""
+        styles = get_pdf_styles()
+        total, type_counts = summary
         
         # 统计表格
         summary_data = [['统计项目', '数值']]
-        summary_data.append(['问卷总数', str(len(questionnaires))])
+        summary_data.append(['问卷总数', str(total)])
+        for q_type, count in type_counts.items():
+            summary_data.append([f'{q_type} 类型', str(count)])
+        
+        return [
+            Paragraph("问卷数据报告", styles['title']),
+            Paragraph(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['normal']),
+            Spacer(1, 12),
+            Paragraph("数据概览", styles['heading']),
+            Table(summary_data, style=styles['summary_table']),
+            Spacer(1, 20)
+        ]
+    
+    def _pdf_section(self, title, questionnaires):
+        """一种问卷类型的详细数据"""
+        styles = get_pdf_styles()
+        yield Paragraph(f"详细数据 - {title}", styles['heading'])
+        yield from self._pdf_detail_tables(questionnaires)
+        yield Spacer(1, 20)
+    
+    def _pdf_detail_tables(self, questionnaires, rows_per_table=PDF_ROWS_PER_TABLE):
+        """把详细数据切分为约一页大小的表格（每块都带表头），逐块生成"""
+        styles = get_pdf_styles()
+        header = ['ID', '类型', '姓名', '年级', '提交日期']
+        chunk = [header]
         
-        if questionnaires:
-            # 按类型统计
-            type_counts = {}
-            for q in questionnaires:
-                q_type = q['type']
-                type_counts[q_type] = type_counts.get(q_type, 0) + 1
-            
-            for q_type, count in type_counts.items():
-                summary_data.append([f'{q_type} 类型', str(count)])
-        
-        summary_table = Table(summary_data)
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), self.pdf_font),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(summary_table)
-        story.append(Spacer(1, 20))
-        
-        # 详细数据
-        if include_details and questionnaires:
-            detail_title = Paragraph("详细数据", heading_style)
-            story.append(detail_title)
-            
-            # 创建详细数据表格
-            detail_data = [['ID', '类型', '姓名', '年级', '提交日期']]
-            
-            for q in questionnaires[:50]:  # 限制PDF中的记录数量，避免文件过大
-                try:
-                    row = [
-                        str(q['id']),
-                        q['type'] or '',
-                        q['name'] or '',
-                        q['grade'] or '',
-                        q['submission_date'] or ''
-                    ]
-                    detail_data.append(row)
-                except Exception as e:
-                    print(f"处理问卷 {q['id']} 时出错: {e}")
-            
-            detail_table = Table(detail_data)
-            detail_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), self.pdf_font),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('FONTSIZE', (0, 1), (-1, -1), 8)
-            ]))
-            
-            story.append(detail_table)
+        for q in questionnaires:
+            try:
+                chunk.append([
+                    str(q['id']),
+                    q['type'] or '',
+                    q['name'] or '',
+                    q['grade'] or '',
+                    q['submission_date'] or ''
+                ])
+            except Exception as e:
+                print(f"处理问卷 {q['id']} 时出错: {e}")
             
-            # 如果记录数超过50，添加说明
-            if len(questionnaires) > 50:
-                note = Paragraph(f"注: 由于记录数量较多({len(questionnaires)}条)，PDF中仅显示前50条记录。", normal_style)
-                story.append(Spacer(1, 12))
-                story.append(note)
+            if len(chunk) > rows_per_table:
+                yield Table(chunk, style=styles['detail_table'], repeatRows=1)
+                chunk = [header]
         
-        # 生成PDF
-        doc.build(story)
-        
-        buffer.seek(0)
-        return buffer.getvalue()
+        if len(chunk) > 1:
+            yield Table(chunk, style=styles['detail_table'], repeatRows=1)
 
 # 全局导出器实例
 exporter = QuestionnaireExporter()
@@ -462,8 +787,8 @@ def export_questionnaires(questionnaires, format_type='csv', include_details=Tru
     
     Args:
         questionnaires: 问卷数据列表
-        format_type: 导出格式 ('csv', 'excel', 'pdf')
-        include_details: 是否包含详细信息
+        format_type: 导出格式 ('csv', 'excel', 'pdf', 'parquet', 'arrow')
+        include_details: 是否包含详细信息（列式格式总是包含每个问题的答案）
     
     Returns:
         导出的文件内容
@@ -474,6 +799,49 @@ def export_questionnaires(questionnaires, format_type='csv', include_details=Tru
         return exporter.export_to_excel(questionnaires, include_details)
     elif format_type.lower() == 'pdf':
         return exporter.export_to_pdf(questionnaires, include_details)
+    elif format_type.lower() in COLUMNAR_FORMATS:
+        return exporter.export_to_columnar(questionnaires, format_type.lower())
+    else:
+        raise ValueError(f"不支持的导出格式: {format_type}")
+
+def stream_questionnaires(questionnaires, format_type='csv', include_details=True):
+    """
+    流式导出问卷数据
+    
+    Args:
+        questionnaires: 问卷数据的可迭代对象（可以是分批读取数据库的生成器）
+        format_type: 导出格式，见 STREAMING_FORMATS
+        include_details: 是否包含详细信息
+    
+    Returns:
+        逐块生成文件内容（bytes）的生成器
+    """
+    if format_type.lower() == 'csv':
+        return exporter.iter_csv(questionnaires, include_details)
+    else:
+        raise ValueError(f"不支持流式导出的格式: {format_type}")
+
+def write_questionnaires(output, questionnaires, format_type='csv', include_details=True, summary=None):
+    """
+    导出问卷数据并写入文件（后台导出任务使用）
+    
+    Args:
+        output: 以二进制方式打开的文件对象
+        questionnaires: 问卷数据的可迭代对象
+        format_type: 导出格式 ('csv', 'excel', 'pdf', 'parquet', 'arrow')
+        include_details: 是否包含详细信息
+        summary: PDF概览统计 (问卷总数, {类型: 数量})，提供时不需要预先读入全部问卷
+    """
+    format_type = format_type.lower()
+    if format_type == 'csv':
+        for chunk in exporter.iter_csv(questionnaires, include_details):
+            output.write(chunk)
+    elif format_type in ['excel', 'xlsx']:
+        exporter.write_excel(output, questionnaires, include_details)
+    elif format_type == 'pdf':
+        exporter.write_pdf(output, questionnaires, include_details, summary)
+    elif format_type in COLUMNAR_FORMATS:
+        exporter.write_columnar(output, questionnaires, format_type)
     else:
         raise ValueError(f"不支持的导出格式: {format_type}")
 
@@ -496,6 +864,10 @@ def get_export_filename(format_type, prefix='questionnaires'):
         return f"{prefix}_{timestamp}.xlsx"
     elif format_type.lower() == 'pdf':
         return f"{prefix}_{timestamp}.pdf"
+    elif format_type.lower() == 'parquet':
+        return f"{prefix}_{timestamp}.parquet"
+    elif format_type.lower() == 'arrow':
+        return f"{prefix}_{timestamp}.arrow"
     else:
         return f"{prefix}_{timestamp}.txt"
 
@@ -515,5 +887,9 @@ def get_content_type(format_type):
         return 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     elif format_type.lower() == 'pdf':
         return 'application/pdf'
+    elif format_type.lower() == 'parquet':
+        return 'application/vnd.apache.parquet'
+    elif format_type.lower() == 'arrow':
+        return 'application/vnd.apache.arrow.file'
     else:
         return 'application/octet-stream'
\ No newline at end of file
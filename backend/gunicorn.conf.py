@@ -44,6 +44,25 @@ def worker_int(worker):
     """工作进程中断时的回调"""
     worker.log.info("工作进程 %s 正在关闭", worker.pid)
 
+def post_fork(server, worker):
+    """工作进程启动后开始执行后台导出任务（接管重启前未完成的任务）"""
+    try:
+        from app import start_export_jobs
+        start_export_jobs()
+    except Exception as e:
+        worker.log.warning("导出任务线程池启动失败: %s", e)
+
+def worker_exit(server, worker):
+    """工作进程退出时写完队列中的操作日志，停止接收新的导出任务，关闭批量提交校验进程池"""
+    try:
+        from app import flush_operation_logs, stop_export_jobs
+        from bulk_submit import shutdown_executor
+        flush_operation_logs()
+        stop_export_jobs()
+        shutdown_executor()
+    except Exception as e:
+        worker.log.warning("操作日志刷新失败: %s", e)
+
 def on_exit(server):
     """服务器退出时的回调"""
     server.log.info("问卷数据管理系统已关闭")
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+问卷提交幂等模块
+记录客户端提供的 Idempotency-Key 和问卷内容的哈希，
+重复提交（双击、网络重试）直接返回第一次提交的问卷 ID，不再写入新问卷
+"""
+
+import json
+import hashlib
+from datetime import datetime, timedelta
+
+
+SUBMISSION_KEYS_TABLE = 'submission_keys'
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+KEY_PREFIX = 'key:'     # 客户端提供的幂等键
+HASH_PREFIX = 'hash:'   # 问卷内容哈希（去重窗口）
+
+MAX_KEY_LENGTH = 200
+
+# 默认参数（可在 config.py / config_production.py 中覆盖）
+DEFAULT_KEY_TTL = 24 * 3600     # 幂等键保留秒数
+DEFAULT_DEDUP_WINDOW = 10       # 相同内容在多少秒内视为重复提交，0 表示不按内容去重
+
+
+def _now(offset_seconds=0):
+    return (datetime.now() + timedelta(seconds=offset_seconds)).strftime(TIMESTAMP_FORMAT)
+
+
+def create_submission_keys_table(cursor):
+    """创建提交记录表（已存在时跳过）"""
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {SUBMISSION_KEYS_TABLE} (
+            key TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            questionnaire_id INTEGER NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            expires_at TIMESTAMP NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{SUBMISSION_KEYS_TABLE}_expires ON {SUBMISSION_KEYS_TABLE}(expires_at)"
+    )
+
+
+def content_hash(data):
+    """问卷内容的哈希（键排序，与字段顺序无关）
+
+    不包含 statistics.submission_time：前端在每次点击提交时生成该时间，
+    未提供时服务端取当前时间，重试请求的这个值总是不同
+    """
+    statistics = data.get('statistics')
+    if isinstance(statistics, dict) and 'submission_time' in statistics:
+        data = dict(data, statistics={k: v for k, v in statistics.items() if k != 'submission_time'})
+    canonical = json.dumps(data, sort_keys=True, default=str, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class IdempotencyConflict(Exception):
+    """同一个幂等键被用于提交不同的内容"""
+
+
+def find_submission(cursor, idempotency_key, digest, dedup=True):
+    """查找未过期的相同提交，返回已有的问卷 ID 或 None
+
+    幂等键已存在但内容不同时抛出 IdempotencyConflict；已删除的问卷不算重复
+    """
+    now = _now()
+    lookup = f'''
+        SELECT k.questionnaire_id, k.content_hash
+        FROM {SUBMISSION_KEYS_TABLE} k
+        JOIN questionnaires q ON q.id = k.questionnaire_id AND q.deleted_at IS NULL
+        WHERE k.key = ? AND k.expires_at > ?
+    '''
+    if idempotency_key:
+        cursor.execute(lookup, (KEY_PREFIX + idempotency_key, now))
+        row = cursor.fetchone()
+        if row is not None:
+            if row[1] != digest:
+                raise IdempotencyConflict(idempotency_key)
+            return row[0]
+
+    if dedup:
+        cursor.execute(lookup, (HASH_PREFIX + digest, now))
+        row = cursor.fetchone()
+        if row is not None:
+            return row[0]
+    return None
+
+
+def remember_submission(cursor, questionnaire_id, digest, idempotency_key=None,
+                        key_ttl=DEFAULT_KEY_TTL, dedup_window=DEFAULT_DEDUP_WINDOW):
+    """在写入问卷的同一事务中记录幂等键和内容哈希，并顺带清理过期记录"""
+    now = _now()
+    cursor.execute(f"DELETE FROM {SUBMISSION_KEYS_TABLE} WHERE expires_at <= ?", (now,))
+
+    entries = []
+    if idempotency_key:
+        entries.append((KEY_PREFIX + idempotency_key, _now(key_ttl)))
+    if dedup_window > 0:
+        entries.append((HASH_PREFIX + digest, _now(dedup_window)))
+    cursor.executemany(
+        f'''INSERT OR REPLACE INTO {SUBMISSION_KEYS_TABLE}
+            (key, content_hash, questionnaire_id, created_at, expires_at) VALUES (?, ?, ?, ?, ?)''',
+        [(key, digest, questionnaire_id, now, expires_at) for key, expires_at in entries]
+    )
@@ -9,6 +9,15 @@ import os
 import bcrypt
 from datetime import datetime
 
+from search_index import create_search_table
+from stats_rollup import create_rollup_schema
+from export_jobs import create_jobs_table
+from change_feed import create_change_feed_schema
+from idempotency import create_submission_keys_table
+from questionnaire_store import create_definitions_table
+from storage_codec import create_dictionaries_table
+from user_cache import create_user_cache_schema
+
 # 数据库文件路径
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), 'questionnaires.db')
 
@@ -47,6 +56,10 @@ def check_table_structure():
                 print("正在添加 teacher 列...")
                 cursor.execute("ALTER TABLE questionnaires ADD COLUMN teacher TEXT")
             
+            if 'deleted_at' not in columns:
+                print("正在添加 deleted_at 列...")
+                cursor.execute("ALTER TABLE questionnaires ADD COLUMN deleted_at TIMESTAMP")
+            
             if 'parent_phone' not in columns:
                 print("正在添加 parent_phone 列...")
                 cursor.execute("ALTER TABLE questionnaires ADD COLUMN parent_phone TEXT")
@@ -126,6 +139,7 @@ def create_tables():
             fill_date DATE,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            deleted_at TIMESTAMP,
             data TEXT NOT NULL
         )
         ''')
@@ -158,6 +172,38 @@ def create_tables():
         ''')
         print("✓ 操作日志表创建完成")
         
+        # 创建问卷全文检索表
+        create_search_table(cursor)
+        print("✓ 全文检索表创建完成")
+        
+        # 创建统计汇总表及维护触发器
+        create_rollup_schema(cursor)
+        print("✓ 统计汇总表创建完成")
+        
+        # 创建后台导出任务表
+        create_jobs_table(cursor)
+        print("✓ 导出任务表创建完成")
+        
+        # 创建问卷变更序列表及维护触发器
+        create_change_feed_schema(cursor)
+        print("✓ 问卷变更序列表创建完成")
+        
+        # 创建提交幂等记录表
+        create_submission_keys_table(cursor)
+        print("✓ 提交幂等记录表创建完成")
+        
+        # 创建问卷定义表
+        create_definitions_table(cursor)
+        print("✓ 问卷定义表创建完成")
+        
+        # 创建压缩字典表
+        create_dictionaries_table(cursor)
+        print("✓ 压缩字典表创建完成")
+        
+        # 创建用户身份缓存代次表及触发器
+        create_user_cache_schema(cursor)
+        print("✓ 用户缓存代次表创建完成")
+        
         conn.commit()
 
 def create_default_admin():
@@ -198,6 +244,11 @@ def create_indexes():
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_questionnaires_name ON questionnaires(name)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_questionnaires_created_at ON questionnaires(created_at)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_questionnaires_submission_date ON questionnaires(submission_date)")
+        # 未删除问卷按创建时间的范围查询/排序（deleted_at IS NULL AND created_at >= ?）
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_questionnaires_deleted_created ON questionnaires(deleted_at, created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_questionnaires_school ON questionnaires(school)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_questionnaires_teacher ON questionnaires(teacher)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_questionnaires_filler_name ON questionnaires(filler_name)")
         
         # 为用户表创建索引
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)")
@@ -0,0 +1,130 @@
+"""
+JSON 序列化模块
+API 响应（Flask JSON provider）和存储层（data 列、导出、变更序列）共用的 JSON 编解码。
+安装了 orjson 时使用 orjson，否则使用标准库 json；两者输出的 JSON 含义相同：
+无法直接序列化的对象（datetime、Decimal、set 等）按 default=str 转为字符串，
+datetime 不使用 orjson 的 ISO 格式，与标准库 str(datetime) 的结果一致。
+与标准库的已知差异：NaN / Infinity 输出为 null（标准库输出的 NaN 不是合法 JSON），
+解析超过 64 位的整数时 orjson 返回 float
+"""
+
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+PROVIDER_AUTO = 'auto'
+PROVIDER_ORJSON = 'orjson'
+PROVIDER_STDLIB = 'stdlib'
+
+if ORJSON_AVAILABLE:
+    # datetime、dataclass 交给 default 处理，保持与标准库 default=str 相同的结果；字典的非字符串键转为字符串
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+_use_orjson = ORJSON_AVAILABLE
+
+
+def configure(provider=PROVIDER_AUTO):
+    """选择序列化实现：auto（有 orjson 时使用）、orjson、stdlib"""
+    global _use_orjson
+    provider = (provider or PROVIDER_AUTO).lower()
+    if provider not in (PROVIDER_AUTO, PROVIDER_ORJSON, PROVIDER_STDLIB):
+        raise ValueError(f'不支持的 JSON 序列化实现: {provider}')
+    if provider == PROVIDER_ORJSON and not ORJSON_AVAILABLE:
+        print("警告: 未安装 orjson，JSON 序列化使用标准库")
+    _use_orjson = ORJSON_AVAILABLE and provider != PROVIDER_STDLIB
+
+
+def current_provider():
+    return PROVIDER_ORJSON if _use_orjson else PROVIDER_STDLIB
+
+
+def _str_default(obj):
+    # 标准库会把 float 子类（如 numpy.float64）序列化为数字，orjson 只识别 float 本身
+    if isinstance(obj, float):
+        return float(obj)
+    return str(obj)
+
+
+def _orjson_dumps(obj, default, indent, sort_keys):
+    options = _ORJSON_OPTIONS
+    if indent:
+        options |= orjson.OPT_INDENT_2
+    if sort_keys:
+        options |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(obj, default=default, option=options)
+
+
+def dumps_bytes(obj, indent=False, sort_keys=False):
+    """序列化为 UTF-8 bytes（非 ASCII 字符不转义，无法序列化的对象转为字符串）"""
+    if _use_orjson:
+        try:
+            return _orjson_dumps(obj, _str_default, indent, sort_keys)
+        except orjson.JSONEncodeError:
+            pass  # 超过 64 位的整数、循环引用等 orjson 不支持的情况交给标准库处理
+    return json.dumps(obj, default=str, ensure_ascii=False, indent=2 if indent else None,
+                      sort_keys=sort_keys).encode('utf-8')
+
+
+def dumps(obj, indent=False, sort_keys=False):
+    """序列化为字符串，相当于 json.dumps(obj, default=str, ensure_ascii=False)"""
+    if _use_orjson:
+        return dumps_bytes(obj, indent, sort_keys).decode('utf-8')
+    return json.dumps(obj, default=str, ensure_ascii=False, indent=2 if indent else None, sort_keys=sort_keys)
+
+
+def loads(text):
+    """解析 JSON 字符串或 bytes"""
+    if _use_orjson:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass  # NaN / Infinity、超过 64 位的整数等由标准库解析（确实无效时由标准库抛出异常）
+    return json.loads(text)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider：使用 orjson 时直接生成响应 bytes，其余行为（键排序、datetime 转为 HTTP 日期等）与默认实现相同
+
+    orjson 不转义非 ASCII 字符，因此响应中的中文直接以 UTF-8 输出。
+    envelope 为可选的 callable(obj) -> obj，在 jsonify 序列化之前调用，用于在响应中附加字段
+    （响应体只序列化一次，不需要在 after_request 中重新解析）
+    """
+
+    envelope = None
+
+    def dumps(self, obj, **kwargs):
+        if _use_orjson and not kwargs:
+            try:
+                return _orjson_dumps(obj, self.default, False, self.sort_keys).decode('utf-8')
+            except orjson.JSONEncodeError:
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if _use_orjson and not kwargs:
+            return loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.envelope is not None:
+            obj = self.envelope(obj)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+
+        body = None
+        if _use_orjson:
+            try:
+                body = _orjson_dumps(obj, self.default, indent, self.sort_keys) + b'\n'
+            except orjson.JSONEncodeError:
+                pass
+        if body is None:
+            dump_args = {'indent': 2} if indent else {'separators': (',', ':')}
+            body = f"{DefaultJSONProvider.dumps(self, obj, **dump_args)}\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
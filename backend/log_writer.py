@@ -0,0 +1,248 @@
+"""
+操作日志异步写入模块
+请求线程只负责把日志放入有界队列，由后台线程按批量/时间阈值统一写入数据库，
+减少请求路径上的写事务数量，避免与问卷提交争抢 SQLite 写锁
+"""
+
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from json_codec import dumps as json_dumps
+
+
+# 默认参数（可在 config.py / config_production.py 中覆盖）
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL = 1.0      # 秒
+DEFAULT_PUT_TIMEOUT = 0.0         # 队列满时的等待时间（秒），0 表示不等待直接降级
+
+INSERT_SQL = (
+    "INSERT INTO operation_logs (user_id, operation, target_id, details, created_at) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+def utc_timestamp():
+    """与 SQLite CURRENT_TIMESTAMP 相同格式的 UTC 时间"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class OperationLogWriter:
+    """操作日志后台写入器
+
+    - 日志在入队时确定 created_at，写入延迟不会影响记录时间
+    - 后台线程凑满 batch_size 条或等待超过 flush_interval 秒后，用一次 executemany 事务写入
+    - 队列满时按 put_timeout 等待（背压），仍然写不进去则降级写入 operation_errors.log
+    - 检测到进程 fork（gunicorn preload_app）后在子进程中重新启动写入线程
+    """
+
+    def __init__(self, connect, fallback_file, queue_size=DEFAULT_QUEUE_SIZE,
+                 batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 put_timeout=DEFAULT_PUT_TIMEOUT, enabled=True):
+        self._connect = connect
+        self.fallback_file = fallback_file
+        self.queue_size = max(int(queue_size), 1)
+        self.batch_size = max(int(batch_size), 1)
+        self.flush_interval = max(float(flush_interval), 0.01)
+        self.put_timeout = max(float(put_timeout), 0.0)
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._thread = None
+        self._stopping = threading.Event()
+        self._pid = os.getpid()
+
+        # 统计信息
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.overflowed = 0
+        self.failed = 0
+
+    def _ensure_started(self):
+        """按需启动后台线程（fork 之后父进程的线程不会被继承）"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # 子进程丢弃父进程队列中残留的日志，避免重复写入
+                self._queue = queue.Queue(maxsize=self.queue_size)
+                self._thread = None
+                self._stopping = threading.Event()
+                self._pid = os.getpid()
+                self.enqueued = self.written = self.batches = self.overflowed = self.failed = 0
+
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name='operation-log-writer', daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, user_id, operation, target_id, details):
+        """提交一条日志，details 为可 JSON 序列化的字典"""
+        row = (
+            user_id,
+            operation,
+            target_id,
+            json_dumps(details),
+            utc_timestamp()
+        )
+
+        if not self.enabled:
+            # 同步模式（测试或调试时使用）
+            self._write_batch([row])
+            return True
+
+        self._ensure_started()
+        try:
+            if self.put_timeout > 0:
+                self._queue.put(row, timeout=self.put_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.overflowed += 1
+            self._write_fallback([row], '日志队列已满')
+            return False
+
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def _run(self):
+        """后台线程主循环，写入线程持有一个专用连接"""
+        conn = None
+        while True:
+            batch = self._collect_batch()
+            if batch:
+                if conn is None:
+                    conn = self._open_connection()
+                if not self._write_batch(batch, conn):
+                    # 写入失败后重建连接
+                    self._close_quietly(conn)
+                    conn = None
+            elif self._stopping.is_set():
+                break
+        self._close_quietly(conn)
+
+    def _collect_batch(self):
+        """收集一批日志，满足数量或时间阈值即返回"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if self._stopping.is_set():
+                remaining = 0
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _open_connection(self):
+        try:
+            return self._connect()
+        except Exception as e:
+            print(f"操作日志写入连接创建失败: {e}")
+            return None
+
+    def _write_batch(self, rows, conn=None):
+        """在一个事务中批量写入日志，返回是否成功"""
+        own_conn = conn is None
+        try:
+            if conn is None:
+                conn = self._connect()
+            with conn:
+                conn.executemany(INSERT_SQL, rows)
+            with self._lock:
+                self.written += len(rows)
+                self.batches += 1
+            return True
+        except Exception as e:
+            print(f"批量写入操作日志失败: {e}")
+            with self._lock:
+                self.failed += len(rows)
+            self._write_fallback(rows, f'日志记录失败: {e}')
+            return False
+        finally:
+            if own_conn:
+                self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn):
+        if conn is None:
+            return
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _write_fallback(self, rows, reason):
+        """写入备份日志文件"""
+        try:
+            os.makedirs(os.path.dirname(self.fallback_file), exist_ok=True)
+            with open(self.fallback_file, 'a', encoding='utf-8') as f:
+                for user_id, operation, target_id, details, created_at in rows:
+                    f.write(f"{datetime.now().isoformat()} - {reason}\n")
+                    f.write(f"操作: {operation}, 用户ID: {user_id}, 目标: {target_id}, "
+                            f"时间: {created_at}, 详情: {details}\n\n")
+        except Exception:
+            pass  # 如果文件记录也失败，则忽略
+
+    def flush(self, timeout=5.0):
+        """等待队列中的日志全部写入（用于关闭进程或需要立即读取日志时）"""
+        if self._pid != os.getpid() or self._thread is None or not self._thread.is_alive():
+            # 没有后台线程时直接在当前线程写入
+            rows = []
+            while True:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if rows and self._pid == os.getpid():
+                self._write_batch(rows)
+            return
+
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            with self._lock:
+                pending = self.enqueued - self.written - self.failed
+            if pending <= 0:
+                return
+            time.sleep(0.01)
+
+    def stop(self, timeout=5.0):
+        """停止后台线程，退出前写完剩余日志"""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid():
+            return
+        self._stopping.set()
+        thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        """返回写入器统计信息"""
+        with self._lock:
+            return {
+                'pid': self._pid,
+                'enabled': self.enabled,
+                'running': self._thread is not None and self._thread.is_alive(),
+                'queued': self._queue.qsize(),
+                'queue_size': self.queue_size,
+                'batch_size': self.batch_size,
+                'flush_interval': self.flush_interval,
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'batches': self.batches,
+                'overflowed': self.overflowed,
+                'failed': self.failed
+            }
@@ -178,11 +178,248 @@ def apply_migration_v3(conn):
     conn.commit()
     print("v3 迁移完成")
 
+def apply_migration_v4(conn):
+    """应用版本4迁移 - 问卷软删除（删除后不再重新编号ID）"""
+    cursor = conn.cursor()
+    
+    print("应用迁移 v4: 添加问卷软删除字段...")
+    
+    cursor.execute("PRAGMA table_info(questionnaires)")
+    columns = [column[1] for column in cursor.fetchall()]
+    if 'deleted_at' not in columns:
+        cursor.execute("ALTER TABLE questionnaires ADD COLUMN deleted_at TIMESTAMP")
+    
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_questionnaires_deleted_at ON questionnaires(deleted_at)")
+    
+    conn.commit()
+    print("v4 迁移完成")
+
+def apply_migration_v5(conn, batch_size=500):
+    """应用版本5迁移 - 回填热点字段列（一次性）"""
+    from questionnaire_fields import HOT_FIELDS, extract_hot_fields
+    
+    cursor = conn.cursor()
+    
+    print("应用迁移 v5: 从问卷数据回填基本信息列...")
+    
+    # 确保所有热点字段列都存在
+    cursor.execute("PRAGMA table_info(questionnaires)")
+    columns = [column[1] for column in cursor.fetchall()]
+    for field in HOT_FIELDS:
+        if field not in columns:
+            cursor.execute(f"ALTER TABLE questionnaires ADD COLUMN {field} TEXT")
+    
+    # 只补齐空列，已有的列值保持不变
+    set_clause = ', '.join(f"{field} = COALESCE(NULLIF({field}, ''), ?)" for field in HOT_FIELDS)
+    update_sql = f"UPDATE questionnaires SET {set_clause} WHERE id = ?"
+    
+    updated = 0
+    last_id = 0
+    while True:
+        cursor.execute(
+            "SELECT id, data, submission_date FROM questionnaires WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, batch_size)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        
+        params = []
+        for row_id, data, submission_date in rows:
+            try:
+                parsed = json.loads(data) if data else {}
+            except (TypeError, ValueError):
+                parsed = {}
+            fields = extract_hot_fields(parsed, submission_date)
+            params.append([fields[field] for field in HOT_FIELDS] + [row_id])
+        
+        cursor.executemany(update_sql, params)
+        updated += len(rows)
+        last_id = rows[-1][0]
+    
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_questionnaires_school ON questionnaires(school)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_questionnaires_teacher ON questionnaires(teacher)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_questionnaires_filler_name ON questionnaires(filler_name)")
+    
+    conn.commit()
+    print(f"v5 迁移完成，共处理 {updated} 条问卷")
+
+def apply_migration_v6(conn):
+    """应用版本6迁移 - 日期范围查询使用的组合索引"""
+    cursor = conn.cursor()
+    
+    print("应用迁移 v6: 添加按创建时间范围查询的组合索引...")
+    
+    # 列表和导出的条件均为 deleted_at IS NULL AND created_at 范围，组合索引可同时用于筛选和排序
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_questionnaires_deleted_created ON questionnaires(deleted_at, created_at)")
+    # 组合索引已覆盖 deleted_at 单列索引
+    cursor.execute("DROP INDEX IF EXISTS idx_questionnaires_deleted_at")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_operation_logs_created_at ON operation_logs(created_at)")
+    
+    conn.commit()
+    print("v6 迁移完成")
+
+def apply_migration_v7(conn):
+    """应用版本7迁移 - 问卷全文检索索引（FTS5）"""
+    from search_index import rebuild_search_index
+    
+    print("应用迁移 v7: 建立问卷全文检索索引...")
+    
+    indexed = rebuild_search_index(conn)
+    
+    print(f"v7 迁移完成，共索引 {indexed} 条问卷")
+
+def rebuild_search(db_path):
+    """重建问卷全文检索索引"""
+    from search_index import rebuild_search_index
+    
+    try:
+        with sqlite3.connect(db_path) as conn:
+            indexed = rebuild_search_index(conn)
+        print(f"全文检索索引重建完成，共索引 {indexed} 条问卷")
+        return True
+    except Exception as e:
+        print(f"全文检索索引重建失败: {e}")
+        return False
+
+def apply_migration_v8(conn):
+    """应用版本8迁移 - 统计汇总表及维护触发器"""
+    from stats_rollup import rebuild_rollups
+    
+    print("应用迁移 v8: 建立统计汇总表...")
+    
+    rows = rebuild_rollups(conn)
+    
+    print(f"v8 迁移完成，共 {rows} 条汇总记录")
+
+def apply_migration_v9(conn):
+    """应用版本9迁移 - 后台导出任务表"""
+    from export_jobs import create_jobs_table
+    
+    print("应用迁移 v9: 创建导出任务表...")
+    
+    create_jobs_table(conn.cursor())
+    conn.commit()
+    
+    print("v9 迁移完成")
+
+def apply_migration_v10(conn):
+    """应用版本10迁移 - 问卷变更序列（增量同步）"""
+    from change_feed import seed_changes
+    
+    print("应用迁移 v10: 建立问卷变更序列...")
+    
+    seeded = seed_changes(conn)
+    
+    print(f"v10 迁移完成，共 {seeded} 条问卷")
+
+def apply_migration_v11(conn):
+    """应用版本11迁移 - 提交幂等记录表"""
+    from idempotency import create_submission_keys_table
+    
+    print("应用迁移 v11: 创建提交幂等记录表...")
+    
+    create_submission_keys_table(conn.cursor())
+    conn.commit()
+    
+    print("v11 迁移完成")
+
+def apply_migration_v12(conn):
+    """应用版本12迁移 - 问卷定义表，已有问卷改写为紧凑格式"""
+    from questionnaire_store import compact_existing
+    
+    print("应用迁移 v12: 建立问卷定义表并去除重复的题目结构...")
+    
+    stats = compact_existing(conn)
+    saved = stats['bytes_before'] - stats['bytes_after'] - stats['definition_bytes']
+    ratio = saved / stats['bytes_before'] * 100 if stats['bytes_before'] else 0
+    
+    print(f"共 {stats['rows']} 条问卷，改写 {stats['compacted']} 条，"
+          f"已是紧凑格式 {stats['already_compact']} 条，无法拆分保持原格式 {stats['unchanged']} 条")
+    print(f"问卷定义 {stats['definitions']} 个，{stats['definition_bytes'] / 1024:.1f} KB")
+    print(f"data 列 {stats['bytes_before'] / 1024:.1f} KB -> {stats['bytes_after'] / 1024:.1f} KB，"
+          f"扣除问卷定义后节省 {saved / 1024:.1f} KB（{ratio:.1f}%）")
+    print("v12 迁移完成（执行 VACUUM 后数据库文件才会缩小）")
+
+def apply_migration_v13(conn):
+    """应用版本13迁移 - 存储压缩字典表（已有数据不改写，需要时使用 --recompress）"""
+    from storage_codec import create_dictionaries_table
+    
+    print("应用迁移 v13: 创建存储压缩字典表...")
+    
+    create_dictionaries_table(conn.cursor())
+    conn.commit()
+    
+    print("v13 迁移完成")
+
+def apply_migration_v14(conn):
+    """应用版本14迁移 - 用户身份缓存的代次计数表及 users 表触发器"""
+    from user_cache import create_user_cache_schema
+    
+    print("应用迁移 v14: 创建用户缓存代次表...")
+    
+    create_user_cache_schema(conn.cursor())
+    conn.commit()
+    
+    print("v14 迁移完成")
+
+def recompress_storage(db_path, codec, level=None, train=True):
+    """按指定压缩算法改写已有问卷的 data / report_data 列（none 表示还原为 JSON 文本）"""
+    from storage_codec import configure, recompress, format_recompress_stats
+    
+    try:
+        configure(database_path=db_path)
+        with sqlite3.connect(db_path) as conn:
+            stats = recompress(conn, codec, level=level, train=train)
+        print(format_recompress_stats(stats))
+        print("存储格式改写完成（执行 VACUUM 后数据库文件才会缩小）")
+        return True
+    except Exception as e:
+        print(f"存储格式改写失败: {e}")
+        return False
+
+def storage_report(db_path):
+    """输出问卷存储报告：各类型问卷的完整格式大小与实际占用"""
+    from questionnaire_store import format_storage_report, storage_report as build_storage_report
+    
+    try:
+        with sqlite3.connect(db_path) as conn:
+            report, definitions = build_storage_report(conn)
+        print(format_storage_report(report, definitions))
+        return True
+    except Exception as e:
+        print(f"生成存储报告失败: {e}")
+        return False
+
+def rebuild_statistics(db_path):
+    """根据明细数据重新计算统计汇总表"""
+    from stats_rollup import rebuild_rollups
+    
+    try:
+        with sqlite3.connect(db_path) as conn:
+            rows = rebuild_rollups(conn)
+        print(f"统计汇总表重建完成，共 {rows} 条汇总记录")
+        return True
+    except Exception as e:
+        print(f"统计汇总表重建失败: {e}")
+        return False
+
 # 迁移函数映射
 MIGRATIONS = {
     1: apply_migration_v1,
     2: apply_migration_v2,
     3: apply_migration_v3,
+    4: apply_migration_v4,
+    5: apply_migration_v5,
+    6: apply_migration_v6,
+    7: apply_migration_v7,
+    8: apply_migration_v8,
+    9: apply_migration_v9,
+    10: apply_migration_v10,
+    11: apply_migration_v11,
+    12: apply_migration_v12,
+    13: apply_migration_v13,
+    14: apply_migration_v14,
 }
 
 CURRENT_VERSION = max(MIGRATIONS.keys())
@@ -245,6 +482,7 @@ def create_admin_user(db_path, username, password):
     """创建管理员用户"""
     try:
         import bcrypt
+        from user_cache import create_user_cache_schema
         
         with sqlite3.connect(db_path) as conn:
             cursor = conn.cursor()
@@ -255,6 +493,9 @@ def create_admin_user(db_path, username, password):
                 print(f"用户 {username} 已存在")
                 return False
             
+            # 确保 users 表的变更触发器存在：新增用户会递增代次，运行中的各进程清空用户身份缓存
+            create_user_cache_schema(cursor)
+            
             # 创建用户
             password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
             cursor.execute(
@@ -279,6 +520,12 @@ def main():
     parser.add_argument('--admin-username', default='admin', help='管理员用户名')
     parser.add_argument('--admin-password', help='管理员密码')
     parser.add_argument('--check-version', action='store_true', help='检查数据库版本')
+    parser.add_argument('--rebuild-search-index', action='store_true', help='重建问卷全文检索索引')
+    parser.add_argument('--rebuild-statistics', action='store_true', help='重建统计汇总表')
+    parser.add_argument('--storage-report', action='store_true', help='输出问卷存储报告')
+    parser.add_argument('--recompress', choices=['none', 'zlib', 'zstd'], help='按指定压缩算法改写已有问卷（none 表示不压缩）')
+    parser.add_argument('--compression-level', type=int, help='压缩级别（默认使用算法默认值）')
+    parser.add_argument('--no-dictionary', action='store_true', help='改写时不训练压缩字典')
     
     args = parser.parse_args()
     
@@ -288,6 +535,19 @@ def main():
         print(f"最新版本: {CURRENT_VERSION}")
         return
     
+    if args.rebuild_search_index:
+        sys.exit(0 if rebuild_search(args.db_path) else 1)
+    
+    if args.rebuild_statistics:
+        sys.exit(0 if rebuild_statistics(args.db_path) else 1)
+    
+    if args.storage_report:
+        sys.exit(0 if storage_report(args.db_path) else 1)
+    
+    if args.recompress:
+        sys.exit(0 if recompress_storage(args.db_path, args.recompress, args.compression_level,
+                                         not args.no_dictionary) else 1)
+    
     if args.create_admin:
         if not args.admin_password:
             import getpass
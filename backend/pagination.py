@@ -0,0 +1,94 @@
+"""
+分页工具模块
+提供基于 (排序字段, id) 的游标分页（keyset pagination）和可选的总数统计，
+深分页时不再需要 OFFSET 扫描前面的所有行
+"""
+
+import json
+import time
+import base64
+import threading
+
+
+# 总数统计方式
+COUNT_EXACT = 'exact'        # 每次精确 COUNT(*)
+COUNT_ESTIMATE = 'estimate'  # 使用短时间缓存的 COUNT(*) 结果
+COUNT_NONE = 'none'          # 不统计总数
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATE, COUNT_NONE)
+
+DEFAULT_COUNT_CACHE_TTL = 30  # 秒
+
+
+class CursorError(ValueError):
+    """游标无效或与当前查询条件不匹配"""
+
+
+def encode_cursor(sort_by, sort_order, value, row_id):
+    """把最后一行的排序值编码为不透明游标"""
+    payload = json.dumps(
+        {'s': sort_by, 'o': sort_order, 'v': value, 'id': row_id},
+        ensure_ascii=False, separators=(',', ':'), default=str
+    )
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, sort_by, sort_order):
+    """解析游标，返回 (排序值, id)"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        value, row_id = payload['v'], int(payload['id'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise CursorError(f'无效的分页游标: {e}')
+
+    if payload.get('s') != sort_by or payload.get('o') != sort_order:
+        raise CursorError('分页游标与当前排序条件不一致，请从第一页重新查询')
+    return value, row_id
+
+
+def keyset_condition(sort_column, id_column, sort_order, value, row_id):
+    """生成“位于游标之后”的 WHERE 条件和参数
+
+    排序规则为 ORDER BY sort_column {order}, id_column {order}。
+    使用行值比较 (sort_column, id_column) < (?, ?)，SQLite 可以直接在索引中定位到游标位置（SEARCH），
+    不会从头扫描索引；排序列必须不含 NULL（NULL 与任何值比较都不成立），含 NULL 的列不支持游标分页
+    """
+    op = '<' if sort_order == 'desc' else '>'
+    if sort_column == id_column:
+        return f"{id_column} {op} ?", [row_id]
+
+    if value is None:
+        raise CursorError('分页游标缺少排序值，请从第一页重新查询')
+    return f"({sort_column}, {id_column}) {op} (?, ?)", [value, row_id]
+
+
+class CountCache:
+    """COUNT(*) 结果的短时间缓存，用于 count=estimate"""
+
+    def __init__(self, ttl=DEFAULT_COUNT_CACHE_TTL, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get_or_compute(self, key, compute):
+        """返回 (总数, 是否来自缓存)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[1] < self.ttl:
+                return entry[0], True
+
+        count = compute()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # 先清理过期项，仍然太多则整体清空
+                self._entries = {k: v for k, v in self._entries.items() if now - v[1] < self.ttl}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (count, now)
+        return count, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
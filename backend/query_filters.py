@@ -0,0 +1,49 @@
+"""
+查询条件构建模块
+把按天的日期筛选转换为对时间戳列的半开区间 [开始日期, 结束日期 + 1天)，
+避免在 WHERE 中使用 DATE(created_at) 导致无法使用 created_at 索引
+"""
+
+from datetime import datetime, date, timedelta
+
+
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def parse_day(value):
+    """解析 YYYY-MM-DD 格式的日期，格式错误时抛出 ValueError"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value).strip()[:10], DATE_FORMAT).date()
+    except ValueError:
+        raise ValueError(f'日期格式错误: {value}，应为 YYYY-MM-DD')
+
+
+def date_range_filter(column, date_from=None, date_to=None):
+    """生成按天筛选的条件列表和参数
+
+    date_from / date_to 均为包含在内的日期，生成的条件为
+    column >= 'date_from' AND column < 'date_to 的下一天'
+    时间戳以 'YYYY-MM-DD ...' 开头存储，按字符串比较即可命中索引
+    """
+    conditions = []
+    params = []
+
+    if date_from:
+        conditions.append(f"{column} >= ?")
+        params.append(parse_day(date_from).strftime(DATE_FORMAT))
+
+    if date_to:
+        conditions.append(f"{column} < ?")
+        params.append((parse_day(date_to) + timedelta(days=1)).strftime(DATE_FORMAT))
+
+    return conditions, params
+
+
+def day_filter(column, day):
+    """生成筛选某一天的条件（等价于 DATE(column) = day）"""
+    conditions, params = date_range_filter(column, day, day)
+    return " AND ".join(conditions), params
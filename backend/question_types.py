@@ -452,13 +452,20 @@ class QuestionTypeProcessor:
                 answered_questions += 1
         
         processed['questions'] = processed_questions
+        self.apply_statistics(processed, total_score, answered_questions)
+        
+        return processed
+    
+    def apply_statistics(self, processed: Dict[str, Any], total_score: float, answered_questions: int) -> None:
+        """根据已处理问题的计分结果更新问卷统计信息"""
+        questions = processed['questions']
         
         # 更新统计信息
         if 'statistics' not in processed:
             processed['statistics'] = {}
         
         # 根据问卷类型决定统计字段
-        questionnaire_type = questionnaire_data.get('type', '')
+        questionnaire_type = processed.get('type', '')
         
         if questionnaire_type == 'frankfurt_scale_selective_mutism':
             # Frankfurt Scale 使用特定的统计字段
@@ -476,8 +483,6 @@ class QuestionTypeProcessor:
             processed['statistics']['completion_rate'] = round(completion_rate, 2)
         else:
             processed['statistics']['completion_rate'] = 0
-        
-        return processed
     
     def validate_questionnaire(self, questionnaire_data: Dict[str, Any]) -> List[str]:
         """验证完整问卷数据"""
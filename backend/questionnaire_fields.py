@@ -0,0 +1,70 @@
+"""
+问卷热点字段提取模块
+在写入时把 data 中常用的基本信息提取到 questionnaires 表的独立列，
+列表查询直接读取这些列，无需再解析 data JSON
+"""
+
+from datetime import datetime
+
+
+# 写入时提取到独立列的字段（列名与 basic_info 中的键名一致）
+HOT_FIELDS = (
+    'name', 'grade', 'submission_date',
+    'gender', 'birthdate',
+    'parent_phone', 'parent_wechat', 'parent_email',
+    'school', 'teacher',
+    'school_name', 'admission_date', 'address', 'filler_name', 'fill_date'
+)
+
+# 字段的其他写法
+FIELD_ALIASES = {
+    'birthdate': ('birthdate', 'birth_date')
+}
+
+
+def _basic_info_sources(data):
+    """按优先级返回可能包含基本信息的字典"""
+    sources = []
+    for key in ('basic_info', 'basicInfo'):
+        value = data.get(key)
+        if isinstance(value, dict) and value:
+            sources.append(value)
+    return sources
+
+
+def extract_hot_fields(data, default_submission_date=None):
+    """从问卷数据中提取热点字段
+
+    依次从 basic_info、basicInfo、顶级字段和 basic_info_ 前缀的顶级字段中查找，
+    找不到的字段返回空字符串（与提交接口原有的写入行为一致）
+    """
+    if not isinstance(data, dict):
+        data = {}
+
+    sources = _basic_info_sources(data)
+    fields = {}
+
+    for field in HOT_FIELDS:
+        keys = FIELD_ALIASES.get(field, (field,))
+        value = None
+
+        for source in sources:
+            for key in keys:
+                if source.get(key):
+                    value = source[key]
+                    break
+            if value:
+                break
+
+        if not value:
+            for key in keys:
+                value = data.get(key) or data.get(f'basic_info_{key}')
+                if value:
+                    break
+
+        fields[field] = value if value else ''
+
+    if not fields['submission_date']:
+        fields['submission_date'] = default_submission_date or datetime.now().strftime('%Y-%m-%d')
+
+    return fields
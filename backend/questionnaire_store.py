@@ -0,0 +1,408 @@
+"""
+问卷定义存储模块
+问卷的题目结构（题干、选项、章节等）按问卷类型和内容哈希在定义表中只保存一份，
+问卷表 data 列只保存基本信息、统计信息、各题的作答（含处理器根据作答计算出的字段）和所引用定义的哈希；
+题干、选项文字等只由题目决定的内容（包括处理器计算字段中的这部分）都保存在定义中。
+读取时把题目模板与作答合并即可还原出与写入时完全相同的问卷文档，不调用问题类型处理器，
+之后修改 question_types.py 也不会改变已保存问卷的读取结果
+"""
+
+import json
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import storage_codec
+from json_codec import dumps as json_dumps, loads as json_loads
+
+
+DEFINITIONS_TABLE = 'questionnaire_definitions'
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 紧凑格式的文档用这两个字段代替 questions
+DEFINITION_KEY = '_definition'
+ANSWERS_KEY = '_answers'
+
+# 题目模板中的保留字段：
+# 问题的全部字段名（按原顺序），不在模板中的字段按顺序取作答值列表中的值
+ANSWER_LAYOUT_KEY = '_answer_keys'
+# question_type_info 的结构 {'keys': 全部键（按原顺序）, 'fixed': 只由题目决定的键和值}，其余键的值保存在作答中
+QUESTION_INFO_KEY = '_question_info'
+# 为 True 时 selected_texts 不保存，读取时按 selected 从 options 中取选项文字
+TEXTS_FROM_OPTIONS_KEY = '_texts_from_options'
+RESERVED_KEYS = (ANSWER_LAYOUT_KEY, QUESTION_INFO_KEY, TEXTS_FROM_OPTIONS_KEY)
+
+# 每次提交各不相同的作答字段
+ANSWER_FIELDS = ('selected', 'answer', 'rating', 'can_speak')
+# 问题类型处理器计算的字段，随作答一起保存（selected_texts、question_type_info 中由题目决定的部分除外）
+DERIVED_FIELDS = (
+    'selected_texts', 'is_multiple_choice', 'choice_mode', 'question_type_info',
+    'answer_length', 'word_count', 'line_count', 'is_empty', 'length_utilization', 'rating_percentage'
+)
+# question_type_info 中只由题目决定的键（题干、题型、选项数量、文本类型、评分范围）
+QUESTION_INFO_TEMPLATE_KEYS = ('type', 'question_text', 'total_options', 'text_type', 'max_length', 'rating_range')
+
+DEFINITION_CACHE_SIZE = 256
+
+_definition_cache = OrderedDict()   # 内容哈希 -> 定义 JSON 文本（定义按内容寻址，不会失效）
+_cache_lock = threading.Lock()
+_database = None
+
+
+def configure(database_path):
+    """设置缓存未命中时读取定义（和压缩字典）的数据库"""
+    global _database
+    _database = database_path
+    storage_codec.configure(database_path=database_path)
+
+
+def create_definitions_table(cursor):
+    """创建问卷定义表（已存在时跳过）"""
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {DEFINITIONS_TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            content_hash TEXT NOT NULL UNIQUE,
+            questions TEXT NOT NULL,
+            question_count INTEGER NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            UNIQUE (type, version)
+        )
+    ''')
+
+
+def definition_hash(questionnaire_type, templates):
+    """问卷定义的内容哈希（包含问卷类型，键排序）"""
+    canonical = json.dumps([questionnaire_type, templates], sort_keys=True, default=str,
+                           ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _option_texts(options, selected):
+    """按 selected 中的值依次取对应选项的文字，无法确定时返回 None"""
+    if not isinstance(options, list) or not isinstance(selected, list):
+        return None
+    texts = []
+    for value in selected:
+        for option in options:
+            if isinstance(option, dict) and option.get('value') == value:
+                texts.append(option.get('text', ''))
+                break
+    return texts
+
+
+def _rebuild_question(template, values):
+    """合并题目模板和作答值列表（只依赖模板中记录的结构，不依赖当前代码中的字段分类）"""
+    layout = template.get(ANSWER_LAYOUT_KEY)
+    if layout is None:
+        return dict(template)
+    info = template.get(QUESTION_INFO_KEY)
+    texts_from_options = template.get(TEXTS_FROM_OPTIONS_KEY, False)
+
+    values = iter(values)
+    question = {}
+    for key in layout:
+        if key in template:
+            question[key] = template[key]
+        elif key == 'selected_texts' and texts_from_options:
+            question[key] = None   # 占位保持字段顺序，作答合并完成后再取选项文字
+        elif key == 'question_type_info' and info is not None:
+            fixed = info['fixed']
+            row_values = iter(next(values))
+            question[key] = {k: fixed[k] if k in fixed else next(row_values) for k in info['keys']}
+        else:
+            question[key] = next(values)
+    if texts_from_options:
+        question['selected_texts'] = _option_texts(question.get('options'), question.get('selected'))
+    return question
+
+
+def _split_question(question):
+    """拆分为 (题目模板, 作答值列表)
+
+    字段顺序记录在模板中（同一问卷的各次提交共用）；selected_texts 与选项文字一致时不保存，
+    question_type_info 只保存随作答变化的值。合并结果与原问题不完全一致时（包括字段顺序），
+    改为按原样保存全部作答字段
+    """
+    template = {k: v for k, v in question.items() if k not in ANSWER_FIELDS and k not in DERIVED_FIELDS}
+    keys = [k for k in question if k in ANSWER_FIELDS or k in DERIVED_FIELDS]
+    if not keys:
+        return template, []
+    template[ANSWER_LAYOUT_KEY] = list(question)
+    plain = [question[k] for k in keys]
+
+    compact_template = dict(template)
+    info = question.get('question_type_info')
+    if isinstance(info, dict):
+        compact_template[QUESTION_INFO_KEY] = {
+            'keys': list(info),
+            'fixed': {k: v for k, v in info.items() if k in QUESTION_INFO_TEMPLATE_KEYS}
+        }
+    if 'selected_texts' in question and \
+            _option_texts(question.get('options'), question.get('selected')) == question['selected_texts']:
+        compact_template[TEXTS_FROM_OPTIONS_KEY] = True
+    if len(compact_template) == len(template):
+        return template, plain
+
+    values = []
+    for key in keys:
+        if key == 'selected_texts' and TEXTS_FROM_OPTIONS_KEY in compact_template:
+            continue
+        if key == 'question_type_info' and QUESTION_INFO_KEY in compact_template:
+            values.append([v for k, v in info.items() if k not in QUESTION_INFO_TEMPLATE_KEYS])
+        else:
+            values.append(question[key])
+
+    rebuilt = _rebuild_question(compact_template, values)
+    if rebuilt != question or list(rebuilt) != list(question) or \
+            (isinstance(info, dict) and list(rebuilt['question_type_info']) != list(info)):
+        return template, plain
+    return compact_template, values
+
+
+def compact_document(data):
+    """把完整问卷文档拆分为 (紧凑文档, 问卷定义)
+
+    问卷定义为 {'type', 'content_hash', 'questions'}，需要在写入问卷的同一事务中用 store_definition 保存；
+    无法无损拆分的文档（没有问题列表、未知的题目格式等）原样返回，定义为 None
+    """
+    if not isinstance(data, dict) or DEFINITION_KEY in data:
+        return data, None
+    questions = data.get('questions')
+    if not isinstance(questions, list) or not questions:
+        return data, None
+
+    templates = []
+    answers = []
+    for question in questions:
+        if not isinstance(question, dict) or any(key in question for key in RESERVED_KEYS):
+            return data, None
+        template, answer = _split_question(question)
+        templates.append(template)
+        answers.append(answer)
+
+    questionnaire_type = data.get('type', '')
+    content_hash = definition_hash(questionnaire_type, templates)
+
+    # 保持顶层字段顺序，questions 的位置换成定义哈希和作答
+    document = {}
+    for key, value in data.items():
+        if key == 'questions':
+            document[DEFINITION_KEY] = content_hash
+            document[ANSWERS_KEY] = answers
+        else:
+            document[key] = value
+    return document, {'type': questionnaire_type, 'content_hash': content_hash, 'questions': templates}
+
+
+def store_definition(cursor, definition):
+    """保存问卷定义（已存在时跳过），返回是否新增
+
+    新定义的版本号为该类型当前最大版本 + 1，在同一条语句中计算；调用方应已持有写锁（BEGIN IMMEDIATE），
+    否则并发写入同类型的不同新定义时可能得到相同的版本号
+    """
+    text = json_dumps(definition['questions'])
+    cursor.execute(f'''
+        INSERT INTO {DEFINITIONS_TABLE} (type, version, content_hash, questions, question_count, created_at)
+        SELECT ?, COALESCE(MAX(version), 0) + 1, ?, ?, ?, ? FROM {DEFINITIONS_TABLE} WHERE type = ?
+        ON CONFLICT(content_hash) DO NOTHING
+    ''', (definition['type'], definition['content_hash'], text, len(definition['questions']),
+          datetime.now().strftime(TIMESTAMP_FORMAT), definition['type']))
+    _remember_definition(definition['content_hash'], text)
+    return cursor.rowcount > 0
+
+
+def dump_document(cursor, data):
+    """写入问卷前调用：保存问卷定义，返回 data 列的值（能拆分时为紧凑格式，启用存储压缩时为压缩后的 bytes）"""
+    document, definition = compact_document(data)
+    if definition is not None:
+        store_definition(cursor, definition)
+    text = json_dumps(document)
+    return storage_codec.encode(text, 'data', data.get('type', '') if isinstance(data, dict) else '', cursor)
+
+
+def _remember_definition(content_hash, text):
+    with _cache_lock:
+        _definition_cache[content_hash] = text
+        _definition_cache.move_to_end(content_hash)
+        while len(_definition_cache) > DEFINITION_CACHE_SIZE:
+            _definition_cache.popitem(last=False)
+
+
+def _definition_text(content_hash, conn=None):
+    with _cache_lock:
+        text = _definition_cache.get(content_hash)
+        if text is not None:
+            _definition_cache.move_to_end(content_hash)
+            return text
+
+    query = f"SELECT questions FROM {DEFINITIONS_TABLE} WHERE content_hash = ?"
+    if conn is not None:
+        row = conn.execute(query, (content_hash,)).fetchone()
+    elif _database:
+        with sqlite3.connect(_database) as own_conn:
+            row = own_conn.execute(query, (content_hash,)).fetchone()
+    else:
+        row = None
+    if row is None:
+        raise LookupError(f'问卷定义不存在: {content_hash}')
+
+    _remember_definition(content_hash, row[0])
+    return row[0]
+
+
+def expand_document(document, conn=None):
+    """还原完整问卷文档；完整格式的文档原样返回
+
+    conn 为可选的数据库连接（不要传入正在迭代结果的游标），缓存未命中时用于读取定义
+    """
+    if not isinstance(document, dict) or DEFINITION_KEY not in document:
+        return document
+
+    # 每次解析出新的模板对象，调用方修改还原后的文档不会影响缓存
+    templates = json_loads(_definition_text(document[DEFINITION_KEY], conn))
+    answers = document.get(ANSWERS_KEY) or []
+
+    data = {}
+    for key, value in document.items():
+        if key == DEFINITION_KEY:
+            data['questions'] = [_rebuild_question(template, answer) for template, answer in zip(templates, answers)]
+        elif key != ANSWERS_KEY:
+            data[key] = value
+    return data
+
+
+def load_document(text, conn=None):
+    """解析 data 列并还原完整问卷文档（同时接受已解析的字典）；压缩保存的值在这里才解压"""
+    if isinstance(text, (str, bytes)):
+        text = json_loads(storage_codec.decode(text, conn))
+    return expand_document(text, conn)
+
+
+def _data_bytes(text):
+    return len(text.encode('utf-8')) if isinstance(text, str) else len(text or b'')
+
+
+def compact_existing(conn, batch_size=500):
+    """把已有问卷改写为紧凑格式（相同的题目结构只保存一份定义），返回统计信息
+
+    内容不变，因此改写期间暂时移除变更序列的 UPDATE 触发器，避免所有问卷被增量同步视为已修改
+    """
+    from change_feed import suspend_update_trigger, restore_update_trigger
+
+    cursor = conn.cursor()
+    if not conn.in_transaction:
+        cursor.execute("BEGIN IMMEDIATE")
+    create_definitions_table(cursor)
+    had_change_trigger = suspend_update_trigger(cursor)
+
+    stats = {'rows': 0, 'compacted': 0, 'already_compact': 0, 'unchanged': 0, 'bytes_before': 0, 'bytes_after': 0}
+    last_id = 0
+    while True:
+        cursor.execute("SELECT id, type, data FROM questionnaires WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        updates = []
+        for row_id, questionnaire_type, text in rows:
+            size = _data_bytes(text)
+            stats['rows'] += 1
+            stats['bytes_before'] += size
+            try:
+                parsed = json_loads(storage_codec.decode(text, conn))
+                document, definition = compact_document(parsed)
+            except (TypeError, ValueError):
+                parsed, definition = None, None
+            if definition is None:
+                if isinstance(parsed, dict) and DEFINITION_KEY in parsed:
+                    stats['already_compact'] += 1
+                else:
+                    stats['unchanged'] += 1
+                stats['bytes_after'] += size
+                continue
+
+            store_definition(cursor, definition)
+            compact_text = json_dumps(document)
+            if storage_codec.is_encoded(text):
+                compact_text = storage_codec.encode(compact_text, 'data', questionnaire_type, cursor)
+            updates.append((compact_text, row_id))
+            stats['compacted'] += 1
+            stats['bytes_after'] += _data_bytes(compact_text)
+
+        cursor.executemany("UPDATE questionnaires SET data = ? WHERE id = ?", updates)
+        last_id = rows[-1][0]
+
+    restore_update_trigger(cursor, had_change_trigger)
+    conn.commit()
+
+    stats.update(definition_stats(cursor))
+    return stats
+
+
+def definition_stats(cursor):
+    """定义表的数量和占用字节数"""
+    cursor.execute(f"SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(questions AS BLOB))), 0) FROM {DEFINITIONS_TABLE}")
+    count, size = cursor.fetchone()
+    return {'definitions': count, 'definition_bytes': size}
+
+
+def storage_report(conn, batch_size=500):
+    """按问卷类型统计 data 列的实际大小与还原为完整格式后的大小"""
+    cursor = conn.cursor()
+    report = {}
+    last_id = 0
+    while True:
+        cursor.execute("SELECT id, type, data FROM questionnaires WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        for row_id, questionnaire_type, text in rows:
+            entry = report.setdefault(questionnaire_type, {'rows': 0, 'compact_rows': 0, 'compressed_rows': 0,
+                                                           'stored_bytes': 0, 'full_bytes': 0})
+            size = _data_bytes(text)
+            entry['rows'] += 1
+            entry['stored_bytes'] += size
+            try:
+                if storage_codec.is_encoded(text):
+                    entry['compressed_rows'] += 1
+                    text = storage_codec.decode(text, conn)
+                    size = _data_bytes(text)
+                document = json_loads(text)
+                if isinstance(document, dict) and DEFINITION_KEY in document:
+                    entry['compact_rows'] += 1
+                    size = _data_bytes(json_dumps(expand_document(document, conn)))
+            except (TypeError, ValueError, LookupError):
+                pass
+            entry['full_bytes'] += size
+        last_id = rows[-1][0]
+    stats = definition_stats(cursor)
+    try:
+        cursor.execute(f"SELECT COUNT(*), COALESCE(SUM(LENGTH(dictionary)), 0) FROM {storage_codec.DICTIONARIES_TABLE}")
+        stats['dictionaries'], stats['dictionary_bytes'] = cursor.fetchone()
+    except sqlite3.OperationalError:
+        stats['dictionaries'], stats['dictionary_bytes'] = 0, 0
+    return report, stats
+
+
+def format_storage_report(report, definitions):
+    """存储报告的文本形式"""
+    lines = [f"{'问卷类型':<36}{'问卷数':>8}{'紧凑格式':>10}{'压缩保存':>10}{'完整大小(KB)':>14}{'实际大小(KB)':>14}"]
+    total_full = total_stored = 0
+    for questionnaire_type, entry in sorted(report.items()):
+        total_full += entry['full_bytes']
+        total_stored += entry['stored_bytes']
+        lines.append(f"{questionnaire_type:<36}{entry['rows']:>8}{entry['compact_rows']:>10}{entry['compressed_rows']:>10}"
+                     f"{entry['full_bytes'] / 1024:>14.1f}{entry['stored_bytes'] / 1024:>14.1f}")
+    total_stored += definitions['definition_bytes'] + definitions.get('dictionary_bytes', 0)
+    saved = total_full - total_stored
+    ratio = (saved / total_full * 100) if total_full else 0
+    lines.append(f"问卷定义: {definitions['definitions']} 个，{definitions['definition_bytes'] / 1024:.1f} KB")
+    if definitions.get('dictionaries'):
+        lines.append(f"压缩字典: {definitions['dictionaries']} 个，{definitions['dictionary_bytes'] / 1024:.1f} KB")
+    lines.append(f"合计: 完整格式 {total_full / 1024:.1f} KB，实际占用 {total_stored / 1024:.1f} KB（含定义和字典），"
+                 f"节省 {saved / 1024:.1f} KB（{ratio:.1f}%）")
+    return '\n'.join(lines)
@@ -0,0 +1,154 @@
+"""
+系统资源后台采样模块
+每个进程一个后台线程定时采集 CPU、内存、磁盘使用情况并保留最近的历史记录，
+性能监控接口直接返回最新快照，不再在请求中阻塞等待 cpu_percent(interval=1)
+"""
+
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:  # psutil 为可选依赖
+    psutil = None
+
+
+# 默认参数（可在 config.py / config_production.py 中覆盖）
+DEFAULT_SAMPLE_INTERVAL = 5.0     # 秒
+DEFAULT_HISTORY_SIZE = 120        # 保留的采样条数
+
+
+class ResourceSampler:
+    """系统资源采样器
+
+    - 后台线程每隔 interval 秒采样一次，CPU 使用率为两次采样之间的平均值（不阻塞）
+    - 最近 history_size 次采样保存在内存中，供接口直接返回
+    - 检测到进程 fork（gunicorn preload_app）后在子进程中重新启动采样线程
+    """
+
+    def __init__(self, disk_path, interval=DEFAULT_SAMPLE_INTERVAL, history_size=DEFAULT_HISTORY_SIZE):
+        self.disk_path = disk_path or '/'
+        self.interval = max(float(interval), 0.1)
+        self.history_size = max(int(history_size), 1)
+
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=self.history_size)
+        self._thread = None
+        self._stopping = threading.Event()
+        self._pid = os.getpid()
+        self.samples = 0
+        self.failed = 0
+
+    @property
+    def available(self):
+        return psutil is not None
+
+    def start(self):
+        """按需启动采样线程（fork 之后父进程的线程不会被继承）"""
+        if not self.available:
+            return
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._history = deque(maxlen=self.history_size)
+                self._thread = None
+                self._stopping = threading.Event()
+                self._pid = os.getpid()
+                self.samples = self.failed = 0
+
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                # 第一次调用 cpu_percent(None) 只建立基准，之后每次返回距上次调用的平均值
+                psutil.cpu_percent(interval=None)
+                self._thread = threading.Thread(
+                    target=self._run, name='resource-sampler', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        stopping = self._stopping
+        # 首次采样稍微提前，避免接口长时间没有数据
+        wait = min(self.interval, 1.0)
+        while not stopping.wait(wait):
+            try:
+                self.sample()
+            except Exception as e:
+                self.failed += 1
+                print(f"系统资源采样失败: {e}")
+            wait = self.interval
+
+    def sample(self):
+        """立即采样一次并加入历史记录（CPU 使用率为距上次调用 cpu_percent 的平均值，由采样线程调用）"""
+        snapshot = self._snapshot(round(psutil.cpu_percent(interval=None), 1))
+        with self._lock:
+            self._history.append(snapshot)
+            self.samples += 1
+        return snapshot
+
+    def _snapshot(self, cpu_percent):
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'cpu_percent': cpu_percent,
+            'memory': {
+                'total_gb': round(memory.total / (1024**3), 2),
+                'available_gb': round(memory.available / (1024**3), 2),
+                'percent': round(memory.percent, 1)
+            },
+            'disk': {
+                'total_gb': round(disk.total / (1024**3), 2),
+                'free_gb': round(disk.free / (1024**3), 2),
+                'percent': round((disk.used / disk.total) * 100, 1)
+            }
+        }
+
+    def latest(self):
+        """最新一次采样结果
+
+        采样线程还没有完成第一次采样时，CPU 基准刚刚建立，此时读取的使用率没有意义：
+        返回当前的内存和磁盘使用情况，cpu_percent 为 None 并标记 warming_up（不加入历史记录，
+        也不调用 cpu_percent，以免缩短采样线程第一次采样的统计区间）
+        """
+        self.start()
+        with self._lock:
+            if self._history:
+                return self._history[-1]
+        snapshot = self._snapshot(None)
+        snapshot['warming_up'] = True
+        return snapshot
+
+    def history(self, limit=None):
+        """最近的采样历史（按时间先后），只包含百分比以减小响应体积"""
+        with self._lock:
+            snapshots = list(self._history)
+        if limit is not None:
+            snapshots = snapshots[-limit:] if limit > 0 else []
+        return [
+            {
+                'timestamp': s['timestamp'],
+                'cpu_percent': s['cpu_percent'],
+                'memory_percent': s['memory']['percent'],
+                'disk_percent': s['disk']['percent']
+            }
+            for s in snapshots
+        ]
+
+    def stop(self, timeout=1.0):
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout)
+
+    def stats(self):
+        return {
+            'interval': self.interval,
+            'history_size': self.history_size,
+            'samples': self.samples,
+            'failed': self.failed,
+            'running': self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+        }
@@ -0,0 +1,208 @@
+"""
+问卷全文检索模块（SQLite FTS5）
+索引姓名、学校、老师、填写人、问卷类型、年级以及填空题答案，
+中文按相邻两字切分为二元词（bigram），由写入路径同步维护索引
+"""
+
+import re
+import html
+
+
+FTS_TABLE = 'questionnaires_fts'
+
+# 索引列（顺序与 bm25 权重一一对应），content 为原文，只用于生成摘要
+FTS_COLUMNS = ('name', 'school', 'teacher', 'filler_name', 'type', 'grade', 'answers')
+CONTENT_COLUMNS = ('name', 'school', 'teacher', 'filler_name', 'answers')
+BM25_WEIGHTS = (10.0, 4.0, 4.0, 4.0, 1.0, 1.0, 2.0, 0.0)
+
+SNIPPET_RADIUS = 20       # 摘要中命中词前后保留的字符数
+SNIPPET_MARK = ('<mark>', '</mark>')
+
+_CJK = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'  # 中日韩统一表意文字
+_TOKEN_RE = re.compile(rf'[{_CJK}]+|[^\W_{_CJK}]+')
+_CJK_RE = re.compile(rf'[{_CJK}]+')
+
+
+def create_search_table(cursor):
+    """创建全文检索虚拟表（已存在时跳过）"""
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            {', '.join(FTS_COLUMNS)},
+            content UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    ''')
+
+
+def tokenize(text):
+    """把文本转换为空格分隔的词：中文连续字符切成二元词，其他按单词小写"""
+    if not text:
+        return ''
+    tokens = []
+    for run in _TOKEN_RE.findall(str(text)):
+        if _CJK_RE.fullmatch(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run.lower())
+    return ' '.join(tokens)
+
+
+def extract_text_answers(data):
+    """提取所有填空题（text_input）的答案"""
+    answers = []
+
+    def visit(questions):
+        if isinstance(questions, dict):
+            questions = questions.values()
+        for question in questions or []:
+            if not isinstance(question, dict):
+                continue
+            if question.get('type') == 'text_input':
+                answer = question.get('answer')
+                if answer and str(answer).strip():
+                    answers.append(str(answer).strip())
+            elif isinstance(question.get('questions'), (list, dict)):
+                # 分组结构的问卷
+                visit(question['questions'])
+
+    if isinstance(data, dict):
+        visit(data.get('questions'))
+    return answers
+
+
+def build_document(fields, data, questionnaire_type=''):
+    """生成一条索引记录 (索引列..., 原文)"""
+    values = {
+        'name': fields.get('name') or '',
+        'school': fields.get('school') or fields.get('school_name') or '',
+        'teacher': fields.get('teacher') or '',
+        'filler_name': fields.get('filler_name') or '',
+        'type': questionnaire_type or '',
+        'grade': fields.get('grade') or '',
+        'answers': '\n'.join(extract_text_answers(data))
+    }
+    content = '\n'.join(str(values[c]) for c in CONTENT_COLUMNS if values[c])
+    return [tokenize(values[c]) for c in FTS_COLUMNS] + [content]
+
+
+def index_questionnaire(cursor, questionnaire_id, fields, data, questionnaire_type=''):
+    """写入或更新一条问卷的索引（与问卷写入在同一事务中执行）"""
+    cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = ?", (questionnaire_id,))
+    document = build_document(fields, data, questionnaire_type)
+    placeholders = ', '.join(['?'] * (len(FTS_COLUMNS) + 2))
+    cursor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}, content) VALUES ({placeholders})",
+        [questionnaire_id] + document
+    )
+
+
+def index_new_questionnaires(cursor, documents):
+    """批量写入新问卷的索引，documents 为 [(问卷ID, build_document() 的结果)]"""
+    placeholders = ', '.join(['?'] * (len(FTS_COLUMNS) + 2))
+    cursor.executemany(
+        f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}, content) VALUES ({placeholders})",
+        [[questionnaire_id] + list(document) for questionnaire_id, document in documents]
+    )
+
+
+def remove_questionnaires(cursor, questionnaire_ids):
+    """从索引中移除问卷（删除问卷时调用）"""
+    ids = list(questionnaire_ids)
+    if not ids:
+        return
+    placeholders = ','.join(['?'] * len(ids))
+    cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", ids)
+
+
+def rebuild_search_index(conn, batch_size=500):
+    """根据 questionnaires 表重建全部索引，返回索引的问卷数量"""
+    from questionnaire_store import load_document
+
+    cursor = conn.cursor()
+    create_search_table(cursor)
+    cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    insert_sql = (
+        f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}, content) "
+        f"VALUES ({', '.join(['?'] * (len(FTS_COLUMNS) + 2))})"
+    )
+    total = 0
+    last_id = 0
+    while True:
+        cursor.execute(
+            """SELECT id, type, data, name, grade, school, school_name, teacher, filler_name
+               FROM questionnaires WHERE id > ? AND deleted_at IS NULL ORDER BY id LIMIT ?""",
+            (last_id, batch_size)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        documents = []
+        for row_id, questionnaire_type, raw, name, grade, school, school_name, teacher, filler_name in rows:
+            try:
+                data = load_document(raw, conn) if raw else {}
+            except (TypeError, ValueError, LookupError):
+                data = {}
+            fields = {
+                'name': name, 'grade': grade, 'school': school, 'school_name': school_name,
+                'teacher': teacher, 'filler_name': filler_name
+            }
+            documents.append([row_id] + build_document(fields, data, questionnaire_type))
+        cursor.executemany(insert_sql, documents)
+        total += len(rows)
+        last_id = rows[-1][0]
+
+    conn.commit()
+    return total
+
+
+def build_match_query(search):
+    """把用户输入转换为 FTS5 MATCH 表达式
+
+    每个空格分隔的关键词转换为一个短语（词之间必须相邻），多个关键词之间为 AND。
+    关键词中含有单个汉字时二元词无法匹配，返回 None，由调用方改用 LIKE 查询
+    """
+    phrases = []
+    for term in search.split():
+        if any(len(run) == 1 for run in _CJK_RE.findall(term)):
+            return None
+        tokens = tokenize(term)
+        if tokens:
+            phrases.append('"' + tokens.replace('"', '""') + '"')
+    return ' '.join(phrases) if phrases else None
+
+
+def make_snippet(content, search, radius=SNIPPET_RADIUS):
+    """在原文中截取第一个命中词附近的文字并高亮所有命中词（已做 HTML 转义）"""
+    if not content:
+        return ''
+    terms = [t for t in search.split() if t]
+    if not terms:
+        return ''
+
+    pattern = re.compile('|'.join(re.escape(t) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    first = pattern.search(content)
+    if first:
+        start = max(first.start() - radius, 0)
+        end = min(first.end() + radius, len(content))
+    else:
+        start, end = 0, min(len(content), radius * 2)
+
+    fragment = content[start:end].replace('\n', ' ')
+    parts = []
+    position = 0
+    for match in pattern.finditer(fragment):
+        parts.append(html.escape(fragment[position:match.start()]))
+        parts.append(SNIPPET_MARK[0] + html.escape(match.group(0)) + SNIPPET_MARK[1])
+        position = match.end()
+    parts.append(html.escape(fragment[position:]))
+
+    snippet = ''.join(parts)
+    if start > 0:
+        snippet = '…' + snippet
+    if end < len(content):
+        snippet += '…'
+    return snippet
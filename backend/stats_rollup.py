@@ -0,0 +1,161 @@
+"""
+统计汇总表模块
+按天、按小时、按类型、按年级维护问卷数量计数，按天维护操作日志数量计数，
+由数据库触发器在插入、修改、（软）删除时增量更新，统计接口只读取汇总表
+"""
+
+
+ROLLUP_TABLE = 'statistics_rollups'
+
+SOURCE_QUESTIONNAIRES = 'questionnaires'
+SOURCE_OPERATION_LOGS = 'operation_logs'
+
+# 维度：总数 / 日期(YYYY-MM-DD) / 小时(YYYY-MM-DD HH) / 问卷类型 / 年级
+DIM_TOTAL = 'total'
+DIM_DAY = 'day'
+DIM_HOUR = 'hour'
+DIM_TYPE = 'type'
+DIM_GRADE = 'grade'
+
+
+def _questionnaire_upserts(row, sign, guard=None):
+    """生成问卷计数增减语句，row 为 NEW 或 OLD，guard 为额外的执行条件"""
+    dimensions = (
+        (DIM_TOTAL, "''", None),
+        (DIM_DAY, f"COALESCE(substr({row}.created_at, 1, 10), '')", None),
+        (DIM_HOUR, f"COALESCE(substr({row}.created_at, 1, 13), '')", None),
+        (DIM_TYPE, f"COALESCE({row}.type, '')", None),
+        (DIM_GRADE, f"{row}.grade", f"{row}.grade IS NOT NULL"),
+    )
+    statements = []
+    for dimension, bucket, condition in dimensions:
+        conditions = [c for c in (guard, condition) if c]
+        statements.append(f"""
+            INSERT INTO {ROLLUP_TABLE} (source, dimension, bucket, count)
+            SELECT '{SOURCE_QUESTIONNAIRES}', '{dimension}', {bucket}, {sign}1
+            WHERE {' AND '.join(conditions) or '1'}
+            ON CONFLICT(source, dimension, bucket) DO UPDATE SET count = count + excluded.count;""")
+    return ''.join(statements)
+
+
+def _log_upserts():
+    statements = []
+    for dimension, bucket in ((DIM_TOTAL, "''"), (DIM_DAY, "COALESCE(substr(NEW.created_at, 1, 10), '')")):
+        statements.append(f"""
+            INSERT INTO {ROLLUP_TABLE} (source, dimension, bucket, count)
+            SELECT '{SOURCE_OPERATION_LOGS}', '{dimension}', {bucket}, 1
+            WHERE 1
+            ON CONFLICT(source, dimension, bucket) DO UPDATE SET count = count + excluded.count;""")
+    return ''.join(statements)
+
+
+# 只统计未删除的问卷：软删除相当于减一，恢复相当于加一
+TRIGGERS = {
+    'trg_rollup_questionnaires_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_questionnaires_insert
+        AFTER INSERT ON questionnaires
+        WHEN NEW.deleted_at IS NULL
+        BEGIN{_questionnaire_upserts('NEW', '')}
+        END""",
+    'trg_rollup_questionnaires_update': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_questionnaires_update
+        AFTER UPDATE OF type, grade, created_at, deleted_at ON questionnaires
+        BEGIN{_questionnaire_upserts('OLD', '-', 'OLD.deleted_at IS NULL')}{_questionnaire_upserts('NEW', '', 'NEW.deleted_at IS NULL')}
+        END""",
+    'trg_rollup_questionnaires_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_questionnaires_delete
+        AFTER DELETE ON questionnaires
+        WHEN OLD.deleted_at IS NULL
+        BEGIN{_questionnaire_upserts('OLD', '-')}
+        END""",
+    'trg_rollup_operation_logs_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_operation_logs_insert
+        AFTER INSERT ON operation_logs
+        BEGIN{_log_upserts()}
+        END""",
+}
+
+
+def create_rollup_schema(cursor):
+    """创建汇总表和维护触发器（已存在时跳过）"""
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+            source TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (source, dimension, bucket)
+        ) WITHOUT ROWID
+    ''')
+    for sql in TRIGGERS.values():
+        cursor.execute(sql)
+
+
+def rebuild_rollups(conn):
+    """根据明细表重新计算全部汇总数据，返回写入的汇总行数"""
+    cursor = conn.cursor()
+    create_rollup_schema(cursor)
+    cursor.execute(f"DELETE FROM {ROLLUP_TABLE}")
+
+    q_dimensions = (
+        (DIM_TOTAL, "''", ''),
+        (DIM_DAY, "COALESCE(substr(created_at, 1, 10), '')", ''),
+        (DIM_HOUR, "COALESCE(substr(created_at, 1, 13), '')", ''),
+        (DIM_TYPE, "COALESCE(type, '')", ''),
+        (DIM_GRADE, "grade", 'AND grade IS NOT NULL'),
+    )
+    for dimension, bucket, condition in q_dimensions:
+        cursor.execute(f'''
+            INSERT INTO {ROLLUP_TABLE} (source, dimension, bucket, count)
+            SELECT '{SOURCE_QUESTIONNAIRES}', '{dimension}', {bucket}, COUNT(*)
+            FROM questionnaires
+            WHERE deleted_at IS NULL {condition}
+            GROUP BY {bucket}
+        ''')
+
+    for dimension, bucket in ((DIM_TOTAL, "''"), (DIM_DAY, "COALESCE(substr(created_at, 1, 10), '')")):
+        cursor.execute(f'''
+            INSERT INTO {ROLLUP_TABLE} (source, dimension, bucket, count)
+            SELECT '{SOURCE_OPERATION_LOGS}', '{dimension}', {bucket}, COUNT(*)
+            FROM operation_logs
+            GROUP BY {bucket}
+        ''')
+
+    conn.commit()
+    cursor.execute(f"SELECT COUNT(*) FROM {ROLLUP_TABLE}")
+    return cursor.fetchone()[0]
+
+
+def read_count(cursor, source, dimension, bucket=''):
+    """读取单个计数"""
+    cursor.execute(
+        f"SELECT count FROM {ROLLUP_TABLE} WHERE source = ? AND dimension = ? AND bucket = ?",
+        (source, dimension, bucket)
+    )
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def read_range_total(cursor, source, dimension, bucket_from, bucket_to=None):
+    """读取 [bucket_from, bucket_to) 范围内的计数之和"""
+    sql = f"SELECT COALESCE(SUM(count), 0) FROM {ROLLUP_TABLE} WHERE source = ? AND dimension = ? AND bucket >= ?"
+    params = [source, dimension, bucket_from]
+    if bucket_to is not None:
+        sql += " AND bucket < ?"
+        params.append(bucket_to)
+    cursor.execute(sql, params)
+    return cursor.fetchone()[0]
+
+
+def read_buckets(cursor, source, dimension, bucket_from=None, bucket_to=None):
+    """读取某个维度下计数大于0的分组，按分组排序，返回 [(bucket, count)]"""
+    sql = f"SELECT bucket, count FROM {ROLLUP_TABLE} WHERE source = ? AND dimension = ? AND count > 0"
+    params = [source, dimension]
+    if bucket_from is not None:
+        sql += " AND bucket >= ?"
+        params.append(bucket_from)
+    if bucket_to is not None:
+        sql += " AND bucket < ?"
+        params.append(bucket_to)
+    cursor.execute(sql + " ORDER BY bucket", params)
+    return [(row[0], row[1]) for row in cursor.fetchall()]
@@ -0,0 +1,324 @@
+"""
+存储压缩模块
+questionnaires 表的 data / report_data 列可选地以压缩后的 BLOB 保存。
+压缩值以格式标记开头，与未压缩的 JSON 文本可以在同一列中共存；只有在读取内容时才解压。
+每种问卷类型可以有各自的压缩字典（zlib 预设字典或 zstd 训练字典），字典只增不改，旧字典始终保留用于解压
+"""
+
+import struct
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+    DECOMPRESS_ERRORS = (zlib.error, zstandard.ZstdError)
+except ImportError:
+    ZSTD_AVAILABLE = False
+    DECOMPRESS_ERRORS = (zlib.error,)
+
+
+DICTIONARIES_TABLE = 'compression_dictionaries'
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 格式标记 + 压缩算法编号（1 字节）+ 字典 ID（4 字节，0 表示不使用字典）；JSON 文本不会以 \x00 开头
+MAGIC = b'\x00QZ'
+_HEADER = struct.Struct('>BI')
+HEADER_SIZE = len(MAGIC) + _HEADER.size
+
+CODEC_NONE = 'none'
+CODEC_ZLIB = 'zlib'
+CODEC_ZSTD = 'zstd'
+CODEC_IDS = {CODEC_ZLIB: 1, CODEC_ZSTD: 2}
+CODEC_NAMES = {value: key for key, value in CODEC_IDS.items()}
+DEFAULT_LEVELS = {CODEC_ZLIB: 6, CODEC_ZSTD: 3}
+
+DEFAULT_MIN_BYTES = 256          # 短于该字节数的值保持文本
+DEFAULT_DICT_SIZE = 16 * 1024
+ZLIB_MAX_DICT_SIZE = 32 * 1024   # zlib 只使用预设字典的最后 32KB
+DEFAULT_SAMPLE_SIZE = 500
+
+COLUMNS = ('data', 'report_data')
+
+_settings = {'codec': CODEC_NONE, 'level': None, 'min_bytes': DEFAULT_MIN_BYTES}
+_database = None
+_lock = threading.Lock()
+_dictionaries = {}   # 字典 ID -> 字典内容（不会修改，永久缓存）
+_active = {}         # (压缩算法, 列名, 问卷类型) -> (字典 ID, 字典内容) 或 None
+
+
+def configure(database_path=None, codec=None, level=None, min_bytes=None):
+    """设置读取字典的数据库和写入时使用的压缩算法；参数为 None 时保持原设置"""
+    global _database
+    if database_path is not None:
+        _database = database_path
+    if codec is not None:
+        codec = (codec or CODEC_NONE).lower()
+        if codec not in (CODEC_NONE,) + tuple(CODEC_IDS):
+            raise ValueError(f'不支持的压缩算法: {codec}')
+        if codec == CODEC_ZSTD and not ZSTD_AVAILABLE:
+            print("警告: 未安装 zstandard，存储压缩改用 zlib")
+            codec = CODEC_ZLIB
+        _settings['codec'] = codec
+    if level is not None:
+        _settings['level'] = level
+    if min_bytes is not None:
+        _settings['min_bytes'] = min_bytes
+
+
+def current_codec():
+    return _settings['codec']
+
+
+def create_dictionaries_table(cursor):
+    """创建压缩字典表（已存在时跳过）"""
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {DICTIONARIES_TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            codec TEXT NOT NULL,
+            column_name TEXT NOT NULL,
+            type TEXT NOT NULL,
+            dictionary BLOB NOT NULL,
+            sample_count INTEGER NOT NULL,
+            created_at TIMESTAMP NOT NULL
+        )
+    ''')
+
+
+def is_encoded(value):
+    return isinstance(value, bytes) and value[:len(MAGIC)] == MAGIC
+
+
+def _compress(codec, level, payload, dictionary):
+    if codec == CODEC_ZSTD:
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdCompressor(level=level, dict_data=dict_data).compress(payload)
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS, 9, zlib.Z_DEFAULT_STRATEGY, dictionary)
+    else:
+        compressor = zlib.compressobj(level)
+    return compressor.compress(payload) + compressor.flush()
+
+
+def _decompress(codec, payload, dictionary):
+    if codec == CODEC_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise LookupError('数据使用 zstd 压缩，需要安装 zstandard')
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(payload)
+    decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+    return decompressor.decompress(payload) + decompressor.flush()
+
+
+def _active_dictionary(cursor, codec, column, questionnaire_type):
+    key = (codec, column, questionnaire_type or '')
+    with _lock:
+        if key in _active:
+            return _active[key]
+
+    try:
+        cursor.execute(f'''
+            SELECT id, dictionary FROM {DICTIONARIES_TABLE}
+            WHERE codec = ? AND column_name = ? AND type = ?
+            ORDER BY id DESC LIMIT 1
+        ''', key)
+        row = cursor.fetchone()
+    except sqlite3.OperationalError:
+        row = None   # 字典表尚未创建
+
+    entry = (row[0], bytes(row[1])) if row else None
+    with _lock:
+        _active[key] = entry
+        if entry:
+            _dictionaries[entry[0]] = entry[1]
+    return entry
+
+
+def encode(text, column='data', questionnaire_type='', cursor=None, codec=None, level=None):
+    """写入前调用：按当前设置压缩 JSON 文本，返回压缩后的 bytes；未启用压缩、值太短或压缩后没有变小时原样返回"""
+    codec = codec or _settings['codec']
+    if codec == CODEC_NONE or not isinstance(text, str):
+        return text
+    payload = text.encode('utf-8')
+    if len(payload) < _settings['min_bytes']:
+        return text
+
+    entry = _active_dictionary(cursor, codec, column, questionnaire_type) if cursor is not None else None
+    dict_id, dictionary = entry if entry else (0, None)
+    level = level if level is not None else (_settings['level'] or DEFAULT_LEVELS[codec])
+
+    encoded = MAGIC + _HEADER.pack(CODEC_IDS[codec], dict_id) + _compress(codec, level, payload, dictionary)
+    return encoded if len(encoded) < len(payload) else text
+
+
+def _dictionary(dict_id, conn=None):
+    with _lock:
+        dictionary = _dictionaries.get(dict_id)
+    if dictionary is not None:
+        return dictionary
+
+    query = f"SELECT dictionary FROM {DICTIONARIES_TABLE} WHERE id = ?"
+    if conn is not None:
+        row = conn.execute(query, (dict_id,)).fetchone()
+    elif _database:
+        with sqlite3.connect(_database) as own_conn:
+            row = own_conn.execute(query, (dict_id,)).fetchone()
+    else:
+        row = None
+    if row is None:
+        raise LookupError(f'压缩字典不存在: {dict_id}')
+
+    dictionary = bytes(row[0])
+    with _lock:
+        _dictionaries[dict_id] = dictionary
+    return dictionary
+
+
+def decode(value, conn=None):
+    """读取列值：压缩值解压为 JSON 文本，其他值原样返回
+
+    conn 为可选的数据库连接（不要传入正在迭代结果的游标），字典不在缓存中时用于读取字典
+    """
+    if not is_encoded(value):
+        return value
+    codec_id, dict_id = _HEADER.unpack_from(value, len(MAGIC))
+    codec = CODEC_NAMES.get(codec_id)
+    if codec is None:
+        raise LookupError(f'未知的压缩格式: {codec_id}')
+    dictionary = _dictionary(dict_id, conn) if dict_id else None
+    try:
+        return _decompress(codec, value[HEADER_SIZE:], dictionary).decode('utf-8')
+    except DECOMPRESS_ERRORS as e:
+        raise ValueError(f'解压失败: {e}') from e
+
+
+def train_dictionary(codec, samples, dict_size=DEFAULT_DICT_SIZE):
+    """用样本训练压缩字典，样本不足或训练失败时返回 None
+
+    zstd 使用 zstandard 的字典训练；zlib 没有训练算法，使用样本拼接成的预设字典，
+    最常见的内容放在末尾（距离越近的引用编码越短）
+    """
+    samples = [sample for sample in samples if sample]
+    if len(samples) < 2:
+        return None
+    if codec == CODEC_ZSTD:
+        try:
+            return zstandard.train_dictionary(dict_size, samples).as_bytes()
+        except zstandard.ZstdError:
+            return None
+
+    dict_size = min(dict_size, ZLIB_MAX_DICT_SIZE)
+    counts = {}
+    for sample in samples:
+        counts[sample] = counts.get(sample, 0) + 1
+    dictionary = b''.join(sorted(counts, key=counts.get))
+    return dictionary[-dict_size:] or None
+
+
+def store_dictionary(cursor, codec, column, questionnaire_type, dictionary, sample_count):
+    """保存新字典并作为该类型之后写入时使用的字典，返回字典 ID"""
+    cursor.execute(f'''
+        INSERT INTO {DICTIONARIES_TABLE} (codec, column_name, type, dictionary, sample_count, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (codec, column, questionnaire_type or '', dictionary, sample_count, datetime.now().strftime(TIMESTAMP_FORMAT)))
+    dict_id = cursor.lastrowid
+    with _lock:
+        _dictionaries[dict_id] = dictionary
+        _active[(codec, column, questionnaire_type or '')] = (dict_id, dictionary)
+    return dict_id
+
+
+def _column_bytes(value):
+    if value is None:
+        return 0
+    return len(value) if isinstance(value, bytes) else len(value.encode('utf-8'))
+
+
+def _sample_rows(cursor, column, questionnaire_type, sample_size, conn):
+    """取该类型最近写入的若干条记录（解压后的内容）作为训练样本"""
+    cursor.execute(f'''
+        SELECT {column} FROM questionnaires
+        WHERE type = ? AND {column} IS NOT NULL
+        ORDER BY id DESC LIMIT ?
+    ''', (questionnaire_type, sample_size))
+    samples = []
+    for (value,) in cursor.fetchall():
+        text = decode(value, conn)
+        samples.append(text.encode('utf-8') if isinstance(text, str) else text)
+    return samples
+
+
+def recompress(conn, codec, level=None, columns=COLUMNS, train=True, dict_size=DEFAULT_DICT_SIZE,
+               sample_size=DEFAULT_SAMPLE_SIZE, batch_size=500):
+    """离线改写已有问卷的存储格式，返回按列统计的改写前后字节数
+
+    codec 为 none 时全部还原为 JSON 文本；train 为 True 时先按问卷类型训练新字典。
+    内容不变，因此改写期间暂时移除变更序列的 UPDATE 触发器
+    """
+    from change_feed import suspend_update_trigger, restore_update_trigger
+
+    if codec == CODEC_ZSTD and not ZSTD_AVAILABLE:
+        raise ValueError('未安装 zstandard，无法使用 zstd 压缩')
+    if codec != CODEC_NONE and codec not in CODEC_IDS:
+        raise ValueError(f'不支持的压缩算法: {codec}')
+
+    cursor = conn.cursor()
+    if not conn.in_transaction:
+        cursor.execute("BEGIN IMMEDIATE")
+    create_dictionaries_table(cursor)
+    had_change_trigger = suspend_update_trigger(cursor)
+
+    stats = {}
+    for column in columns:
+        entry = stats.setdefault(column, {'rows': 0, 'encoded': 0, 'bytes_before': 0, 'bytes_after': 0,
+                                          'dictionaries': 0, 'dictionary_bytes': 0})
+        if codec != CODEC_NONE and train:
+            cursor.execute(f"SELECT DISTINCT type FROM questionnaires WHERE {column} IS NOT NULL")
+            for (questionnaire_type,) in cursor.fetchall():
+                samples = _sample_rows(cursor, column, questionnaire_type, sample_size, conn)
+                dictionary = train_dictionary(codec, samples, dict_size)
+                if dictionary:
+                    store_dictionary(cursor, codec, column, questionnaire_type, dictionary, len(samples))
+                    entry['dictionaries'] += 1
+                    entry['dictionary_bytes'] += len(dictionary)
+
+        last_id = 0
+        while True:
+            cursor.execute(f'''
+                SELECT id, type, {column} FROM questionnaires
+                WHERE id > ? AND {column} IS NOT NULL ORDER BY id LIMIT ?
+            ''', (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            updates = []
+            for row_id, questionnaire_type, value in rows:
+                text = decode(value, conn)
+                new_value = encode(text, column, questionnaire_type, cursor, codec, level) if codec != CODEC_NONE else text
+                entry['rows'] += 1
+                entry['bytes_before'] += _column_bytes(value)
+                entry['bytes_after'] += _column_bytes(new_value)
+                entry['encoded'] += is_encoded(new_value)
+                if new_value != value:
+                    updates.append((new_value, row_id))
+
+            cursor.executemany(f"UPDATE questionnaires SET {column} = ? WHERE id = ?", updates)
+            last_id = rows[-1][0]
+
+    restore_update_trigger(cursor, had_change_trigger)
+    conn.commit()
+    return stats
+
+
+def format_recompress_stats(stats):
+    """改写统计的文本形式"""
+    lines = []
+    for column, entry in stats.items():
+        change = (entry['bytes_after'] / entry['bytes_before'] - 1) * 100 if entry['bytes_before'] else 0
+        lines.append(f"{column}: {entry['rows']} 条，压缩保存 {entry['encoded']} 条，"
+                     f"{entry['bytes_before'] / 1024:.1f} KB -> {entry['bytes_after'] / 1024:.1f} KB（{change:+.1f}%），"
+                     f"新字典 {entry['dictionaries']} 个 {entry['dictionary_bytes'] / 1024:.1f} KB")
+    return '\n'.join(lines)
@@ -0,0 +1,166 @@
+"""
+用户身份缓存模块
+validate_session_integrity 每个请求都要确认会话中的用户仍然存在，并取得最新的用户名和角色。
+这里按用户 ID 在进程内缓存 (id, username, role)，超过 TTL 或容量超限（LRU 淘汰）时重新读取。
+
+users 表的插入、删除和用户名 / 角色修改由触发器递增代次计数（命令行工具、其他工作进程的修改同样生效）；
+各进程每隔 check_interval（不超过 TTL）读取一次代次，发现变化时清空本进程缓存
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+
+GENERATION_TABLE = 'user_cache_generation'
+
+DEFAULT_TTL = 30              # 秒，0 表示不缓存
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_CHECK_INTERVAL = 2.0  # 秒
+
+_BUMP = f"UPDATE {GENERATION_TABLE} SET generation = generation + 1 WHERE id = 1;"
+
+# 登录只更新 last_login，不影响缓存内容，因此 UPDATE 触发器只监听用户名和角色
+TRIGGERS = {
+    'trg_user_cache_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_user_cache_insert
+        AFTER INSERT ON users
+        BEGIN {_BUMP} END""",
+    'trg_user_cache_update': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_user_cache_update
+        AFTER UPDATE OF id, username, role ON users
+        BEGIN {_BUMP} END""",
+    'trg_user_cache_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_user_cache_delete
+        AFTER DELETE ON users
+        BEGIN {_BUMP} END""",
+}
+
+
+def create_user_cache_schema(cursor):
+    """创建代次计数表和 users 表上的触发器（已存在时跳过）"""
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {GENERATION_TABLE} (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute(f"INSERT OR IGNORE INTO {GENERATION_TABLE} (id, generation) VALUES (1, 0)")
+    for sql in TRIGGERS.values():
+        cursor.execute(sql)
+
+
+def bump_generation(cursor):
+    """手动使所有进程的用户缓存失效（触发器之外的修改，例如直接导入 users 表数据后调用）"""
+    cursor.execute(_BUMP)
+
+
+class UserCache:
+    """按用户 ID 缓存用户记录的 TTL + LRU 缓存
+
+    connect 为无参数的可调用对象，返回可用作上下文管理器的数据库连接（如 get_db）
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE, check_interval=DEFAULT_CHECK_INTERVAL):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.check_interval = min(check_interval, ttl) if ttl > 0 else 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # 用户 ID -> (用户记录, 读取时间)
+        self._generation = None
+        self._checked_at = None
+        self._epoch = 0                 # 每次清空缓存时递增，避免把清空前读取的记录写回缓存
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self.invalidations = 0
+        self.generation_changes = 0
+
+    def get(self, user_id, connect):
+        """返回用户记录 {'id', 'username', 'role'}，用户不存在时返回 None（不缓存）"""
+        if self.ttl <= 0:
+            return self._load(user_id, connect)
+
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            self._check_generation(now, connect)
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            if entry is not None:
+                self.expired += 1
+            epoch = self._epoch
+
+        user = self._load(user_id, connect)
+        if user is not None:
+            with self._lock:
+                if epoch == self._epoch:
+                    self._entries[user_id] = (user, now)
+                    self._entries.move_to_end(user_id)
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+                        self.evicted += 1
+        return user
+
+    def _load(self, user_id, connect):
+        with connect() as conn:
+            row = conn.execute("SELECT id, username, role FROM users WHERE id = ?", (user_id,)).fetchone()
+        if row is None:
+            return None
+        return {'id': row[0], 'username': row[1], 'role': row[2]}
+
+    def _check_generation(self, now, connect):
+        try:
+            with connect() as conn:
+                row = conn.execute(f"SELECT generation FROM {GENERATION_TABLE} WHERE id = 1").fetchone()
+        except Exception as e:
+            # 代次表不可用时只依赖 TTL
+            print(f"读取用户缓存代次失败: {e}")
+            row = None
+        generation = row[0] if row else None
+
+        with self._lock:
+            if self._generation is not None and generation != self._generation:
+                self._clear_locked()
+                self.generation_changes += 1
+            self._generation = generation
+            self._checked_at = now
+
+    def _clear_locked(self):
+        self._entries.clear()
+        self._epoch += 1
+
+    def invalidate(self, user_id=None):
+        """清除本进程中指定用户（None 表示全部）的缓存；其他进程通过代次计数在 check_interval 内清除"""
+        with self._lock:
+            if user_id is None:
+                self._clear_locked()
+            else:
+                self._entries.pop(user_id, None)
+                self._epoch += 1
+            self.invalidations += 1
+
+    def stats(self):
+        """返回缓存统计信息"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'ttl': self.ttl,
+                'max_size': self.max_size,
+                'check_interval': self.check_interval,
+                'size': len(self._entries),
+                'generation': self._generation,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'expired': self.expired,
+                'evicted': self.evicted,
+                'invalidations': self.invalidations,
+                'generation_changes': self.generation_changes
+            }
@@ -8,8 +8,40 @@ from marshmallow import EXCLUDE
 from datetime import datetime, date
 import re
 import json
+import threading
 from question_types import question_processor
 
+
+class SchemaRegistry:
+    """
+    Schema 实例注册表：每个 Schema 类在进程内只构造一次
+    构造 Schema 需要深拷贝全部字段并绑定到实例，开销比一次 load 还大；
+    load 不修改 Schema 实例的状态，同一实例可以被多个线程同时使用
+    """
+
+    def __init__(self):
+        self._schemas = {}
+        self._lock = threading.Lock()
+
+    def get(self, schema_class):
+        """返回 schema_class 的共享实例（首次使用时构造，加锁保证只构造一次）"""
+        schema = self._schemas.get(schema_class)
+        if schema is None:
+            with self._lock:
+                schema = self._schemas.get(schema_class)
+                if schema is None:
+                    schema = self._schemas[schema_class] = schema_class()
+        return schema
+
+
+schema_registry = SchemaRegistry()
+
+
+def get_schema(schema_class):
+    """获取 Schema 的共享实例"""
+    return schema_registry.get(schema_class)
+
+
 class BasicInfoSchema(Schema):
     """基本信息验证Schema - 增强版本"""
     name = fields.Str(
@@ -482,89 +514,120 @@ class QuestionnaireSchema(Schema):
         questionnaire_type = data.get('type', '')
         
         for i, question in enumerate(data.get('questions', [])):
-            try:
-                question_type = question.get('type')
-                
-                # 对于Frankfurt Scale问卷，允许更灵活的验证
-                if questionnaire_type == 'frankfurt_scale_selective_mutism':
-                    # Frankfurt Scale问卷的特殊验证
-                    if question_type in ['multiple_choice', 'single_choice']:
-                        # 验证必要字段
-                        if not question.get('question'):
-                            raise ValidationError("问题文本不能为空")
-                        if not question.get('options'):
-                            raise ValidationError("选项不能为空")
-                        # 对于SS部分的问题，允许没有选择（空数组）
-                        if 'selected' not in question:
-                            raise ValidationError("必须有选中答案")
-                        
-                        # 对于DS部分，必须有选择；对于SS部分，允许空选择
-                        section = question.get('section', '')
-                        selected = question.get('selected', [])
-                        if section == 'DS' and not selected:
-                            raise ValidationError("DS部分的问题必须有选择")
-                        
-                        # 验证单选/多选逻辑
-                        if question_type == 'single_choice' and len(selected) > 1:
-                            raise ValidationError(f"第{i+1}题为单选题，不能选择多个答案")
-                        
-                        # SS部分允许空选择，不需要额外验证
-                        
-                        # 验证section字段（Frankfurt Scale特有）
-                        section = question.get('section', '')
-                        valid_sections = ['DS', 'SS_school', 'SS_public', 'SS_home']
-                        if section not in valid_sections:
-                            raise ValidationError(f"无效的section: {section}")
-                        
-                        validated_questions.append(question)
-                    else:
-                        raise ValidationError(f"Frankfurt Scale问卷不支持问题类型: {question_type}")
-                else:
-                    # 标准问卷验证
-                    # 首先使用问题类型处理器进行验证
-                    type_errors = question_processor.validate_question(question)
-                    if type_errors:
-                        raise ValidationError(type_errors)
-                    
-                    # 然后使用Marshmallow Schema进行详细验证
-                    if question_type in ['multiple_choice', 'single_choice']:
-                        schema = MultipleChoiceQuestionSchema()
-                    elif question_type == 'text_input':
-                        schema = TextInputQuestionSchema()
-                    elif question_type == 'rating_scale':
-                        schema = RatingScaleQuestionSchema()
-                    else:
-                        raise ValidationError(f"不支持的问题类型: {question_type}")
-                    
-                    validated_question = schema.load(question)
-                    
-                    # 使用问题类型处理器处理答案数据
-                    processed_question = question_processor.process_question(validated_question)
-                    validated_questions.append(processed_question)
-                
-            except ValidationError as e:
-                # 为错误信息添加问题索引
-                raise ValidationError({f'questions.{i}': e.messages})
+            validated_questions.append(validate_question_item(question, i, questionnaire_type))
         
         data['questions'] = validated_questions
+        validate_questionnaire_statistics(data, questionnaire_type)
         
-        # 验证统计信息（如果是Frankfurt Scale）
-        if questionnaire_type == 'frankfurt_scale_selective_mutism' and data.get('statistics'):
-            try:
-                stats_schema = FrankfurtScaleStatisticsSchema()
-                validated_stats = stats_schema.load(data['statistics'])
-                data['statistics'] = validated_stats
-            except ValidationError as e:
-                raise ValidationError({'statistics': e.messages})
-        
         return data
 
+
+class _QuestionnaireHeaderSchema(QuestionnaireSchema):
+    """只校验问卷顶层字段和基本信息，问题列表由 prepare_questionnaire 逐题校验"""
+    
+    def validate_questions(self, data, **kwargs):
+        # 覆盖后不带 post_load 标记，不再作为钩子执行
+        return data
+
+
+def validate_question_item(question, i, questionnaire_type):
+    """验证单个问题（标准问卷的问题同时由问题类型处理器处理），错误信息带问题索引"""
+    try:
+        question_type = question.get('type')
+        
+        # 对于Frankfurt Scale问卷，允许更灵活的验证
+        if questionnaire_type == 'frankfurt_scale_selective_mutism':
+            # Frankfurt Scale问卷的特殊验证
+            if question_type in ['multiple_choice', 'single_choice']:
+                # 验证必要字段
+                if not question.get('question'):
+                    raise ValidationError("问题文本不能为空")
+                if not question.get('options'):
+                    raise ValidationError("选项不能为空")
+                # 对于SS部分的问题，允许没有选择（空数组）
+                if 'selected' not in question:
+                    raise ValidationError("必须有选中答案")
+                
+                # 对于DS部分，必须有选择；对于SS部分，允许空选择
+                section = question.get('section', '')
+                selected = question.get('selected', [])
+                if section == 'DS' and not selected:
+                    raise ValidationError("DS部分的问题必须有选择")
+                
+                # 验证单选/多选逻辑
+                if question_type == 'single_choice' and len(selected) > 1:
+                    raise ValidationError(f"第{i+1}题为单选题，不能选择多个答案")
+                
+                # SS部分允许空选择，不需要额外验证
+                
+                # 验证section字段（Frankfurt Scale特有）
+                section = question.get('section', '')
+                valid_sections = ['DS', 'SS_school', 'SS_public', 'SS_home']
+                if section not in valid_sections:
+                    raise ValidationError(f"无效的section: {section}")
+                
+                return question
+            else:
+                raise ValidationError(f"Frankfurt Scale问卷不支持问题类型: {question_type}")
+        else:
+            # 标准问卷验证
+            # 首先使用问题类型处理器进行验证
+            type_errors = question_processor.validate_question(question)
+            if type_errors:
+                raise ValidationError(type_errors)
+            
+            # 然后使用Marshmallow Schema进行详细验证
+            if question_type in ['multiple_choice', 'single_choice']:
+                schema_class = MultipleChoiceQuestionSchema
+            elif question_type == 'text_input':
+                schema_class = TextInputQuestionSchema
+            elif question_type == 'rating_scale':
+                schema_class = RatingScaleQuestionSchema
+            else:
+                raise ValidationError(f"不支持的问题类型: {question_type}")
+            
+            validated_question = get_schema(schema_class).load(question)
+            
+            # 使用问题类型处理器处理答案数据
+            processed_question = question_processor.process_question(validated_question)
+            return processed_question
+        
+    except ValidationError as e:
+        # 为错误信息添加问题索引
+        raise ValidationError({f'questions.{i}': e.messages})
+
+
+def validate_questionnaire_statistics(data, questionnaire_type):
+    """验证统计信息（如果是Frankfurt Scale）"""
+    if questionnaire_type == 'frankfurt_scale_selective_mutism' and data.get('statistics'):
+        try:
+            validated_stats = get_schema(FrankfurtScaleStatisticsSchema).load(data['statistics'])
+            data['statistics'] = validated_stats
+        except ValidationError as e:
+            raise ValidationError({'statistics': e.messages})
+
 # 数据标准化函数
 def normalize_questionnaire_data(data):
     """
     标准化问卷数据格式
     确保数据结构符合系统标准
     """
+    normalized = normalize_questionnaire_header(data)
+    
+    # 标准化问题列表
+    questions = data.get('questions', [])
+    normalized['questions'] = []
+    
+    for question in questions:
+        normalized_question = normalize_question_data(question)
+        if normalized_question:
+            normalized['questions'].append(normalized_question)
+    
+    normalize_questionnaire_statistics(normalized, data)
+    return normalized
+
+def normalize_questionnaire_header(data):
+    """标准化问卷类型和基本信息"""
     normalized = {}
     
     # 标准化问卷类型
@@ -641,16 +704,10 @@ def normalize_questionnaire_data(data):
         # 保持age为字符串格式，支持年龄段如'6_11'
         normalized['basic_info']['age'] = str(basic_info['age']).strip()
     
-    # 标准化问题列表
-    questions = data.get('questions', [])
-    normalized['questions'] = []
-    
-    for question in questions:
-        normalized_question = normalize_question_data(question)
-        if normalized_question:
-            normalized['questions'].append(normalized_question)
-    
-    # 标准化统计信息
+    return normalized
+
+def normalize_questionnaire_statistics(normalized, data):
+    """标准化统计信息（写入 normalized['statistics']）"""
     statistics = data.get('statistics', {})
     if statistics:
         questionnaire_type = normalized.get('type', '')
@@ -677,8 +734,6 @@ def normalize_questionnaire_data(data):
                 'completion_rate': statistics.get('completion_rate', 100),
                 'submission_time': statistics.get('submission_time', datetime.now())
             }
-    
-    return normalized
 
 def normalize_question_data(question):
     """标准化单个问题数据"""
@@ -1121,13 +1176,77 @@ def validate_questionnaire_with_schema(data):
     """
     try:
         print(f"DEBUG VALIDATION: Input basic_info: {data.get('basic_info', {})}")
-        schema = QuestionnaireSchema()
-        validated_data = schema.load(data)
+        validated_data = get_schema(QuestionnaireSchema).load(data)
         print(f"DEBUG VALIDATION: Output basic_info: {validated_data.get('basic_info', {})}")
         return True, [], validated_data
     except ValidationError as e:
         return False, e.messages, None
 
+def prepare_questionnaire(data):
+    """
+    单遍完成问卷的标准化、验证、问题类型处理和计分
+    结果与依次调用 normalize_questionnaire_data → validate_questionnaire_with_schema →
+    process_complete_questionnaire 相同，但每道题只标准化、验证、处理一次
+    （原流程在验证和最终处理时会各处理一遍）。
+    出现任何错误时按原流程重新执行，保证错误信息与原流程完全一致
+    返回 (is_valid, errors, processed_data)
+    """
+    try:
+        processed_data = _prepare_questionnaire_single_pass(data)
+    except Exception:
+        processed_data = None
+    if processed_data is not None:
+        return True, [], processed_data
+
+    try:
+        normalized_data = normalize_questionnaire_data(data)
+    except Exception as e:
+        return False, [f'数据标准化失败: {str(e)}'], None
+
+    is_valid, errors, validated_data = validate_questionnaire_with_schema(normalized_data)
+    if not is_valid:
+        return False, errors, None
+    return True, [], question_processor.process_questionnaire(validated_data)
+
+def _prepare_questionnaire_single_pass(data):
+    """prepare_questionnaire 的快速路径，任何问题都会抛出异常或返回 None，由调用方回退"""
+    normalized = normalize_questionnaire_header(data)
+    questions = data.get('questions', [])
+    # 顶层 Schema 只检查问题列表非空，逐题标准化和验证在下面的循环中完成
+    normalized['questions'] = questions
+    normalize_questionnaire_statistics(normalized, data)
+
+    validated_data = get_schema(_QuestionnaireHeaderSchema).load(normalized)
+    questionnaire_type = validated_data.get('type', '')
+    is_frankfurt = questionnaire_type == 'frankfurt_scale_selective_mutism'
+
+    processed_questions = []
+    total_score = 0
+    answered_questions = 0
+    for question in questions:
+        question = normalize_question_data(question)
+        if not question:
+            continue
+
+        question = validate_question_item(question, len(processed_questions), questionnaire_type)
+        if is_frankfurt:
+            # Frankfurt Scale 问题验证时不做处理；标准问卷的问题验证时已经处理过
+            question = question_processor.process_question(question)
+        processed_questions.append(question)
+
+        score = question_processor.calculate_question_score(question)
+        if score is not None:
+            total_score += score
+            answered_questions += 1
+
+    if not processed_questions:
+        return None
+
+    validated_data['questions'] = processed_questions
+    validate_questionnaire_statistics(validated_data, questionnaire_type)
+    question_processor.apply_statistics(validated_data, total_score, answered_questions)
+    return validated_data
+
 def create_validation_error_response(errors):
     """创建标准的验证错误响应"""
     return {
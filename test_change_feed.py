@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+问卷增量同步测试
+新增、修改、软删除问卷时 /api/questionnaires/changes 返回对应的变更，
+只写入报告（report_data / report_generated_at）不产生变更
+
+运行: python -m pytest test_change_feed.py -q
+"""
+
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import app as app_module
+import init_db as init_db_module
+from change_feed import TRIGGERS, UPDATE_TRIGGER, TRACKED_COLUMNS, create_change_feed_schema
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frankfurt_scale_sample.json')
+
+
+@pytest.fixture
+def client(tmp_path):
+    db_path = str(tmp_path / 'changes.db')
+
+    init_db_module.DATABASE_PATH = db_path
+    init_db_module.create_tables()
+
+    app_module.DATABASE = db_path
+    app_module.app.config['DATABASE_PATH'] = db_path
+    app_module.app.config['OPERATION_LOG_ASYNC'] = False
+    app_module._db_pool = None
+    app_module._log_writer = None
+    app_module.init_db()
+
+    test_client = app_module.app.test_client()
+    response = test_client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 200
+
+    yield test_client
+
+    app_module.get_db_pool().close_all()
+    app_module._db_pool = None
+
+
+def read_changes(test_client, since):
+    """返回 (变更列表, 下次同步的 since)"""
+    response = test_client.get('/api/questionnaires/changes', query_string={'since': since})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+    return lines, int(response.headers['X-Change-Cursor'])
+
+
+def submit(test_client, form):
+    response = test_client.post('/api/questionnaires', json=form)
+    assert response.status_code == 201, response.get_data(as_text=True)
+    return response.get_json()['id']
+
+
+def test_insert_update_report_and_delete(client):
+    with open(SAMPLE_FILE, 'r', encoding='utf-8') as f:
+        form = json.load(f)
+
+    questionnaire_id = submit(client, form)
+    changes, cursor = read_changes(client, 0)
+    assert [(c['id'], c['op']) for c in changes] == [(questionnaire_id, 'insert')]
+    assert changes[0]['questionnaire']['name'] == form['basic_info']['name']
+
+    form['basic_info']['name'] = '修改后的姓名'
+    response = client.put(f'/api/questionnaires/{questionnaire_id}', json=form)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    changes, cursor = read_changes(client, cursor)
+    assert [(c['id'], c['op']) for c in changes] == [(questionnaire_id, 'update')]
+    assert changes[0]['questionnaire']['name'] == '修改后的姓名'
+
+    # 生成报告只写入 report_data / report_generated_at，同步内容不变
+    response = client.post('/api/generate_frankfurt_report', json={'questionnaire_id': questionnaire_id})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    changes, next_cursor = read_changes(client, cursor)
+    assert changes == []
+    assert next_cursor == cursor
+
+    response = client.delete(f'/api/questionnaires/{questionnaire_id}')
+    assert response.status_code == 200, response.get_data(as_text=True)
+    changes, cursor = read_changes(client, cursor)
+    assert [(c['id'], c['op'], c['questionnaire']) for c in changes] == [(questionnaire_id, 'delete', None)]
+
+
+def test_outdated_update_trigger_is_replaced(client):
+    """已有数据库中不限定列的旧触发器在初始化时替换为当前定义"""
+    with app_module.get_db_pool().connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"DROP TRIGGER {UPDATE_TRIGGER}")
+        cursor.execute(TRIGGERS[UPDATE_TRIGGER].replace(f"UPDATE OF {', '.join(TRACKED_COLUMNS)}", 'UPDATE'))
+        create_change_feed_schema(cursor)
+        conn.commit()
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (UPDATE_TRIGGER,))
+        assert 'AFTER UPDATE OF type, data' in cursor.fetchone()[0]
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+游标分页查询计划回归测试
+检查问卷列表和操作日志的游标分页（第二页起）通过 created_at 索引直接定位到游标位置（SEARCH），
+而不是从头扫描索引（SCAN），并且逐页读取的结果与一次读取完全一致
+
+运行: python -m pytest test_cursor_query_plan.py -q
+"""
+
+import os
+import sys
+import re
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import app as app_module
+import init_db as init_db_module
+
+# 游标分页的接口: (路径, 数据在响应中的键)
+CURSOR_ENDPOINTS = [
+    ('/api/questionnaires', 'data'),
+    ('/api/admin/logs', 'data'),
+]
+
+KEYSET_CONDITION = re.compile(r"\(\s*(?:\w+\.)?created_at\s*,\s*(?:\w+\.)?id\s*\)\s*[<>]")
+INDEX_SCAN = re.compile(r"^SCAN (questionnaires|operation_logs|ol)\b")
+
+
+@pytest.fixture
+def client(tmp_path):
+    db_path = str(tmp_path / 'cursor.db')
+
+    init_db_module.DATABASE_PATH = db_path
+    init_db_module.create_tables()
+
+    app_module.DATABASE = db_path
+    app_module.app.config['DATABASE_PATH'] = db_path
+    app_module.app.config['OPERATION_LOG_ASYNC'] = False
+    app_module._db_pool = None
+    app_module._log_writer = None
+    app_module.init_db()
+    init_db_module.create_indexes()
+
+    # 记录接口实际执行的 SQL（参数已展开）
+    statements = []
+    pool = app_module.get_db_pool()
+    original_connect = pool.connect
+
+    def traced_connect():
+        conn = original_connect()
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    pool.connect = traced_connect
+
+    test_client = app_module.app.test_client()
+    response = test_client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 200
+
+    # 同一秒内创建多份问卷，created_at 相同时按 id 区分先后
+    for i in range(7):
+        response = test_client.post('/api/questionnaires', json={
+            'type': 'parent_interview',
+            'basic_info': {'name': f'测试儿童{"一二三四五六七"[i]}', 'grade': '三年级', 'submission_date': '2025-01-27'},
+            'questions': [{'id': '1', 'type': 'text_input', 'question': '问题一', 'answer': '回答'}]
+        })
+        assert response.status_code in (200, 201), response.get_data(as_text=True)
+
+    yield test_client, statements
+
+    pool.close_all()
+    app_module._db_pool = None
+
+
+def query_plan(sql):
+    with app_module.get_db_pool().connection() as conn:
+        return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()]
+
+
+def read_pages(test_client, path, key, limit):
+    """逐页读取全部结果，返回各页的 id 列表"""
+    pages = []
+    cursor = ''
+    while cursor is not None:
+        response = test_client.get(path, query_string={'cursor': cursor, 'limit': limit})
+        assert response.status_code == 200, response.get_data(as_text=True)
+        body = response.get_json()
+        pages.append([item['id'] for item in body[key]])
+        cursor = body['pagination']['next_cursor']
+    return pages
+
+
+@pytest.mark.parametrize('path, key', CURSOR_ENDPOINTS)
+def test_second_page_uses_index_search(client, path, key):
+    test_client, statements = client
+
+    first = test_client.get(path, query_string={'cursor': '', 'limit': 2})
+    assert first.status_code == 200, first.get_data(as_text=True)
+    next_cursor = first.get_json()['pagination']['next_cursor']
+    assert next_cursor
+
+    del statements[:]
+    second = test_client.get(path, query_string={'cursor': next_cursor, 'limit': 2})
+    assert second.status_code == 200, second.get_data(as_text=True)
+
+    keyset_queries = [
+        sql for sql in statements
+        if sql.lstrip().upper().startswith('SELECT') and KEYSET_CONDITION.search(sql)
+    ]
+    assert keyset_queries, f'{path} 第二页没有执行游标条件查询'
+
+    for sql in keyset_queries:
+        assert 'IS NULL OR' not in sql and 'IS NOT NULL' not in sql, sql
+        plan = query_plan(sql)
+        scans = [step for step in plan if INDEX_SCAN.match(step)]
+        assert not scans, f'{path} 游标分页扫描了索引:\n{sql}\n{plan}'
+        assert any(step.startswith('SEARCH') and 'created_at' in step for step in plan), \
+            f'{path} 未通过 created_at 索引定位游标:\n{sql}\n{plan}'
+
+
+@pytest.mark.parametrize('path, key', CURSOR_ENDPOINTS)
+def test_cursor_pages_match_single_read(client, path, key):
+    test_client, _ = client
+
+    expected = [item['id'] for item in test_client.get(path, query_string={'limit': 100}).get_json()[key]]
+    pages = read_pages(test_client, path, key, 2)
+
+    # 查看日志本身也会写入操作日志，只比较读取开始前已有的记录
+    assert all(len(page) <= 2 for page in pages)
+    assert [row_id for page in pages for row_id in page if row_id <= max(expected)] == expected
+
+
+def test_nullable_sort_rejects_cursor(client):
+    test_client, _ = client
+
+    response = test_client.get('/api/questionnaires', query_string={'cursor': '', 'sort_by': 'name'})
+    assert response.status_code == 400
+
+    # 偏移分页仍然可以按可能为空的列排序
+    response = test_client.get('/api/questionnaires', query_string={'sort_by': 'name', 'sort_order': 'asc'})
+    assert response.status_code == 200
+
+
+def test_keyset_condition_uses_row_values():
+    from pagination import CursorError, keyset_condition
+
+    assert keyset_condition('ol.created_at', 'ol.id', 'desc', '2025-01-27 10:00:00', 5) == \
+        ('(ol.created_at, ol.id) < (?, ?)', ['2025-01-27 10:00:00', 5])
+    assert keyset_condition('created_at', 'id', 'asc', '2025-01-27 10:00:00', 5) == \
+        ('(created_at, id) > (?, ?)', ['2025-01-27 10:00:00', 5])
+    assert keyset_condition('id', 'id', 'desc', None, 5) == ('id < ?', [5])
+
+    with pytest.raises(CursorError):
+        keyset_condition('created_at', 'id', 'desc', None, 5)
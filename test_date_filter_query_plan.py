@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+日期筛选查询计划回归测试
+检查带日期范围的接口生成的 SQL 都能通过 created_at 索引查找（SEARCH），
+而不是对 questionnaires / operation_logs 全表扫描（SCAN）
+
+运行: python -m pytest test_date_filter_query_plan.py -q
+"""
+
+import os
+import sys
+import re
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import app as app_module
+import init_db as init_db_module
+
+DATE_FROM = '2024-01-01'
+DATE_TO = '2030-12-31'
+
+# 带日期条件的接口: (方法, 路径, 请求参数或JSON)
+DATE_FILTERED_ENDPOINTS = [
+    ('get', '/api/questionnaires', {'date_from': DATE_FROM, 'date_to': DATE_TO, 'view': 'summary'}),
+    ('post', '/api/admin/export/advanced', {'format': 'csv', 'filters': {'date_from': DATE_FROM, 'date_to': DATE_TO}}),
+    ('post', '/api/admin/export/preview', {'filters': {'date_from': DATE_FROM, 'date_to': DATE_TO}}),
+    ('get', '/api/admin/logs', {'date_from': DATE_FROM, 'date_to': DATE_TO}),
+    ('post', '/api/admin/logs/export', {'format': 'csv', 'date_from': DATE_FROM, 'date_to': DATE_TO}),
+]
+
+DATE_CONDITION = re.compile(r"\b(?:\w+\.)?created_at\s*(?:>=|<)")
+FULL_SCAN = re.compile(r"^SCAN (questionnaires|operation_logs|ol)\b")
+
+
+@pytest.fixture
+def client(tmp_path):
+    db_path = str(tmp_path / 'plan.db')
+
+    init_db_module.DATABASE_PATH = db_path
+    init_db_module.create_tables()
+
+    app_module.DATABASE = db_path
+    app_module.app.config['DATABASE_PATH'] = db_path
+    app_module.app.config['OPERATION_LOG_ASYNC'] = False
+    app_module._db_pool = None
+    app_module._log_writer = None
+    app_module.init_db()
+    init_db_module.create_indexes()
+
+    # 记录接口实际执行的 SQL（参数已展开）
+    statements = []
+    pool = app_module.get_db_pool()
+    original_connect = pool.connect
+
+    def traced_connect():
+        conn = original_connect()
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    pool.connect = traced_connect
+
+    test_client = app_module.app.test_client()
+    response = test_client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 200
+    test_client.post('/api/questionnaires', json={
+        'type': 'parent_interview',
+        'basic_info': {'name': '测试儿童', 'grade': '三年级', 'submission_date': '2025-01-27'},
+        'questions': [{'id': '1', 'type': 'text_input', 'question': '问题一', 'answer': '回答'}]
+    })
+
+    yield test_client, statements
+
+    pool.close_all()
+    app_module._db_pool = None
+
+
+def query_plan(sql):
+    with app_module.get_db_pool().connection() as conn:
+        return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()]
+
+
+@pytest.mark.parametrize('method, path, payload', DATE_FILTERED_ENDPOINTS)
+def test_date_filters_use_index(client, method, path, payload):
+    test_client, statements = client
+    del statements[:]
+
+    if method == 'get':
+        response = test_client.get(path, query_string=payload or {})
+    else:
+        response = test_client.post(path, json=payload)
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+    date_queries = [
+        sql for sql in statements
+        if sql.lstrip().upper().startswith('SELECT') and DATE_CONDITION.search(sql)
+    ]
+    assert date_queries, f'{path} 没有执行带日期条件的查询'
+
+    for sql in date_queries:
+        assert 'DATE(created_at) >' not in sql and 'DATE(ol.created_at)' not in sql, sql
+        plan = query_plan(sql)
+        scans = [step for step in plan if FULL_SCAN.match(step)]
+        assert not scans, f'{path} 存在全表扫描:\n{sql}\n{plan}'
+        assert any(step.startswith('SEARCH') and 'created_at' in step for step in plan), \
+            f'{path} 未使用 created_at 索引:\n{sql}\n{plan}'
+
+
+def test_date_range_is_half_open():
+    from query_filters import date_range_filter, day_filter
+
+    conditions, params = date_range_filter('created_at', '2025-01-27', '2025-01-31')
+    assert conditions == ['created_at >= ?', 'created_at < ?']
+    assert params == ['2025-01-27', '2025-02-01']
+
+    condition, params = day_filter('ol.created_at', '2024-12-31')
+    assert condition == 'ol.created_at >= ? AND ol.created_at < ?'
+    assert params == ['2024-12-31', '2025-01-01']
+
+    with pytest.raises(ValueError):
+        date_range_filter('created_at', '2025/01/27')
+
+
+def test_statistics_read_only_rollups(client):
+    test_client, statements = client
+    del statements[:]
+
+    response = test_client.get('/api/admin/statistics')
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+    detail_reads = [
+        sql for sql in statements
+        if sql.lstrip().upper().startswith('SELECT') and re.search(r"\bFROM\s+(questionnaires|operation_logs)\b", sql)
+    ]
+    assert not detail_reads, detail_reads
+
+    data = response.get_json()['data']
+    assert data['overview']['total_questionnaires'] == 1
+    assert data['overview']['today_submissions'] == 1
+    assert data['distributions']['type_distribution'] == {'parent_interview': 1}
+    assert data['distributions']['grade_distribution'] == {'三年级': 1}
+    assert sum(item['count'] for item in data['trends']['hourly_distribution']) == 1
+    assert data['overview']['total_operations'] >= 1
+
+
+def test_rollups_match_rebuild(client):
+    from stats_rollup import ROLLUP_TABLE, rebuild_rollups
+
+    test_client, _ = client
+    created = test_client.post('/api/questionnaires', json={
+        'type': 'parent_interview',
+        'basic_info': {'name': '第二个', 'grade': '四年级', 'submission_date': '2025-01-28'},
+        'questions': [{'id': '1', 'type': 'text_input', 'question': '问题一', 'answer': '回答'}]
+    }).get_json()
+    test_client.delete(f"/api/questionnaires/{created['id']}")
+
+    with app_module.get_db_pool().connection() as conn:
+        query = f"SELECT source, dimension, bucket, count FROM {ROLLUP_TABLE} WHERE count != 0 ORDER BY 1, 2, 3"
+        incremental = conn.execute(query).fetchall()
+        rebuild_rollups(conn)
+        assert conn.execute(query).fetchall() == incremental
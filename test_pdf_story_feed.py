@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+PDF 按需排版测试
+export_utils._StoryFeed 依赖 reportlab build() 逐个从 story 头部取出 flowable 的内部实现，
+检查当前安装的 reportlab 仍然边生成边排版（不会先取完整个生成器），并且输出全部内容
+
+运行: python -m pytest test_pdf_story_feed.py -q
+"""
+
+import os
+import sys
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate
+
+from export_utils import _StoryFeed, exporter
+
+
+def test_story_is_consumed_while_building():
+    rows = [{'id': i, 'type': 'frankfurt_scale_selective_mutism', 'name': f'儿童{i}', 'grade': '三年级',
+             'submission_date': '2025-01-27'} for i in range(1, 2001)]
+    tables = list(exporter._pdf_detail_tables(rows))
+    assert len(tables) > 20
+
+    doc = SimpleDocTemplate(BytesIO(), pagesize=A4)
+    pending = []   # 每次生成下一个 flowable 时 story 中尚未排版的数量
+    laid_out = []
+
+    def flowables():
+        for table in tables:
+            pending.append(list.__len__(feed))
+            yield table
+
+    feed = _StoryFeed(flowables())
+    doc.afterFlowable = laid_out.append
+    doc.build(feed)
+
+    assert len(pending) == len(tables)
+    assert max(pending) <= 1
+    assert doc.page >= len(tables)
+
+    # 每个表格拆页后的各部分合计包含全部数据行（每部分都带表头）
+    laid_out_rows = sum(len(table._cellvalues) - 1 for table in laid_out if hasattr(table, '_cellvalues'))
+    assert laid_out_rows == len(rows)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+问卷存储往返测试
+提交问卷后，GET /api/questionnaires/<id> 和 JSON 导出返回的问卷文档与写入时完全相同
+（data 列为紧凑格式，分别在不压缩和 zlib 压缩下检查），且 data 列不再重复保存题干和选项文字
+
+运行: python -m pytest test_questionnaire_roundtrip.py -q
+"""
+
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import app as app_module
+import init_db as init_db_module
+import storage_codec
+from json_codec import dumps as json_dumps, loads as json_loads
+from questionnaire_store import DEFINITION_KEY
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frankfurt_scale_sample.json')
+
+
+def custom_form():
+    """选择题、填空题、评分题各若干道的问卷"""
+    questions = []
+    for i in range(9):
+        kind = i % 3
+        if kind == 0:
+            questions.append({
+                'id': f'q{i}', 'type': 'multiple_choice', 'question': f'第{i + 1}题 选择',
+                'options': [{'value': value, 'text': f'选项文字{value}'} for value in range(4)],
+                'selected': [i % 4]
+            })
+        elif kind == 1:
+            questions.append({'id': f'q{i}', 'type': 'text_input', 'question': f'第{i + 1}题 填空',
+                              'answer': f'孩子在学校主动和同学说话了 {i}'})
+        else:
+            questions.append({'id': f'q{i}', 'type': 'rating_scale', 'question': f'第{i + 1}题 评分',
+                              'rating': i % 5 + 1, 'min_rating': 1, 'max_rating': 5})
+    return {
+        'type': 'custom_form',
+        'basic_info': {'name': '往返测试', 'grade': '三年级', 'submission_date': '2025-01-27'},
+        'questions': questions
+    }
+
+
+def frankfurt_form():
+    with open(SAMPLE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture(params=[storage_codec.CODEC_NONE, storage_codec.CODEC_ZLIB])
+def client(request, tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'roundtrip.db')
+
+    init_db_module.DATABASE_PATH = db_path
+    init_db_module.create_tables()
+
+    app_module.DATABASE = db_path
+    app_module.app.config['DATABASE_PATH'] = db_path
+    app_module.app.config['OPERATION_LOG_ASYNC'] = False
+    app_module.app.config['STORAGE_CODEC'] = request.param
+    app_module._db_pool = None
+    app_module._log_writer = None
+    app_module.init_db()
+
+    # 记录写入 data 列之前的完整问卷文档
+    written = []
+    original_dump = app_module.dump_document
+
+    def dump_document(cursor, data):
+        written.append(json_loads(json_dumps(data)))
+        return original_dump(cursor, data)
+
+    monkeypatch.setattr(app_module, 'dump_document', dump_document)
+
+    test_client = app_module.app.test_client()
+    response = test_client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 200
+
+    yield test_client, written, request.param
+
+    app_module.get_db_pool().close_all()
+    app_module._db_pool = None
+    app_module.app.config['STORAGE_CODEC'] = storage_codec.CODEC_NONE
+    storage_codec.configure(codec=storage_codec.CODEC_NONE)
+
+
+def stored_data(questionnaire_id):
+    with app_module.get_db_pool().connection() as conn:
+        return conn.execute("SELECT data FROM questionnaires WHERE id = ?", (questionnaire_id,)).fetchone()[0]
+
+
+@pytest.mark.parametrize('make_form', [frankfurt_form, custom_form])
+def test_submit_read_export_roundtrip(client, make_form):
+    test_client, written, codec = client
+
+    response = test_client.post('/api/questionnaires', json=make_form())
+    assert response.status_code == 201, response.get_data(as_text=True)
+    questionnaire_id = response.get_json()['id']
+    assert len(written) == 1
+    original = written[0]
+
+    # data 列为紧凑格式（启用压缩时为压缩后的值），不含题干和选项文字
+    raw = stored_data(questionnaire_id)
+    assert storage_codec.is_encoded(raw) == (codec != storage_codec.CODEC_NONE)
+    text = storage_codec.decode(raw)
+    assert DEFINITION_KEY in json_loads(text)
+    for question in original['questions']:
+        assert question['question'] not in text
+        for option in question.get('options', []):
+            assert option['text'] not in text
+
+    response = test_client.get(f'/api/questionnaires/{questionnaire_id}')
+    assert response.status_code == 200
+    assert response.get_json()['data']['data'] == original
+
+    # JSON 导出保持字段顺序
+    response = test_client.get(f'/api/export/{questionnaire_id}', query_string={'format': 'json'})
+    assert response.status_code == 200
+    exported = json.loads(response.get_data())['data']
+    assert json.dumps(exported, ensure_ascii=False) == json.dumps(original, ensure_ascii=False)
+
+
+def test_store_definition_is_idempotent(tmp_path):
+    """同一定义重复保存不报错；同类型的新定义版本号递增"""
+    import sqlite3
+    from questionnaire_store import compact_document, create_definitions_table, store_definition
+
+    conn = sqlite3.connect(str(tmp_path / 'definitions.db'))
+    cursor = conn.cursor()
+    create_definitions_table(cursor)
+
+    form = custom_form()
+    _, first = compact_document(form)
+    form['questions'][0]['question'] = '修改后的题干'
+    _, second = compact_document(form)
+
+    assert store_definition(cursor, first) is True
+    assert store_definition(cursor, first) is False
+    assert store_definition(cursor, second) is True
+    rows = cursor.execute("SELECT content_hash, version FROM questionnaire_definitions ORDER BY version").fetchall()
+    assert rows == [(first['content_hash'], 1), (second['content_hash'], 2)]
+    conn.close()
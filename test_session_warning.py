@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+会话过期提醒回归测试
+会话即将过期时，JSON 响应的 session_warning 字段在 jsonify 序列化时附加，
+after_request 只添加响应头：大响应只序列化一次，不会被解析后再重新序列化
+
+运行: python -m pytest test_session_warning.py -q
+"""
+
+import os
+import sys
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import app as app_module
+import init_db as init_db_module
+from questionnaire_fields import HOT_FIELDS, extract_hot_fields
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frankfurt_scale_sample.json')
+LARGE_RESPONSE_BYTES = 512 * 1024
+
+
+@pytest.fixture
+def client(tmp_path):
+    db_path = str(tmp_path / 'session.db')
+
+    init_db_module.DATABASE_PATH = db_path
+    init_db_module.create_tables()
+
+    app_module.DATABASE = db_path
+    app_module.app.config['DATABASE_PATH'] = db_path
+    app_module.app.config['OPERATION_LOG_ASYNC'] = False
+    app_module._db_pool = None
+    app_module._log_writer = None
+    app_module.init_db()
+
+    # 直接写入 200 份完整的 Frankfurt 问卷，view=full 的列表页超过 512KB
+    with open(SAMPLE_FILE, 'r', encoding='utf-8') as f:
+        sample = json.load(f)
+    fields = extract_hot_fields(sample)
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    columns = ['type', 'created_at', 'updated_at', 'data'] + list(HOT_FIELDS)
+    with app_module.get_db_pool().connection() as conn:
+        conn.executemany(
+            f"INSERT INTO questionnaires ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})",
+            [[sample['type'], now, now, json.dumps(sample, ensure_ascii=False)] + [fields[f] for f in HOT_FIELDS]] * 200
+        )
+
+    test_client = app_module.app.test_client()
+    response = test_client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 200
+
+    yield test_client
+
+    app_module.get_db_pool().close_all()
+    app_module._db_pool = None
+
+
+@pytest.fixture
+def body_writes(monkeypatch):
+    """记录服务端对响应体的写入（set_data）和解析（get_json）"""
+    calls = {'set_data': [], 'get_json': 0}
+    response_class = app_module.app.response_class
+    original_set_data = response_class.set_data
+    original_get_json = response_class.get_json
+
+    def set_data(self, value):
+        calls['set_data'].append(len(value))
+        return original_set_data(self, value)
+
+    def get_json(self, *args, **kwargs):
+        calls['get_json'] += 1
+        return original_get_json(self, *args, **kwargs)
+
+    monkeypatch.setattr(response_class, 'set_data', set_data)
+    monkeypatch.setattr(response_class, 'get_json', get_json)
+    return calls
+
+
+def expire_soon(client):
+    """把最后活动时间调到距离会话超时不足 5 分钟"""
+    timeout_seconds = app_module.app.config['PERMANENT_SESSION_LIFETIME'].total_seconds()
+    with client.session_transaction() as session:
+        session['last_activity'] = time.time() - timeout_seconds + 60
+
+
+def test_large_response_serialized_once(client, body_writes):
+    expire_soon(client)
+
+    response = client.get('/api/questionnaires?view=full&limit=200')
+    body = response.get_data()
+
+    assert response.status_code == 200
+    assert response.headers.get('X-Session-Warning') == 'Session will expire soon'
+    assert len(body) > LARGE_RESPONSE_BYTES
+    assert json.loads(body)['session_warning'] == app_module.SESSION_WARNING_MESSAGE
+
+    # 响应体只在 jsonify 中写入一次，服务端没有解析响应
+    assert [size for size in body_writes['set_data'] if size > LARGE_RESPONSE_BYTES] == [len(body)]
+    assert body_writes['get_json'] == 0
+
+
+def test_no_warning_for_fresh_session(client, body_writes):
+    response = client.get('/api/questionnaires?limit=5')
+
+    assert response.status_code == 200
+    assert 'X-Session-Warning' not in response.headers
+    assert 'session_warning' not in json.loads(response.get_data())
+    assert body_writes['get_json'] == 0
+
+
+def test_error_response_only_gets_header(client):
+    expire_soon(client)
+
+    response = client.get('/api/questionnaires/999999')
+
+    assert response.status_code == 404
+    assert response.headers.get('X-Session-Warning') == 'Session will expire soon'
+    assert 'session_warning' not in json.loads(response.get_data())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+问卷重复提交测试
+只有 statistics.submission_time 不同的重复提交（双击、网络重试）返回第一次提交的问卷 ID，
+同一个 Idempotency-Key 提交不同内容时返回 409
+
+运行: python -m pytest test_submission_idempotency.py -q
+"""
+
+import os
+import sys
+import copy
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import app as app_module
+import init_db as init_db_module
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frankfurt_scale_sample.json')
+
+
+@pytest.fixture
+def client(tmp_path):
+    db_path = str(tmp_path / 'idempotency.db')
+
+    init_db_module.DATABASE_PATH = db_path
+    init_db_module.create_tables()
+
+    app_module.DATABASE = db_path
+    app_module.app.config['DATABASE_PATH'] = db_path
+    app_module.app.config['OPERATION_LOG_ASYNC'] = False
+    app_module._db_pool = None
+    app_module._log_writer = None
+    app_module.init_db()
+
+    yield app_module.app.test_client()
+
+    app_module.get_db_pool().close_all()
+    app_module._db_pool = None
+
+
+def sample_form(submission_time):
+    with open(SAMPLE_FILE, 'r', encoding='utf-8') as f:
+        form = json.load(f)
+    form['statistics'] = {'submission_time': submission_time}
+    return form
+
+
+def questionnaire_count():
+    with app_module.get_db_pool().connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM questionnaires").fetchone()[0]
+
+
+@pytest.mark.parametrize('headers', [{}, {'Idempotency-Key': 'retry-1'}], ids=['dedup-window', 'idempotency-key'])
+def test_resubmit_with_new_submission_time_is_duplicate(client, headers):
+    first = client.post('/api/questionnaires', json=sample_form('2025-01-27T10:00:00.000Z'), headers=headers)
+    assert first.status_code == 201, first.get_data(as_text=True)
+
+    second = client.post('/api/questionnaires', json=sample_form('2025-01-27T10:00:01.234Z'), headers=headers)
+    assert second.status_code == 200, second.get_data(as_text=True)
+    body = second.get_json()
+    assert body['id'] == first.get_json()['id']
+    assert body['duplicate'] is True
+    assert questionnaire_count() == 1
+
+
+def test_reused_key_with_different_content_conflicts(client):
+    headers = {'Idempotency-Key': 'retry-2'}
+    form = sample_form('2025-01-27T10:00:00.000Z')
+    response = client.post('/api/questionnaires', json=form, headers=headers)
+    assert response.status_code == 201, response.get_data(as_text=True)
+
+    changed = copy.deepcopy(form)
+    changed['basic_info']['name'] = '另一个孩子'
+    response = client.post('/api/questionnaires', json=changed, headers=headers)
+    assert response.status_code == 409, response.get_data(as_text=True)
+    assert questionnaire_count() == 1